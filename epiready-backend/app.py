@@ -1,4 +1,9 @@
-if __name__ == '__main__':
+import os
+if os.getenv("SERVER_MODE") != "asgi":
+    # Flask-SocketIO picks eventlet whenever it's installed, and its
+    # background tasks (monitor, fanout, presence, ...) only get to run if
+    # the stdlib is patched before anything else imports it; `flask run`
+    # and gunicorn both come through here
     import eventlet
     eventlet.monkey_patch()
 from flask import Flask, jsonify
@@ -7,10 +12,14 @@ from flask_cors import CORS
 from flask_socketio import SocketIO
 from routes import all_blueprints
 from dotenv import load_dotenv
-from config.database import init_db, db
+from config.database import init_db, db, pool_metrics
+from config.replicas import replica_router
+from utils.serialization import init_json
+from utils.fanout import fanout
+from utils.rate_limit import rate_limiter
+from auth.auth import metrics_access_required
 import os
-from flask_migrate import Migrate
-from models import user, shipment, temperature, alert, weather, shipment_action, chat, organization
+from models import user, shipment, temperature, alert, weather, shipment_action, chat, organization, organization_summary, presence, refresh_token, rate_limit
 
 load_dotenv()
 
@@ -19,6 +28,7 @@ socketio = SocketIO(cors_allowed_origins=os.getenv("CORS_ORIGIN"))
 def create_app():
     app = Flask(__name__)
     app.secret_key = os.getenv("SECRET_KEY")
+    init_json(app)
 
     print("CORS_ORIGIN:", os.getenv("CORS_ORIGIN"))
 
@@ -35,12 +45,18 @@ def create_app():
     
     print("we are here")
     
-    migrate = Migrate(app, db)
-    socketio.init_app(app)
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        # Alembic is only needed for `flask db ...`; keep it out of server boot
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    if os.getenv("SERVER_MODE") != "asgi":
+        # The ASGI mode serves Socket.IO itself; this would only pull in eventlet
+        socketio.init_app(app)
     mail = Mail(app)
 
     for blueprint, prefix in all_blueprints:
         app.register_blueprint(blueprint, url_prefix=prefix)
+    rate_limiter.init_app(app)
 
     register_socketio_events(socketio, app, mail)
     return app
@@ -53,6 +69,16 @@ def health_check():
 
     return jsonify(status="Healthy"), 200
 
+@app.route("/metrics", methods=["GET"])
+@metrics_access_required
+def metrics():
+    return jsonify(
+        socketio_fanout=fanout.metrics(),
+        database_pool=pool_metrics(),
+        database_replicas=replica_router.metrics(),
+        rate_limit=rate_limiter.metrics(),
+    ), 200
+
 @app.after_request
 def add_security_headers(response):
     response.headers['X-Frame-Options'] = 'DENY'
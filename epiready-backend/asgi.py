@@ -0,0 +1,180 @@
+"""
+ASGI run mode: the same Flask routes and Socket.IO events on asyncio instead
+of eventlet.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Like the eventlet mode this is meant for a single worker: rooms, presence and
+the replay buffer live in process memory. REST requests go through the Flask
+app unchanged (run on a thread pool by asgiref); Socket.IO is served by
+python-socketio's AsyncServer. Handlers reuse the helpers in socket_events.py
+and run their blocking database work on worker threads, so a slow query holds
+a thread rather than the event loop. The monitor is an asyncio task that
+loads active shipments through the asyncpg engine and hands them to the
+shared monitor_tick().
+"""
+import asyncio
+import os
+
+# Keeps create_app() from registering the Flask-SocketIO handlers
+os.environ['SERVER_MODE'] = 'asgi'
+
+import jwt
+import socketio
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import select
+from app import app as flask_app
+from config.async_database import async_session
+from controllers.alerts import monitor_tick, MONITOR_INTERVAL
+from models.chat import is_room_member
+from models.shipment import Shipment
+from socket_events import socket_user_id, replay_events, store_chat_message, record_read
+from utils.async_bridge import AsyncSocketIOBridge
+from utils.read_receipts import read_receipts
+from utils.write_behind import chat_write_behind
+from utils.presence import presence
+from utils.fanout import fanout
+
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins=os.getenv("CORS_ORIGIN"))
+bridge = AsyncSocketIOBridge(sio)
+mail = flask_app.extensions['mail']
+background_tasks = set()
+
+async def run_sync(fn, *args):
+    """Runs a blocking helper on a worker thread, inside its own app context."""
+    def call():
+        with flask_app.app_context():
+            return fn(*args)
+    return await asyncio.to_thread(call)
+
+@sio.event
+async def connect(sid, environ, auth):
+    try:
+        user_id = socket_user_id(flask_app, auth)
+    except jwt.InvalidTokenError as e:
+        print(f"Invalid token: {e}")
+        return False
+    if not user_id:
+        print("No token provided on socket connection.")
+        return False
+
+    print(f"Socket connected for user {user_id}")
+    await sio.enter_room(sid, str(user_id))
+    await run_sync(presence.connect, user_id, sid)
+
+@sio.event
+async def disconnect(sid, *args):
+    try:
+        fanout.forget(sid)
+        user_id = await run_sync(presence.disconnect, sid)
+        print(f"Socket disconnected for user {user_id}")
+    except Exception as e:
+        print(f"Error recording disconnect: {e}")
+
+@sio.event
+async def heartbeat(sid, *args):
+    try:
+        return await run_sync(presence.heartbeat, sid)
+    except Exception as e:
+        print(f"Error recording heartbeat: {e}")
+        return False
+
+@sio.event
+async def replay(sid, data):
+    try:
+        user_id = socket_user_id(flask_app, data)
+        if not user_id:
+            return False
+        await sio.emit('replay', await run_sync(replay_events, user_id, data), to=sid)
+    except Exception as e:
+        print(f"Error replaying events: {e}")
+        return False
+
+@sio.event
+async def join_chat_room(sid, data):
+    try:
+        user_id = socket_user_id(flask_app, data)
+        room_id = data.get('room_id')
+        if not user_id or not room_id:
+            return False
+        if not await run_sync(is_room_member, user_id, room_id):
+            return False
+        await sio.enter_room(sid, f"chat_room_{room_id}")
+        print(f"User {user_id} joined chat room {room_id}")
+    except Exception as e:
+        print(f"Error joining chat room: {e}")
+        return False
+
+@sio.event
+async def leave_chat_room(sid, data):
+    try:
+        room_id = data.get('room_id')
+        if room_id:
+            await sio.leave_room(sid, f"chat_room_{room_id}")
+            print(f"User left chat room {room_id}")
+    except Exception as e:
+        print(f"Error leaving chat room: {e}")
+
+@sio.event
+async def send_message(sid, data):
+    try:
+        user_id = socket_user_id(flask_app, data)
+        room_id = data.get('room_id')
+        content = data.get('content')
+        if not user_id or not room_id or not content:
+            return False
+        if not await run_sync(is_room_member, user_id, room_id):
+            return False
+
+        message_data = await run_sync(store_chat_message, user_id, room_id, content, data.get('message_type', 'text'))
+        await sio.emit('new_message', message_data, room=f"chat_room_{room_id}")
+        print(f"Message sent in room {room_id} by user {user_id}")
+    except Exception as e:
+        print(f"Error sending message: {e}")
+        return False
+
+@sio.event
+async def mark_read(sid, data):
+    try:
+        user_id = socket_user_id(flask_app, data)
+        room_id = data.get('room_id')
+        message_id = data.get('message_id')
+        if not user_id or not room_id or not isinstance(message_id, int):
+            return False
+        if not await run_sync(is_room_member, user_id, room_id):
+            return False
+        await run_sync(record_read, user_id, room_id, message_id)
+    except Exception as e:
+        print(f"Error marking messages read: {e}")
+        return False
+
+async def active_shipments():
+    async with async_session() as session:
+        return (await session.scalars(select(Shipment).where(Shipment.status == 'active'))).all()
+
+async def temperature_monitor():
+    state = {'emails_sent': 0}
+    while True:
+        try:
+            shipments = await active_shipments()
+            await run_sync(monitor_tick, flask_app, mail, state, shipments)
+        except Exception as e:
+            print(f"[monitor] pass failed: {e}")
+        await asyncio.sleep(MONITOR_INTERVAL)
+
+async def startup():
+    bridge.loop = asyncio.get_running_loop()
+    read_receipts.start(bridge)
+    chat_write_behind.start(bridge, flask_app)
+    presence.start(bridge, flask_app)
+    fanout.start(bridge)
+    task = asyncio.create_task(temperature_monitor())
+    background_tasks.add(task)
+
+async def shutdown():
+    for task in background_tasks:
+        task.cancel()
+    if chat_write_behind.enabled:
+        await asyncio.to_thread(chat_write_behind.flush)
+
+app = socketio.ASGIApp(sio, other_asgi_app=WsgiToAsgi(flask_app), on_startup=startup, on_shutdown=shutdown)
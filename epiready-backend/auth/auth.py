@@ -1,11 +1,19 @@
+import hmac
+import os
 import jwt
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, g
 from functools import wraps
 
+# Who may read operational endpoints (/metrics): a shared token for scrapers,
+# sent as "Authorization: Bearer <token>", or a comma-separated address allowlist
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = {ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()}
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         if current_app.config.get("TESTING", False):
+            g.user_id = 1
             return f(user_id=1, *args, **kwargs)
         
         token = None
@@ -29,5 +37,20 @@ def token_required(f):
         except jwt.InvalidTokenError:
             return jsonify({'error': 'Invalid token'}), 401
 
+        # Read by the replica router for read-your-writes
+        g.user_id = user_id
         return f(user_id, *args, **kwargs)
-    return decorated
\ No newline at end of file
+    return decorated
+
+
+def metrics_access_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        if METRICS_TOKEN and auth_header.startswith('Bearer ') and hmac.compare_digest(auth_header[7:], METRICS_TOKEN):
+            return f(*args, **kwargs)
+        # remote_addr is the client's own behind a trusted proxy (TRUSTED_PROXY_HOPS)
+        if request.remote_addr in METRICS_ALLOWED_IPS:
+            return f(*args, **kwargs)
+        return jsonify({'error': 'Forbidden'}), 403
+    return decorated
@@ -0,0 +1,105 @@
+"""
+Login throughput benchmark. Shows how many logins per second the server
+sustains and, more importantly, whether a login burst stalls everything else.
+
+    python benchmarks/login_throughput.py --url http://localhost:5000 \\
+        --email bench@example.com --password bench-password --signup
+
+--concurrency workers POST /api/auth/login for --seconds while one probe
+requests GET /health every 50 ms. If bcrypt ran on the eventlet hub, the
+probe latency would climb to the hashing time times the queue length. With
+the thread-pool offload it should stay near its idle value. Run it at a few
+BCRYPT_ROUNDS values to pick the cost. Prints one JSON line.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import aiohttp
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+    return {'n': len(samples), 'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99),
+            'mean_ms': round(statistics.mean(samples) * 1000, 2)}
+
+
+async def login_worker(args, session, deadline, results):
+    body = {'email': args.email, 'password': args.password}
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            async with session.post(f"{args.url}/api/auth/login", json=body) as response:
+                await response.read()
+                if response.status != 200:
+                    results['errors'].append(f"login {response.status}")
+                    continue
+        except aiohttp.ClientError as e:
+            results['errors'].append(f"login {e}")
+            continue
+        results['login'].append(time.perf_counter() - started)
+
+
+async def health_probe(args, session, deadline, results):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            async with session.get(f"{args.url}/health") as response:
+                await response.read()
+            results['health'].append(time.perf_counter() - started)
+        except aiohttp.ClientError as e:
+            results['errors'].append(f"health {e}")
+        await asyncio.sleep(0.05)
+
+
+async def run(args):
+    results = {'login': [], 'health': [], 'errors': []}
+    connector = aiohttp.TCPConnector(limit=args.concurrency + 2)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if args.signup:
+            async with session.post(f"{args.url}/api/auth/signup",
+                                    json={'email': args.email, 'password': args.password}) as response:
+                await response.read()
+
+        # Idle baseline for the probe
+        idle = {'health': [], 'errors': []}
+        await health_probe(args, session, time.perf_counter() + 2, idle)
+
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        await asyncio.gather(
+            health_probe(args, session, deadline, results),
+            *(login_worker(args, session, deadline, results) for _ in range(args.concurrency)),
+        )
+        elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'elapsed_s': round(elapsed, 2),
+        'logins_per_s': round(len(results['login']) / elapsed, 2),
+        'login': percentiles(results['login']),
+        'health_idle': percentiles(idle['health']),
+        'health_under_load': percentiles(results['health']),
+        'errors': len(results['errors']),
+        'first_errors': results['errors'][:5],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--signup', action='store_true', help="register the user first (ignored if it exists)")
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
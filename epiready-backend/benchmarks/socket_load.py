@@ -0,0 +1,151 @@
+"""
+Load test for comparing the eventlet and ASGI run modes.
+
+Start the backend in one mode against a seeded database, then run e.g.
+
+    gunicorn --worker-class eventlet -w 1 -b 0.0.0.0:5000 app:app
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+
+    python benchmarks/socket_load.py --url http://localhost:5000 --label eventlet \\
+        --secret "$SECRET_KEY" --users 1-50 --room 1
+    python benchmarks/socket_load.py --url http://localhost:5001 --label asgi \\
+        --secret "$SECRET_KEY" --users 1-50 --room 1
+
+Each simulated user opens a Socket.IO connection, joins the chat room and
+sends --messages messages, timing each one until its own 'new_message'
+broadcast comes back. At the same time --http-concurrency workers hit
+GET /api/chat/rooms. All users in --users must be members of --room.
+Prints one JSON line of latency percentiles per run so results from both
+modes can be collected and diffed.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import aiohttp
+import jwt
+import socketio
+
+
+def percentiles(samples):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+    return {'n': len(samples), 'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99),
+            'mean_ms': round(statistics.mean(samples) * 1000, 2)}
+
+
+def parse_users(spec):
+    if '-' in spec:
+        low, high = map(int, spec.split('-'))
+        return list(range(low, high + 1))
+    return [int(u) for u in spec.split(',')]
+
+
+def bearer(secret, user_id):
+    return "Bearer " + jwt.encode({'user_id': user_id, 'exp': int(time.time()) + 3600}, secret, algorithm="HS256")
+
+
+async def chat_user(args, user_id, results):
+    client = socketio.AsyncClient(reconnection=False)
+    token = bearer(args.secret, user_id)
+    waiting = {}
+
+    @client.on('new_message')
+    async def on_message(data):
+        future = waiting.pop(data.get('content'), None)
+        if future and not future.done():
+            future.set_result(time.perf_counter())
+
+    started = time.perf_counter()
+    try:
+        await client.connect(args.url, auth={'token': token}, transports=['websocket'])
+    except Exception as e:
+        results['errors'].append(f"connect {user_id}: {e}")
+        return
+    results['connect'].append(time.perf_counter() - started)
+
+    try:
+        await client.call('join_chat_room', {'token': token, 'room_id': args.room}, timeout=args.timeout)
+    except socketio.exceptions.TimeoutError:
+        results['errors'].append(f"join timeout {user_id}")
+
+    for i in range(args.messages):
+        content = f"load {user_id}-{i}-{time.time_ns()}"
+        future = asyncio.get_running_loop().create_future()
+        waiting[content] = future
+        sent = time.perf_counter()
+        await client.emit('send_message', {'token': token, 'room_id': args.room, 'content': content})
+        try:
+            received = await asyncio.wait_for(future, args.timeout)
+            results['message'].append(received - sent)
+        except asyncio.TimeoutError:
+            waiting.pop(content, None)
+            results['errors'].append(f"message timeout {user_id}-{i}")
+
+    await client.disconnect()
+
+
+async def http_worker(args, session, token, deadline, results):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            async with session.get(f"{args.url}/api/chat/rooms", headers={'Authorization': token}) as response:
+                await response.read()
+                if response.status >= 400:
+                    results['errors'].append(f"http {response.status}")
+                    continue
+        except aiohttp.ClientError as e:
+            results['errors'].append(f"http {e}")
+            continue
+        results['http'].append(time.perf_counter() - started)
+
+
+async def run(args):
+    users = parse_users(args.users)
+    results = {'connect': [], 'message': [], 'http': [], 'errors': []}
+    started = time.perf_counter()
+
+    async with aiohttp.ClientSession() as session:
+        chat = asyncio.gather(*(chat_user(args, user_id, results) for user_id in users))
+        deadline = time.perf_counter() + args.http_seconds
+        http = asyncio.gather(*(
+            http_worker(args, session, bearer(args.secret, users[i % len(users)]), deadline, results)
+            for i in range(args.http_concurrency)
+        ))
+        await asyncio.gather(chat, http)
+
+    elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'label': args.label,
+        'url': args.url,
+        'users': len(users),
+        'elapsed_s': round(elapsed, 2),
+        'messages_per_s': round(len(results['message']) / elapsed, 2),
+        'http_per_s': round(len(results['http']) / elapsed, 2),
+        'connect': percentiles(results['connect']),
+        'message_round_trip': percentiles(results['message']),
+        'http_rooms': percentiles(results['http']),
+        'errors': len(results['errors']),
+        'first_errors': results['errors'][:5],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--label', default='')
+    parser.add_argument('--secret', required=True, help="the backend's SECRET_KEY, used to mint user tokens")
+    parser.add_argument('--users', default='1-20', help="user ids, e.g. 1-50 or 3,4,7")
+    parser.add_argument('--room', type=int, required=True, help="chat room all users belong to")
+    parser.add_argument('--messages', type=int, default=20, help="messages sent per user")
+    parser.add_argument('--http-concurrency', type=int, default=10)
+    parser.add_argument('--http-seconds', type=float, default=20)
+    parser.add_argument('--timeout', type=float, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start benchmark: wall time to import the app in a fresh interpreter,
+which is what a container start or a test-suite import pays.
+
+    python benchmarks/startup.py                       # app.py, schema check off
+    python benchmarks/startup.py --create-all          # with create_all() on boot
+    python benchmarks/startup.py --module asgi --runs 20
+    python benchmarks/startup.py --importtime 15       # slowest imports
+
+Runs from the backend directory with the environment's DATABASE_URL (or
+--database-url). Prints one JSON line per run configuration.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once(args, env):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {args.module}'], cwd=BACKEND, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def slowest_imports(args, env, count):
+    """Cumulative -X importtime of the module's direct imports, slowest first."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {args.module}'], cwd=BACKEND,
+                            env=env, check=True, capture_output=True, text=True)
+    children, rows = [], []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = line.replace('import time:', '|').split('|')
+        # One leading space at the top level, two more per nesting level;
+        # children are reported before the module that imported them
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative_us), name.strip()))
+        elif depth == 0:
+            if name.strip() == args.module:
+                rows = children
+            children = []
+    rows.sort(reverse=True)
+    return [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for us, name in rows[:count]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app', help="module to import: app (eventlet) or asgi")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--create-all', action='store_true', help="set DB_CREATE_ALL=true, the old boot path")
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help="also list the N slowest imports")
+    args = parser.parse_args()
+
+    env = dict(os.environ, DB_CREATE_ALL='true' if args.create_all else 'false')
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+
+    # One untimed run so the bytecode cache is warm for every timed one
+    run_once(args, env)
+    samples = [run_once(args, env) for _ in range(args.runs)]
+
+    report = {
+        'module': args.module,
+        'create_all': args.create_all,
+        'runs': args.runs,
+        'median_ms': round(statistics.median(samples) * 1000, 1),
+        'min_ms': round(min(samples) * 1000, 1),
+        'max_ms': round(max(samples) * 1000, 1),
+    }
+    if args.importtime:
+        report['slowest_imports'] = slowest_imports(args, env, args.importtime)
+    print(json.dumps(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+from sqlalchemy.engine import make_url
+from config.database import DATABASE_URL, DB_STATEMENT_TIMEOUT_MS, engine_options, pgbouncer_transaction_mode
+
+# Created on first use so importing this module doesn't require asyncpg
+_engine = None
+_sessionmaker = None
+
+def async_database_url(url):
+    """DATABASE_URL rewritten for the asyncpg driver (used by the ASGI mode)."""
+    url = make_url(url)
+    if url.get_backend_name() != 'postgresql':
+        raise ValueError("the async engine needs a PostgreSQL DATABASE_URL")
+    query = dict(url.query)
+    # asyncpg spells libpq's sslmode as ssl
+    if 'sslmode' in query:
+        query['ssl'] = query.pop('sslmode')
+    if pgbouncer_transaction_mode():
+        # Prepared statements don't survive PgBouncer handing out server connections
+        query['prepared_statement_cache_size'] = '0'
+    return url.set(drivername='postgresql+asyncpg', query=query)
+
+def get_async_engine():
+    global _engine
+    if _engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        # Same pool settings as the sync engine; asyncpg takes the timeout as a server setting
+        options = {k: v for k, v in engine_options(DATABASE_URL).items() if k != 'connect_args'}
+        if pgbouncer_transaction_mode():
+            options['connect_args'] = {'statement_cache_size': 0}
+        elif DB_STATEMENT_TIMEOUT_MS:
+            options['connect_args'] = {'server_settings': {'statement_timeout': str(DB_STATEMENT_TIMEOUT_MS)}}
+        _engine = create_async_engine(async_database_url(DATABASE_URL), **options)
+    return _engine
+
+def async_session():
+    """A new AsyncSession; objects stay usable after commit so they can be handed to sync code."""
+    global _sessionmaker
+    if _sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _sessionmaker = async_sessionmaker(get_async_engine(), expire_on_commit=False)
+    return _sessionmaker()
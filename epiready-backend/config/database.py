@@ -1,12 +1,19 @@
+from flask.cli import with_appcontext
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+import click
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from config.replicas import RoutingSession, replica_binds
 
 load_dotenv()
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
@@ -15,19 +22,128 @@ DB_PORT = os.getenv('DB_PORT')
 DB_NAME = os.getenv('DB_NAME')
 DATABASE_URL = os.getenv('DATABASE_URL')
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = scoped_session(sessionmaker(bind=engine))
+# Pool settings. Under eventlet every request, socket handler and background
+# task is a greenlet in one process, all drawing from this one pool.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+# 'transaction' when connecting through PgBouncer in transaction pooling mode
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '').lower()
+# Connections background tasks leave free for requests (see wait_for_pool)
+DB_POOL_RESERVE = int(os.getenv('DB_POOL_RESERVE', '2'))
+
+_pool_stats = {'checkouts': 0, 'peak_checked_out': 0}
+_pool_lock = threading.Lock()
+
+def pgbouncer_transaction_mode():
+    return DB_PGBOUNCER == 'transaction'
+
+def engine_options(url=DATABASE_URL):
+    """SQLALCHEMY_ENGINE_OPTIONS for *url*, from the DB_* environment settings."""
+    options = {'pool_pre_ping': True}
+    if not url or make_url(url).get_backend_name() != 'postgresql':
+        return options
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    if DB_STATEMENT_TIMEOUT_MS and not pgbouncer_transaction_mode():
+        # PgBouncer rejects startup options; that mode sets it per transaction instead
+        options['connect_args'] = {'options': f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+@event.listens_for(Session, 'after_begin')
+def set_transaction_statement_timeout(session, transaction, connection):
+    # With transaction pooling a session-level SET would leak to whichever
+    # client gets the server connection next, so scope it to the transaction
+    if pgbouncer_transaction_mode() and DB_STATEMENT_TIMEOUT_MS and connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {DB_STATEMENT_TIMEOUT_MS}")
+
+def watch_pool(engine):
+    """Tracks checkouts and the high-water mark for pool_metrics()."""
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(*args):
+        with _pool_lock:
+            _pool_stats['checkouts'] += 1
+            if isinstance(engine.pool, QueuePool):
+                _pool_stats['peak_checked_out'] = max(_pool_stats['peak_checked_out'], engine.pool.checkedout())
+
+def pool_metrics(engine=None):
+    """Utilization of the connection pool; needs an app context when *engine* is omitted."""
+    engine = engine or db.engine
+    pool = engine.pool
+    metrics = {'pool': type(pool).__name__}
+    with _pool_lock:
+        metrics.update(_pool_stats)
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + pool._max_overflow
+        metrics.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            utilization=round(pool.checkedout() / capacity, 3) if capacity > 0 else None,
+        )
+    return metrics
+
+def wait_for_pool(reserve=DB_POOL_RESERVE, timeout=DB_POOL_TIMEOUT, engine=None):
+    """
+    Waits until the pool has more than *reserve* connections free, so a
+    background task doesn't take the last ones from requests. Returns False
+    if that didn't happen within *timeout* seconds. Uses time.sleep, which is
+    green under eventlet and a plain thread sleep in the ASGI mode.
+    """
+    pool = (engine or db.engine).pool
+    if not isinstance(pool, QueuePool):
+        return True
+    deadline = time.monotonic() + timeout
+    while pool.size() + pool._max_overflow - pool.checkedout() <= reserve:
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.05)
+    return True
+
+def create_schema_on_boot(app):
+    """
+    Whether init_db runs create_all(). Only in development and tests unless
+    DB_CREATE_ALL says otherwise; deployed databases get their schema from
+    Alembic (`flask db upgrade`), which keeps boot free of table reflection.
+    """
+    flag = os.getenv('DB_CREATE_ALL')
+    if flag:
+        return flag.lower() == 'true'
+    return bool(app.config.get('TESTING')) or os.getenv('FLASK_ENV') == 'development'
+
+@click.command('create-schema')
+@with_appcontext
+def create_schema_command():
+    """Creates every table on an empty database and stamps it at the Alembic head."""
+    from flask_migrate import stamp
+    db.create_all(bind_key=None)
+    stamp()
 
 def init_db(app):
     """Initialize the database with the Flask app"""
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(DATABASE_URL)
+    # Read replicas for read_only views; no models are bound to them
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: {'url': url, **engine_options(url)} for key, url in replica_binds().items()
+    }
+
     db.init_app(app)
-    
-    with app.app_context():
-        db.create_all()
 
-def get_db_session():
-    """Return the scoped session (reuse across the app)."""
-    return SessionLocal() 
\ No newline at end of file
+    app.cli.add_command(create_schema_command)
+
+    with app.app_context():
+        watch_pool(db.engine)
+        if create_schema_on_boot(app):
+            # Primary only; replicas get the schema through replication
+            db.create_all(bind_key=None)
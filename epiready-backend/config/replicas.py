@@ -0,0 +1,173 @@
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from contextlib import contextmanager
+from functools import wraps
+from sqlalchemy import event
+import itertools
+import os
+import threading
+import time
+
+# Comma-separated replica URLs; each becomes a 'replica_<n>' bind
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', '5'))
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '5'))
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+# Seconds behind the primary; 0 when caught up, NULL (treated as 0) when the
+# server isn't a standby at all
+LAG_QUERY = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+def replica_binds(urls=DATABASE_REPLICA_URLS):
+    return {f'{REPLICA_BIND_PREFIX}{i}': url for i, url in enumerate(urls)}
+
+
+class ReplicaRouter:
+    """
+    Decides which engine a read_only view reads from.
+
+    Replicas are tried round-robin. One is skipped while its measured lag is
+    above *max_lag* or it can't be reached; lag is measured at most every
+    *check_interval* seconds per replica. A user whose request committed a
+    write in the last *read_your_writes* seconds reads from the primary, so
+    they see their own change even if the replicas haven't replayed it yet.
+    """
+
+    def __init__(self, max_lag=5, check_interval=5, read_your_writes=5):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.read_your_writes = read_your_writes
+        self._lag = {}
+        self._writes = {}
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self.counters = {'replica_reads': 0, 'lag_fallbacks': 0, 'sticky_reads': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def note_write(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            self._writes[user_id] = now
+            if len(self._writes) > 10000:
+                self._writes = {u: t for u, t in self._writes.items() if now - t < self.read_your_writes}
+
+    def recently_wrote(self, user_id):
+        with self._lock:
+            wrote = self._writes.get(user_id)
+        return wrote is not None and time.monotonic() - wrote < self.read_your_writes
+
+    def measure_lag(self, engine):
+        if engine.dialect.name != 'postgresql':
+            return 0.0
+        with engine.connect() as connection:
+            return float(connection.exec_driver_sql(LAG_QUERY).scalar() or 0)
+
+    def lag(self, key, engine):
+        """Cached lag of replica *key* in seconds, or None if it couldn't be reached."""
+        with self._lock:
+            checked = self._lag.get(key)
+        if checked and time.monotonic() - checked[0] < self.check_interval:
+            return checked[1]
+        try:
+            lag = self.measure_lag(engine)
+        except Exception as e:
+            print(f"[replicas] lag check on {key} failed: {e}")
+            lag = None
+        with self._lock:
+            self._lag[key] = (time.monotonic(), lag)
+        return lag
+
+    def pick(self, engines, user_id=None):
+        """A replica engine for this read, or None to use the primary."""
+        keys = sorted(key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX))
+        if not keys:
+            return None
+        if user_id is not None and self.recently_wrote(user_id):
+            self._count('sticky_reads')
+            return None
+        start = next(self._turn)
+        for i in range(len(keys)):
+            key = keys[(start + i) % len(keys)]
+            lag = self.lag(key, engines[key])
+            if lag is not None and lag <= self.max_lag:
+                self._count('replica_reads')
+                return engines[key]
+        self._count('lag_fallbacks')
+        return None
+
+    def metrics(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                lag={key: lag for key, (_, lag) in self._lag.items()},
+            )
+
+
+replica_router = ReplicaRouter(DB_REPLICA_MAX_LAG, DB_REPLICA_LAG_CHECK_INTERVAL, DB_READ_YOUR_WRITES_SECONDS)
+
+
+class RoutingSession(Session):
+    """db.session class that sends a read_only view's queries to the replica it picked."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = g.get('db_replica') if has_app_context() else None
+        if replica is not None and bind is None and not self._flushing:
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flushed(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _committed(session):
+    if session.info.pop('wrote', False) and has_app_context() and g.get('user_id') is not None:
+        replica_router.note_write(g.user_id)
+
+@event.listens_for(RoutingSession, 'after_soft_rollback')
+def _rolled_back(session, previous_transaction):
+    session.info.pop('wrote', None)
+
+
+@contextmanager
+def on_primary():
+    """
+    Sends the enclosed queries to the primary even inside a read_only view,
+    for reads whose result outlives the request (e.g. cached), where a
+    lagging replica's answer would stick around.
+    """
+    replica = g.pop('db_replica', None) if has_app_context() else None
+    try:
+        yield
+    finally:
+        if replica is not None:
+            g.db_replica = replica
+
+
+def read_only(f):
+    """
+    Lets a view's queries go to a read replica. Put it under token_required,
+    which records the caller for read-your-writes. The view must not write;
+    its reads fall back to the primary when no replica is usable.
+    """
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        extension = current_app.extensions.get('sqlalchemy')
+        replica = replica_router.pick(extension.engines, g.get('user_id')) if extension else None
+        if replica is None:
+            return f(*args, **kwargs)
+        g.db_replica = replica
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.pop('db_replica', None)
+    return wrapped
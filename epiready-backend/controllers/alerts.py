@@ -5,12 +5,18 @@ from flask import request, jsonify
 from models.shipment import Shipment
 from models.user import User
 from models.alert import Alert, ActionLog
-from config.database import db
+from models.organization_summary import record_latest_readings
+from config.database import db, wait_for_pool
+from config.replicas import read_only
 from auth.auth import token_required
+from utils.serialization import project
+from utils.http_cache import conditional
+from utils.presence import presence
+from utils.fanout import fanout
+from utils.replay import replay_buffer
+from sqlalchemy import func
 from flask_mail import Message, Mail
-import eventlet
-
-eventlet.monkey_patch()
+import os
 
 def parse_temp_range(temp_range):
     """Parses a string like '2 to 8' into (2.0, 8.0)."""
@@ -28,29 +34,30 @@ def humidity_threshold(level):
         'high': 40
     }.get(level.lower(), 100) 
 
-def create_weather_data(user_id, shipment_id, location, internal_temp, external_temp, humidity, aqi=None, timestamp=None):
-    """Create and save a WeatherData record to the database."""
+def create_weather_data(user_id, shipment_id, location, internal_temp, external_temp, humidity, aqi=None, timestamp=None, latitude=None, longitude=None):
+    """Add a WeatherData record in a savepoint; the caller commits."""
     try:
         weather = WeatherData(
             user_id=user_id,
             shipment_id=shipment_id,
             location=location,
+            latitude=latitude,
+            longitude=longitude,
             internal_temp=internal_temp,
             external_temp=external_temp,
             humidity=humidity,
             aqi=aqi,
             timestamp=timestamp or datetime.now(timezone.utc)
         )
-        db.session.add(weather)
-        db.session.commit()
+        with db.session.begin_nested():
+            db.session.add(weather)
         return weather.to_dict()
     except Exception as e:
-        db.session.rollback()
         print(f"Error creating weather data: {e}")
         return None
 
 def create_alert(shipment_id, alert_type, severity, message):
-    """Create and save an alert to the database"""
+    """Add an alert in a savepoint; the caller commits"""
     try:
         alert = Alert(
             shipment_id=shipment_id,
@@ -60,11 +67,10 @@ def create_alert(shipment_id, alert_type, severity, message):
             status='active',
             active=True
         )
-        db.session.add(alert)
-        db.session.commit()
+        with db.session.begin_nested():
+            db.session.add(alert)
         return alert
     except Exception as e:
-        db.session.rollback()
         print(f"Error creating alert: {e}")
         return None
 
@@ -75,160 +81,293 @@ def severity_rank(severity):
 
 previous_alerts = {}
 
-def start_temperature_monitor(socketio, app, mail):
-    with app.app_context():
-        emails_sent = 0
-        max_emails = 2
+REPLAY_DB_LIMIT = 100
 
-        while True:
-            internal_temp = round(random.uniform(2, 10), 2)
-            external_temp = round(random.uniform(0, 35), 2)
-            humidity = round(random.uniform(10, 85), 2)
-            timestamp = datetime.now(timezone.utc).isoformat()
+def breach_payload(alert_id, message, severity, shipment_id, shipment_name, created_at):
+    """The breach_alert socket payload, live or replayed."""
+    return {
+        'message': message,
+        'severity': severity,
+        'shipment_id': shipment_id,
+        'shipment_name': shipment_name,
+        'id': alert_id,
+        'timestamp': (created_at or datetime.now(timezone.utc)).isoformat()
+    }
+
+def missed_breach_alerts(user_id, since=None, limit=REPLAY_DB_LIMIT):
+    """
+    Breach alert payloads for the user's shipments created after *since*
+    (oldest first), for replays the in-memory buffer can no longer serve.
+    Without *since*, the most recent *limit* alerts.
+    """
+    query = db.session.query(
+        Alert.id, Alert.message, Alert.severity, Alert.shipment_id, Shipment.name, Alert.created_at
+    ).join(Shipment, Shipment.id == Alert.shipment_id).filter(Shipment.user_id == user_id)
+    if since is not None:
+        rows = query.filter(Alert.created_at > since).order_by(Alert.created_at, Alert.id).limit(limit).all()
+    else:
+        rows = list(reversed(query.order_by(Alert.created_at.desc(), Alert.id.desc()).limit(limit).all()))
+    return [breach_payload(*row) for row in rows]
+
+# What to do with breach emails for users who are connected right now:
+# 'send' anyway, 'skip' them, or 'defer' until the user goes offline
+ONLINE_EMAIL_POLICY = os.getenv('ALERT_EMAIL_ONLINE_POLICY', 'defer')
+
+# shipment id -> (user id, shipment name, breach type), latest breach only
+deferred_emails = {}
+
+def send_breach_email(app, mail, user_id, shipment_name, breach_type, emails_sent):
+    user = db.session.get(User, user_id)
+    user_email = user.email
+    
+    subject = f"Breach Alert: Shipment '{shipment_name}'"
+    body = f"A {breach_type} breach has occurred in your shipment."
+    
+    message = Message(
+        subject=subject,
+        sender=app.config['MAIL_USERNAME'],
+        recipients=[user_email],
+        body=body
+    )
+    
+    print("sending message ", shipment_name, " with email ", user_email, "total sent", emails_sent)
+    try:
+        mail.send(message)
+    except Exception as e:
+        print(f"Invalid email to {user_email} error: {str(e)}")
+
+def due_deferred_emails():
+    """
+    Deferred breach emails whose user has gone offline; removes them from the
+    queue. Breaches that were handled in the meantime (every alert resolved
+    or deactivated, or the shipment no longer active) are dropped unsent;
+    that's checked here rather than in the handlers because they may run in
+    another worker.
+    """
+    if not deferred_emails:
+        return []
+    online = presence.online({user_id for user_id, _, _ in deferred_emails.values()})
+    due = [(shipment_id, pending) for shipment_id, pending in deferred_emails.items() if pending[0] not in online]
+    if not due:
+        return []
+    for shipment_id, _ in due:
+        del deferred_emails[shipment_id]
+    still_open = {shipment_id for (shipment_id,) in db.session.query(Alert.shipment_id).join(
+        Shipment, Shipment.id == Alert.shipment_id
+    ).filter(
+        Alert.shipment_id.in_([shipment_id for shipment_id, _ in due]),
+        Alert.active.is_(True), Alert.status != 'resolved', Shipment.status == 'active'
+    ).distinct()}
+    return [pending for shipment_id, pending in due if shipment_id in still_open]
+
+# Seconds between monitor passes
+MONITOR_INTERVAL = float(os.getenv('MONITOR_INTERVAL', '200'))
+MAX_BREACH_EMAILS = 2
+
+def monitor_tick(app, mail, state, shipments=None):
+    """
+    One pass of the temperature monitor: a simulated reading per active
+    shipment, breach alerts and emails, and the live telemetry emit. Shared by
+    the eventlet loop below and the asyncio task in asgi.py, which loads
+    *shipments* itself. *state* carries the email count between passes.
+    Needs an app context.
+
+    The whole pass is one transaction on one pooled connection, committed
+    before anything is emitted or mailed, and it waits for pool headroom first so the
+    monitor never takes the connections requests are queuing for. A pass
+    whose commit fails is dropped whole: nothing is emitted, mailed or
+    remembered, and the next pass starts from the last committed state.
+    """
+    if not wait_for_pool():
+        print("[monitor] connection pool exhausted, skipping this pass")
+        return
+
+    internal_temp = round(random.uniform(2, 10), 2)
+    external_temp = round(random.uniform(0, 35), 2)
+    humidity = round(random.uniform(10, 85), 2)
+    # The row keeps the datetime; payloads and the summary's JSON get the ISO string
+    read_at = datetime.now(timezone.utc)
+    timestamp = read_at.isoformat()
+
+    # Emails, emits and the in-memory breach state only change after the
+    # commit, so SMTP never holds a connection and a rolled-back pass leaves
+    # no trace; (event, data, kwargs, replay user) per emit
+    emails = []
+    outbox = []
+    readings = {}
+    previous = {}
+    deferred = {}
+    emails_sent_before = state['emails_sent']
+
+    if shipments is None:
+        shipments = Shipment.query.filter_by(status='active').all()
+    
+    for shipment in shipments:
+        lat, lon = shipment.latitude, shipment.longitude
+
+        low_temp = shipment.min_temp
+        high_temp = shipment.max_temp
+        humidity_limit = humidity_threshold(shipment.humidity_sensitivity)
 
-            shipments = Shipment.query.filter_by(status='active').all()
+        breach = False
+        breach_type = ""
+        alert_messages = []
+        
+        if low_temp is not None and high_temp is not None:
+            if not (low_temp <= internal_temp <= high_temp):
+                breach = True
+                breach_type = "Temp"
+                alert_messages.append(f"Temperature breach: {internal_temp}°C (required: {low_temp}°C - {high_temp}°C)")
+
+        if humidity > humidity_limit:
+            breach = True
+            humidity_msg = f"Humidity breach: {humidity}% (limit: {humidity_limit}%)"
+            alert_messages.append(humidity_msg)
             
-            for shipment in shipments:
-                lat, lon = (None, None)
-                if shipment.current_location:
-                    try:
-                        lat, lon = map(str.strip, shipment.current_location.split(','))
-                    except:
-                        pass
-
-                low_temp = shipment.min_temp
-                high_temp = shipment.max_temp
-                humidity_limit = humidity_threshold(shipment.humidity_sensitivity)
-
-                breach = False
-                breach_type = ""
-                alert_messages = []
-                
-                if low_temp is not None and high_temp is not None:
-                    if not (low_temp <= internal_temp <= high_temp):
-                        breach = True
-                        breach_type = "Temp"
-                        alert_messages.append(f"Temperature breach: {internal_temp}°C (required: {low_temp}°C - {high_temp}°C)")
-
-                if humidity > humidity_limit:
-                    breach = True
-                    humidity_msg = f"Humidity breach: {humidity}% (limit: {humidity_limit}%)"
-                    alert_messages.append(humidity_msg)
-                    
-                    if breach_type:
-                        breach_type = "Temp+Humidity"
-                    else:
-                        breach_type = "Humidity"
-                
-                severity = "low"
-
-                # Create alert in database if there's a breach and send email
-                if breach:                      
-                    
-                    temp_deviation = 0
-                    if "Temp" in breach_type:
-                        temp_deviation = max(
-                            abs(internal_temp - low_temp) if internal_temp < low_temp else 0,
-                            abs(internal_temp - high_temp) if internal_temp > high_temp else 0
-                        )
-                    
-                    humidity_excess = 0
-                    if "Humidity" in breach_type:
-                        humidity_excess = humidity - humidity_limit
-                    
-                    if "Temp" in breach_type:
-                        if temp_deviation > 4:
-                            severity = "very high"
-                        elif temp_deviation > 2:
-                            severity = "high"
-                        elif temp_deviation > 0.5:
-                            severity = "medium"
-                    if "Humidity" in breach_type:
-                        if humidity_excess > 25:
-                            severity = "very high"
-                        elif humidity_excess > 15 and severity != "very high":
-                                severity = "high"
-                        elif humidity_excess > 5 and severity != "very high" and severity != "high":
-                            severity = "medium"
-                    
-                    alert_message = " | ".join(alert_messages)
-                    prev = previous_alerts.get(shipment.id)
-                    should_emit = False
-                    if prev:
-                        # Only emit if message is different and severity is worse
-                        if (prev['breach'] == False or (alert_message != prev['message'] and severity_rank(severity) > severity_rank(prev['severity']))):
-                            should_emit = True
-                    else:
-                        # No previous alert, always emit
-                        should_emit = True
-
-                    if should_emit:
-
-                        if emails_sent < max_emails:
-                            emails_sent += 1
-                            
-                            user = User.query.get(shipment.user_id)
-                            user_email = user.email
-                            
-                            subject = f"Breach Alert: Shipment '{shipment.name}'"
-                            body = f"A {breach_type} breach has occurred in your shipment."
-                            
-                            message = Message(
-                                subject=subject,
-                                sender=app.config['MAIL_USERNAME'],
-                                recipients=[user_email],
-                                body=body
-                            )
-                            
-                            print("sending message ", shipment.name, " with email ", user_email, "total sent", emails_sent)
-                            try:
-                                mail.send(message)
-                            except Exception as e:
-                                print(f"Invalid email to {user_email} error: {str(e)}")    
-                        else:
-                            print("skipping breach email", emails_sent)
-
-
-                        alert_obj = create_alert(shipment.id, breach_type.lower().replace("+", "_and_"), severity, alert_message)
-                        print(f"Creating alert for shipment {shipment.id}: {alert_message} (severity: {severity}), previous: {prev} ")
-                        socketio.emit(
-                            'breach_alert',
-                            {
-                                'message': alert_message,
-                                'severity': severity,
-                                'shipment_id': shipment.id,
-                                'shipment_name': getattr(shipment, 'name', None),
-                                'id': getattr(alert_obj, 'id', None),
-                                'timestamp': getattr(alert_obj, 'created_at', datetime.now(timezone.utc)).isoformat() if alert_obj else datetime.now(timezone.utc).isoformat()
-                            },
-                            room=str(shipment.user_id)
-                        )
-                    
-                    previous_alerts[shipment.id] = {'message': alert_message, 'severity': severity, 'breach': True}
-                
+            if breach_type:
+                breach_type = "Temp+Humidity"
+            else:
+                breach_type = "Humidity"
+        
+        severity = "low"
+
+        # Create alert in database if there's a breach and send email
+        if breach:                      
+            
+            temp_deviation = 0
+            if "Temp" in breach_type:
+                temp_deviation = max(
+                    abs(internal_temp - low_temp) if internal_temp < low_temp else 0,
+                    abs(internal_temp - high_temp) if internal_temp > high_temp else 0
+                )
+            
+            humidity_excess = 0
+            if "Humidity" in breach_type:
+                humidity_excess = humidity - humidity_limit
+            
+            if "Temp" in breach_type:
+                if temp_deviation > 4:
+                    severity = "very high"
+                elif temp_deviation > 2:
+                    severity = "high"
+                elif temp_deviation > 0.5:
+                    severity = "medium"
+            if "Humidity" in breach_type:
+                if humidity_excess > 25:
+                    severity = "very high"
+                elif humidity_excess > 15 and severity != "very high":
+                        severity = "high"
+                elif humidity_excess > 5 and severity != "very high" and severity != "high":
+                    severity = "medium"
+            
+            alert_message = " | ".join(alert_messages)
+            prev = previous_alerts.get(shipment.id)
+            should_emit = False
+            if prev:
+                # Only emit if message is different and severity is worse
+                if (prev['breach'] == False or (alert_message != prev['message'] and severity_rank(severity) > severity_rank(prev['severity']))):
+                    should_emit = True
+            else:
+                # No previous alert, always emit
+                should_emit = True
+
+            if should_emit:
+
+                if ONLINE_EMAIL_POLICY != 'send' and presence.is_online(shipment.user_id):
+                    # They'll see the socket alert; mail only if they leave before it's handled
+                    if ONLINE_EMAIL_POLICY == 'defer':
+                        deferred[shipment.id] = (shipment.user_id, shipment.name, breach_type)
+                    print("user online, not emailing breach for", shipment.name, "policy", ONLINE_EMAIL_POLICY)
+                elif state['emails_sent'] < MAX_BREACH_EMAILS:
+                    state['emails_sent'] += 1
+                    emails.append((shipment.user_id, shipment.name, breach_type, state['emails_sent']))
                 else:
-                    previous_alerts[shipment.id] = {'breach': False}
-
-                data = {
-                    'timestamp': timestamp,
-                    'latitude': lat,
-                    'longitude': lon,
-                    'internal_temperature': internal_temp,
-                    'external_temperature': external_temp,
-                    'humidity': humidity,
-                    'shipment_id': shipment.id,
-                    'breach': breach,
-                    'breach_type': breach_type,
-                    'severity': severity,
-                }
-                create_weather_data(shipment.user_id, shipment.id, str(lat) + " " + str(lon), internal_temp, external_temp, humidity, severity_rank(severity), timestamp)
-                socketio.emit('temperature_alert', data, room=str(shipment.user_id))
-                
-                # print(f"Event data sent to User with ID {shipment.user_id}: ", data)
-
-            eventlet.sleep(200)
+                    print("skipping breach email", state['emails_sent'])
+
+
+                alert_obj = create_alert(shipment.id, breach_type.lower().replace("+", "_and_"), severity, alert_message)
+                print(f"Creating alert for shipment {shipment.id}: {alert_message} (severity: {severity}), previous: {prev} ")
+                payload = breach_payload(
+                    getattr(alert_obj, 'id', None), alert_message, severity, shipment.id,
+                    getattr(shipment, 'name', None), getattr(alert_obj, 'created_at', None)
+                )
+                outbox.append(('breach_alert', payload, {'room': str(shipment.user_id), 'priority': True}, shipment.user_id))
+            
+            previous[shipment.id] = {'message': alert_message, 'severity': severity, 'breach': True}
+        
+        else:
+            previous[shipment.id] = {'breach': False}
+
+        data = {
+            'timestamp': timestamp,
+            'latitude': lat,
+            'longitude': lon,
+            'internal_temperature': internal_temp,
+            'external_temperature': external_temp,
+            'humidity': humidity,
+            'shipment_id': shipment.id,
+            'breach': breach,
+            'breach_type': breach_type,
+            'severity': severity,
+        }
+        create_weather_data(shipment.user_id, shipment.id, f"{lat} {lon}" if lat is not None else None, internal_temp, external_temp, humidity, severity_rank(severity), read_at, latitude=lat, longitude=lon)
+        readings.setdefault(shipment.organization_id, {})[shipment.id] = {
+            key: data[key] for key in ('timestamp', 'internal_temperature', 'external_temperature', 'humidity', 'breach', 'severity')
+        }
+        # Telemetry: slow clients get the latest reading per shipment, not a backlog
+        outbox.append(('temperature_alert', data, {'room': str(shipment.user_id), 'key': shipment.id}, None))
+        
+        # print(f"Event data sent to User with ID {shipment.user_id}: ", data)
+
+    try:
+        # One write per organization summary per pass
+        record_latest_readings(readings)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"[monitor] commit failed, discarding this pass: {e}")
+        state['emails_sent'] = emails_sent_before
+        return
+    finally:
+        # Hand the connection back before emitting and sleeping
+        db.session.close()
+
+    previous_alerts.update(previous)
+    deferred_emails.update(deferred)
+    for event, data, kwargs, replay_user in outbox:
+        if replay_user is not None:
+            # Stamped with a replay seq so a client that was disconnected can catch up
+            data = replay_buffer.record(replay_user, event, data)
+        fanout.emit(event, data, **kwargs)
+    for user_id, shipment_name, breach_type in due_deferred_emails():
+        if state['emails_sent'] < MAX_BREACH_EMAILS:
+            state['emails_sent'] += 1
+            emails.append((user_id, shipment_name, breach_type, state['emails_sent']))
+    for user_id, shipment_name, breach_type, emails_sent in emails:
+        send_breach_email(app, mail, user_id, shipment_name, breach_type, emails_sent)
+    db.session.close()
+
+
+def start_temperature_monitor(socketio, app, mail):
+    with app.app_context():
+        state = {'emails_sent': 0}
+
+        while True:
+            monitor_tick(app, mail, state)
+            socketio.sleep(MONITOR_INTERVAL)
+
+def alerts_version(user_id):
+    """ETag marker for get_alerts_for_user: count, newest id and last update of the user's alerts."""
+    return tuple(
+        db.session.query(func.count(Alert.id), func.max(Alert.id), func.max(Alert.updated_at))
+        .join(Shipment, Shipment.id == Alert.shipment_id)
+        .filter(Shipment.user_id == user_id)
+        .one()
+    )
 
 @token_required
+@read_only
+@conditional(alerts_version)
 def get_alerts_for_user(user_id):
     """
     GET /api/alerts
@@ -272,15 +411,12 @@ def get_alerts_for_user(user_id):
         # Get total count before pagination
         total_count = base_query.count()
 
-        alerts = base_query.order_by(Alert.id.desc()).limit(25).offset((page - 1) * 25).all()
+        alert_dicts = project(base_query.order_by(Alert.id.desc()).limit(25).offset((page - 1) * 25), Alert)
 
         # Add shipment name to each alert dict
         shipment_id_to_name = {s.id: s.name for s in user_shipments}
-        alert_dicts = []
-        for alert in alerts:
-            alert_data = alert.to_dict()
-            alert_data['shipment_name'] = shipment_id_to_name.get(alert.shipment_id, None)
-            alert_dicts.append(alert_data)
+        for alert_data in alert_dicts:
+            alert_data['shipment_name'] = shipment_id_to_name.get(alert_data['shipment_id'], None)
 
         # Apply status filter if provided
         if status_filter:
@@ -479,8 +615,7 @@ def get_shipment_alerts(user_id, shipment_id):
         if not shipment:
             return jsonify({'error': 'Shipment not found or access denied'}), 404
         
-        alerts = Alert.query.filter_by(shipment_id=shipment_id).order_by(Alert.created_at.desc()).all()
-        alert_dicts = [alert.to_dict() for alert in alerts]
+        alert_dicts = project(Alert.query.filter_by(shipment_id=shipment_id).order_by(Alert.created_at.desc()), Alert)
         
         if status_filter:
             alert_dicts = [alert for alert in alert_dicts if alert['status'] == status_filter]
@@ -1,15 +1,18 @@
 from flask import request, jsonify, current_app
 import jwt
 from models.user import create_user, verify_user, User
+from models.refresh_token import RefreshToken, issue_refresh_token, rotate_refresh_token, revoke_refresh_tokens, hash_refresh_token
 from datetime import datetime, timedelta, timezone
 from auth.auth import token_required
 from config.database import db
-import bcrypt
+from utils.passwords import hash_password, check_password
+
+ACCESS_TOKEN_SECONDS = 3600
 
 def generate_token(user_id: int) -> str:
     payload = {
         "user_id": user_id,
-        "exp": datetime.now(timezone.utc) + timedelta(hours=1), 
+        "exp": datetime.now(timezone.utc) + timedelta(seconds=ACCESS_TOKEN_SECONDS), 
         "iat": datetime.now(timezone.utc)
     }
     token = jwt.encode(payload, current_app.secret_key, algorithm="HS256")
@@ -53,6 +56,9 @@ def login():
 
     Authenticates a user and returns a token.
 
+    The response also carries a refresh_token; exchange it at /auth/refresh
+    for a new access token instead of logging in again when it expires.
+
     Possible Error Responses:
     - 400 Bad Request: "Email and password required"
     - 401 Unauthorized: "Wrong username/password"
@@ -69,10 +75,84 @@ def login():
     
     if user:
         token = generate_token(user.id)
-        return jsonify({"message": "Login successful!", "token": token, "user_id": user.id}), 200
+        refresh_token = issue_refresh_token(user.id)
+        db.session.commit()
+        return jsonify({
+            "message": "Login successful!",
+            "token": token,
+            "refresh_token": refresh_token,
+            "expires_in": ACCESS_TOKEN_SECONDS,
+            "user_id": user.id
+        }), 200
     
     return jsonify({"error": "Wrong username/password"}), 401
 
+def refresh():
+    """
+    POST /auth/refresh
+
+    Exchanges a refresh token for a new access token and a new refresh token.
+    The presented refresh token stops working; presenting it again revokes
+    every token issued from the same login.
+
+    Request Body:
+    {
+        "refresh_token": "..."
+    }
+
+    Possible Error Responses:
+    - 400 Bad Request: "refresh_token is required"
+    - 401 Unauthorized: "Invalid or expired refresh token"
+    - 500 Internal Server Error: Database error
+    """
+    data = request.get_json(silent=True) or {}
+    raw_token = data.get("refresh_token")
+
+    if not raw_token:
+        return jsonify({"error": "refresh_token is required"}), 400
+
+    try:
+        user_id, refresh_token = rotate_refresh_token(raw_token)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+    if not user_id:
+        return jsonify({"error": "Invalid or expired refresh token"}), 401
+
+    return jsonify({
+        "token": generate_token(user_id),
+        "refresh_token": refresh_token,
+        "expires_in": ACCESS_TOKEN_SECONDS,
+        "user_id": user_id
+    }), 200
+
+def logout():
+    """
+    POST /auth/logout
+
+    Revokes the given refresh token and every token rotated from the same login.
+
+    Request Body:
+    {
+        "refresh_token": "..."
+    }
+
+    Possible Error Responses:
+    - 400 Bad Request: "refresh_token is required"
+    """
+    data = request.get_json(silent=True) or {}
+    raw_token = data.get("refresh_token")
+
+    if not raw_token:
+        return jsonify({"error": "refresh_token is required"}), 400
+
+    token = RefreshToken.query.filter_by(token_hash=hash_refresh_token(raw_token)).first()
+    if token:
+        revoke_refresh_tokens(RefreshToken.family_id == token.family_id)
+        db.session.commit()
+    return jsonify({"message": "Logged out"}), 200
+
 @token_required
 def change_password(user_id):
     """
@@ -104,9 +184,11 @@ def change_password(user_id):
     if not user:
         return jsonify({"error": "User not found."}), 404
 
-    if not bcrypt.checkpw(old_password.encode(), user.password_hash.encode()):
+    if not check_password(old_password, user.password_hash):
         return jsonify({"error": "Old password is incorrect."}), 401
 
-    user.password_hash = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+    user.password_hash = hash_password(new_password)
+    # Sessions started with the old password must log in again
+    revoke_refresh_tokens(RefreshToken.user_id == user_id)
     db.session.commit()
     return jsonify({"message": "Password changed successfully!"}), 200
\ No newline at end of file
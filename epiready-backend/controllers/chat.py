@@ -1,12 +1,34 @@
 from flask import jsonify, request
-from models.chat import ChatRoom, ChatMessage
+from models.chat import ChatRoom, ChatMessage, ChatRoomSummary, ChatRoomMember, participant_clause, is_room_member, mark_room_read
 from models.user import User
 from models.organization import Organization
 from auth.auth import token_required
 from config.database import db
+from config.replicas import read_only
 from datetime import datetime, timezone
+from utils.serialization import project, columns, rows_to_dicts, parse_timestamp
+from utils.http_cache import conditional
+from utils.read_receipts import read_receipts
+from utils.user_directory import get_users, remember_user, sender_emails
+from sqlalchemy import func, select, and_, or_
+
+def chat_rooms_version(user_id):
+    """ETag marker for get_user_chat_rooms: the caller's memberships and newest summary change across their rooms."""
+    user = db.session.get(User, user_id)
+    if not user or not user.organization_id:
+        return None
+    return tuple(db.session.query(
+        func.count(ChatRoomMember.room_id), func.max(ChatRoomMember.room_id),
+        func.max(ChatRoomMember.joined_at), func.max(ChatRoomSummary.updated_at)
+    ).join(ChatRoom, ChatRoom.id == ChatRoomMember.room_id).outerjoin(
+        ChatRoomSummary, ChatRoomSummary.chat_room_id == ChatRoomMember.room_id
+    ).filter(
+        ChatRoomMember.user_id == user_id,
+        ChatRoom.organization_id == user.organization_id
+    ).one())
 
 @token_required
+@conditional(chat_rooms_version)
 def get_user_chat_rooms(user_id):
     """
     GET /chat/rooms
@@ -23,18 +45,11 @@ def get_user_chat_rooms(user_id):
         if not user or not user.organization_id:
             return jsonify({"error": "User not found or not in organization"}), 404
         
-        # Get all chat rooms in the user's organization
-        chat_rooms = ChatRoom.query.filter_by(organization_id=user.organization_id).all()
-        
-        # Filter rooms where user is a participant
-        user_rooms = []
-        for room in chat_rooms:
-            if room.room_type == 'direct':
-                if room.participant1_id == user_id or room.participant2_id == user_id:
-                    user_rooms.append(room)
-            elif room.room_type == 'group':
-                if room.participants and user_id in room.participants:
-                    user_rooms.append(room)
+        # Participant filtering happens in SQL; summaries come in with the same query
+        user_rooms = ChatRoom.query.filter(
+            ChatRoom.organization_id == user.organization_id,
+            participant_clause(user_id)
+        ).all()
         
         return jsonify([room.to_dict() for room in user_rooms]), 200
     except Exception as e:
@@ -156,7 +171,324 @@ def create_group_chat(user_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def _load_group_room(user_id, room_id):
+    """Returns (room, None) when *user_id* is a member of group room *room_id*, else (None, error response)."""
+    current_user = db.session.get(User, user_id)
+    chat_room = db.session.get(ChatRoom, room_id)
+
+    if not chat_room or not current_user or chat_room.organization_id != current_user.organization_id:
+        return None, (jsonify({"error": "Chat room not found or access denied"}), 404)
+    if not is_room_member(user_id, chat_room.id):
+        return None, (jsonify({"error": "Access denied to this chat room"}), 403)
+    if chat_room.room_type != 'group':
+        return None, (jsonify({"error": "Members can only be changed in group chats"}), 400)
+    return chat_room, None
+
 @token_required
+def get_room_members(user_id, room_id):
+    """
+    GET /chat/rooms/<room_id>/members
+    
+    List the members of a chat room the current user belongs to.
+    
+    Authentication: Bearer token in Authorization header
+    """
+    try:
+        current_user = db.session.get(User, user_id)
+        chat_room = db.session.get(ChatRoom, room_id)
+        if not chat_room or not current_user or chat_room.organization_id != current_user.organization_id:
+            return jsonify({"error": "Chat room not found or access denied"}), 404
+        if not is_room_member(user_id, chat_room.id):
+            return jsonify({"error": "Access denied to this chat room"}), 403
+
+        members = db.session.query(ChatRoomMember.user_id, ChatRoomMember.joined_at, User.email).join(
+            User, User.id == ChatRoomMember.user_id
+        ).filter(ChatRoomMember.room_id == chat_room.id).order_by(ChatRoomMember.joined_at, ChatRoomMember.user_id).all()
+        return jsonify(rows_to_dicts(members)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@token_required
+def add_room_members(user_id, room_id):
+    """
+    POST /chat/rooms/<room_id>/members
+    
+    Add users from the same organization to a group chat. Users who are
+    already members are ignored.
+    
+    Request Body:
+    {
+        "user_ids": [123, 456]
+    }
+    
+    Authentication: Bearer token in Authorization header
+    
+    Possible Error Responses:
+    - 400 Bad Request: "user_ids is required" / "Some users are not in the same organization"
+    - 403 Forbidden: "Access denied to this chat room"
+    - 404 Not Found: "Chat room not found or access denied"
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        user_ids = data.get('user_ids')
+        if not isinstance(user_ids, list) or not user_ids:
+            return jsonify({"error": "user_ids is required"}), 400
+
+        chat_room, error = _load_group_room(user_id, room_id)
+        if error:
+            return error
+
+        user_ids = list(dict.fromkeys(user_ids))
+        found = db.session.query(func.count(User.id)).filter(
+            User.id.in_(user_ids),
+            User.organization_id == chat_room.organization_id
+        ).scalar()
+        if found != len(user_ids):
+            return jsonify({"error": "Some users are not in the same organization"}), 400
+
+        existing = set(db.session.execute(
+            select(ChatRoomMember.user_id).where(ChatRoomMember.room_id == chat_room.id, ChatRoomMember.user_id.in_(user_ids))
+        ).scalars())
+        added = [uid for uid in user_ids if uid not in existing]
+        db.session.add_all([ChatRoomMember(room_id=chat_room.id, user_id=uid) for uid in added])
+        # Reassign rather than mutate so the JSON column is flagged dirty
+        chat_room.participants = list(chat_room.participants or []) + [uid for uid in added if uid not in (chat_room.participants or [])]
+        db.session.commit()
+
+        return jsonify({"added": added, "room": chat_room.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@token_required
+def remove_room_member(user_id, room_id, member_id):
+    """
+    DELETE /chat/rooms/<room_id>/members/<member_id>
+    
+    Remove a member from a group chat. Members can remove themselves (leave);
+    only the room's creator can remove other people.
+    
+    Authentication: Bearer token in Authorization header
+    
+    Possible Error Responses:
+    - 403 Forbidden: "Only the room creator can remove other members"
+    - 404 Not Found: "Member not found"
+    """
+    try:
+        chat_room, error = _load_group_room(user_id, room_id)
+        if error:
+            return error
+
+        if member_id != user_id and chat_room.created_by != user_id:
+            return jsonify({"error": "Only the room creator can remove other members"}), 403
+
+        member = db.session.get(ChatRoomMember, (chat_room.id, member_id))
+        if not member:
+            return jsonify({"error": "Member not found"}), 404
+
+        db.session.delete(member)
+        chat_room.participants = [uid for uid in (chat_room.participants or []) if uid != member_id]
+        db.session.commit()
+
+        return jsonify({"message": "Member removed successfully"}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@token_required
+def get_unread_counts(user_id):
+    """
+    GET /chat/unread
+    
+    Unread message counts for every room the current user belongs to, in a
+    single grouped query. Messages the user sent and deleted messages are not
+    counted.
+    
+    Authentication: Bearer token in Authorization header
+    
+    Returns:
+    - rooms: list of {room_id, last_read_message_id, unread_count}
+    - total: sum of unread_count
+    """
+    try:
+        unread = and_(
+            ChatMessage.chat_room_id == ChatRoomMember.room_id,
+            ChatMessage.id > func.coalesce(ChatRoomMember.last_read_message_id, 0),
+            ChatMessage.sender_id != user_id,
+            ChatMessage.is_deleted.is_not(True)
+        )
+        rows = db.session.query(
+            ChatRoomMember.room_id,
+            ChatRoomMember.last_read_message_id,
+            func.count(ChatMessage.id).label('unread_count')
+        ).outerjoin(ChatMessage, unread).filter(
+            ChatRoomMember.user_id == user_id
+        ).group_by(ChatRoomMember.room_id, ChatRoomMember.last_read_message_id).all()
+
+        rooms = rows_to_dicts(rows)
+        return jsonify({"rooms": rooms, "total": sum(room['unread_count'] for room in rooms)}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@token_required
+def mark_read(user_id, room_id):
+    """
+    POST /chat/rooms/<room_id>/read
+    
+    Mark messages in a room as read up to message_id (defaults to the room's
+    latest message). The cursor only ever moves forward. Other members get a
+    coalesced 'read_receipts' Socket.IO event.
+    
+    Request Body (optional):
+    {
+        "message_id": 456
+    }
+    
+    Authentication: Bearer token in Authorization header
+    
+    Possible Error Responses:
+    - 400 Bad Request: "message_id must be an integer"
+    - 403 Forbidden: "Access denied to this chat room"
+    """
+    try:
+        if not is_room_member(user_id, room_id):
+            return jsonify({"error": "Access denied to this chat room"}), 403
+
+        data = request.get_json(silent=True) or {}
+        message_id = data.get('message_id')
+        if message_id is None:
+            message_id = db.session.query(ChatRoomSummary.last_message_id).filter(
+                ChatRoomSummary.chat_room_id == room_id
+            ).scalar()
+            if message_id is None:
+                return jsonify({"room_id": room_id, "last_read_message_id": None}), 200
+        elif not isinstance(message_id, int) or isinstance(message_id, bool):
+            return jsonify({"error": "message_id must be an integer"}), 400
+
+        cursor = mark_room_read(user_id, room_id, message_id)
+        if cursor is not None:
+            db.session.commit()
+            read_receipts.add(room_id, user_id, cursor)
+
+        cursor = db.session.query(ChatRoomMember.last_read_message_id).filter_by(room_id=room_id, user_id=user_id).scalar()
+        return jsonify({"room_id": room_id, "last_read_message_id": cursor}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+SYNC_MAX_ROOMS = 100
+SYNC_DEFAULT_LIMIT = 200
+SYNC_MAX_LIMIT = 1000
+
+def _sync_room(room_id, after_id, since, limit):
+    """
+    New/edited messages and tombstones for one room past the watermark, a
+    keyset position (since, after_id) in (updated_at, id) order. Rows come
+    back in that order and the watermark is the last row's position, so a
+    page cut by *limit* resumes exactly where it stopped.
+    """
+    if since is None:
+        changed = ChatMessage.id > after_id
+    else:
+        # (updated_at, id) > (since, after_id): a range scan on (chat_room_id, updated_at)
+        changed = or_(
+            ChatMessage.updated_at > since,
+            and_(ChatMessage.updated_at == since, ChatMessage.id > after_id)
+        )
+    rows = db.session.query(*columns(ChatMessage), User.email.label('sender_email')).outerjoin(
+        User, User.id == ChatMessage.sender_id
+    ).filter(
+        ChatMessage.chat_room_id == room_id, changed
+    ).order_by(ChatMessage.updated_at, ChatMessage.id).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        after_id, since = rows[-1].id, rows[-1].updated_at
+    rows = rows_to_dicts(rows)
+    messages, tombstones = [], []
+    for row in rows:
+        if row['is_deleted']:
+            tombstones.append({'id': row['id'], 'updated_at': row['updated_at']})
+        else:
+            messages.append(row)
+
+    return {
+        'room_id': room_id,
+        'messages': messages,
+        'tombstones': tombstones,
+        'has_more': has_more,
+        'watermark': {
+            'after_id': after_id,
+            'since': since
+        }
+    }
+
+@token_required
+def sync_messages(user_id):
+    """
+    POST /chat/sync
+    
+    Delta sync for reconnecting clients. For each room, returns only the
+    messages created, edited or deleted past the client's watermark, instead
+    of refetching pages of /chat/messages.
+    
+    Request Body:
+    {
+        "rooms": [
+            {"room_id": 1, "after_id": 120, "since": "2025-07-01T12:00:00"},
+            {"room_id": 2}
+        ],
+        "limit": 200
+    }
+    - since, after_id: the watermark from the previous sync, i.e. the
+      updated_at and id of the last change the client has. A client that
+      has never synced may send only after_id, its highest message id
+      (default 0).
+    
+    Returns per room: messages (new or edited), tombstones ({id, updated_at}
+    of deleted messages), has_more, and the watermark to send next time.
+    Rooms the user can't access are returned in "denied".
+    
+    Authentication: Bearer token in Authorization header
+    
+    Possible Error Responses:
+    - 400 Bad Request: "rooms must be a list of at most 100 watermarks"
+    - 400 Bad Request: "after_id must be an integer and since an ISO 8601 timestamp"
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        rooms = data.get('rooms')
+        if not isinstance(rooms, list) or len(rooms) > SYNC_MAX_ROOMS:
+            return jsonify({"error": f"rooms must be a list of at most {SYNC_MAX_ROOMS} watermarks"}), 400
+        try:
+            limit = min(max(int(data.get('limit', SYNC_DEFAULT_LIMIT)), 1), SYNC_MAX_LIMIT)
+        except (TypeError, ValueError):
+            return jsonify({"error": "limit must be an integer"}), 400
+
+        results, denied = [], []
+        for watermark in rooms:
+            if not isinstance(watermark, dict):
+                return jsonify({"error": "Each watermark must be an object"}), 400
+            room_id = watermark.get('room_id')
+            try:
+                since = parse_timestamp(watermark['since']) if watermark.get('since') else None
+                after_id = int(watermark.get('after_id') or 0)
+            except (TypeError, ValueError, AttributeError):
+                return jsonify({"error": "after_id must be an integer and since an ISO 8601 timestamp"}), 400
+
+            # Membership comes from the per-user cache, so this costs no query
+            if not is_room_member(user_id, room_id):
+                denied.append(room_id)
+                continue
+            results.append(_sync_room(int(room_id), after_id, since, limit))
+
+        return jsonify({"rooms": results, "denied": denied}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@token_required
+@read_only
 def get_chat_messages(user_id):
     """
     GET /chat/messages?room_id=123
@@ -167,6 +499,8 @@ def get_chat_messages(user_id):
     - room_id: ID of the chat room
     - limit: Number of messages to return (default: 50)
     - offset: Number of messages to skip (default: 0)
+    - senders (optional): 'table' to return {"messages": [...], "senders": {id: {...}}}
+      where messages carry only sender_id, instead of repeating sender_email per message
     
     Authentication: Bearer token in Authorization header
     """
@@ -185,26 +519,30 @@ def get_chat_messages(user_id):
         if not chat_room or chat_room.organization_id != current_user.organization_id:
             return jsonify({"error": "Chat room not found or access denied"}), 404
         
-        # Check if user is participant
-        is_participant = False
-        if chat_room.room_type == 'direct':
-            is_participant = (chat_room.participant1_id == user_id or chat_room.participant2_id == user_id)
-        elif chat_room.room_type == 'group':
-            is_participant = chat_room.participants and user_id in chat_room.participants
-        
-        if not is_participant:
+        if not is_room_member(user_id, chat_room.id):
             return jsonify({"error": "Access denied to this chat room"}), 403
         
-        # Get messages
-        messages = ChatMessage.query.filter_by(
+        query = ChatMessage.query.filter_by(
             chat_room_id=room_id,
             is_deleted=False
-        ).order_by(ChatMessage.created_at.desc()).limit(limit).offset(offset).all()
+        )
+
+        if request.args.get('senders') == 'table':
+            # Each sender once, from the request's user directory
+            messages = project(query.order_by(ChatMessage.created_at.desc()).limit(limit).offset(offset), ChatMessage)
+            messages.reverse()
+            remember_user(current_user)
+            senders = get_users({message['sender_id'] for message in messages})
+            return jsonify({"messages": messages, "senders": senders}), 200
+
+        # Get messages, with the sender email joined in rather than lazy-loaded per row
+        query = query.outerjoin(User, User.id == ChatMessage.sender_id).order_by(ChatMessage.created_at.desc()).limit(limit).offset(offset)
+        messages = project(query, ChatMessage, User.email.label('sender_email'))
         
         # Reverse to get chronological order
         messages.reverse()
         
-        return jsonify([message.to_dict() for message in messages]), 200
+        return jsonify(messages), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -240,14 +578,7 @@ def send_message(user_id):
         if not chat_room or chat_room.organization_id != current_user.organization_id:
             return jsonify({"error": "Chat room not found or access denied"}), 404
         
-        # Check if user is participant
-        is_participant = False
-        if chat_room.room_type == 'direct':
-            is_participant = (chat_room.participant1_id == user_id or chat_room.participant2_id == user_id)
-        elif chat_room.room_type == 'group':
-            is_participant = chat_room.participants and user_id in chat_room.participants
-        
-        if not is_participant:
+        if not is_room_member(user_id, chat_room.id):
             return jsonify({"error": "Access denied to this chat room"}), 403
         
         # Create message
@@ -261,7 +592,7 @@ def send_message(user_id):
         db.session.add(message)
         db.session.commit()
         
-        return jsonify(message.to_dict()), 201
+        return jsonify(message.to_dict(senders={user_id: current_user.email})), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -300,7 +631,7 @@ def edit_message(user_id):
         
         db.session.commit()
         
-        return jsonify(message.to_dict()), 200
+        return jsonify(message.to_dict(senders=sender_emails([message.sender_id]))), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -0,0 +1,179 @@
+from flask import request, jsonify, Response, stream_with_context
+from models.shipment import Shipment
+from models.user import User
+from models.weather import WeatherData
+from models.temperature import TemperatureData
+from models.alert import Alert
+from models.shipment_action import ShipmentAction
+from config.database import db
+from auth.auth import token_required
+from sqlalchemy import select
+from datetime import datetime
+import csv
+import io
+import json
+import zlib
+
+EXPORT_BATCH_SIZE = 1000
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_DATASETS = {
+    'weather': WeatherData,
+    'temperature': TemperatureData,
+    'alerts': Alert,
+    'actions': ShipmentAction,
+}
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+@token_required
+def export_shipment_data(user_id, shipment_id, dataset):
+    """
+    GET /export/shipments/<shipment_id>/<dataset>
+
+    Stream every row of a dataset (weather, temperature, alerts, actions) for one shipment.
+    - Regular users: Can only export their own shipments
+    - Transporter managers: Can export any shipment in the organization
+
+    Query Parameters:
+    - format (optional): ndjson or csv (default: ndjson)
+    - gzip (optional): true to gzip the stream
+
+    Possible Error Responses:
+    - 400 Bad Request: "Unknown dataset" / "Unknown format"
+    - 404 Not Found: "Shipment not found"
+    - 403 Forbidden: "Access denied. You can only export your own shipments."
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    model = EXPORT_DATASETS.get(dataset)
+    if not model:
+        return jsonify({'error': f'Unknown dataset. Must be one of: {", ".join(EXPORT_DATASETS)}'}), 400
+
+    shipment = db.session.get(Shipment, shipment_id)
+    if not shipment:
+        return jsonify({'error': 'Shipment not found'}), 404
+
+    user = db.session.get(User, user_id)
+    if user.role != 'transporter_manager' and shipment.user_id != user_id:
+        return jsonify({'error': 'Access denied. You can only export your own shipments.'}), 403
+    elif shipment.organization_id != user.organization_id:
+        return jsonify({'error': 'Access denied. You can only export shipments in your own organization.'}), 403
+
+    statement = select(*model.__table__.columns).where(model.shipment_id == shipment_id)
+    return stream_export(statement.order_by(model.id), f"{dataset}-{shipment_id}")
+
+
+@token_required
+def export_organization_data(user_id, dataset):
+    """
+    GET /export/organization/<dataset>
+
+    Stream every row of a dataset (weather, temperature, alerts, actions) across all
+    shipments in the organization. Only accessible by transporter managers.
+
+    Query Parameters:
+    - format (optional): ndjson or csv (default: ndjson)
+    - gzip (optional): true to gzip the stream
+
+    Possible Error Responses:
+    - 400 Bad Request: "Unknown dataset" / "Unknown format"
+    - 403 Forbidden: "Access denied. Only transporter managers can export organization data."
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    model = EXPORT_DATASETS.get(dataset)
+    if not model:
+        return jsonify({'error': f'Unknown dataset. Must be one of: {", ".join(EXPORT_DATASETS)}'}), 400
+
+    user = db.session.get(User, user_id)
+    if user.role != 'transporter_manager' or not user.organization_id:
+        return jsonify({'error': 'Access denied. Only transporter managers can export organization data.'}), 403
+
+    organization_shipments = select(Shipment.id).where(Shipment.organization_id == user.organization_id)
+    statement = select(*model.__table__.columns).where(model.shipment_id.in_(organization_shipments))
+    return stream_export(statement.order_by(model.id), f"{dataset}-organization-{user.organization_id}")
+
+
+def stream_export(statement, filename):
+    """
+    Builds a streaming response for *statement*. Rows are pulled from a server-side
+    cursor in batches of EXPORT_BATCH_SIZE and encoded one at a time, so memory use
+    does not grow with the size of the export.
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown format. Must be one of: {", ".join(EXPORT_FORMATS)}'}), 400
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+
+    encode = encode_ndjson if export_format == 'ndjson' else encode_csv
+    body = generate_chunks(encode(statement))
+    if compress:
+        body = gzip_chunks(body)
+
+    filename = f"{filename}.{export_format}" + ('.gz' if compress else '')
+    return Response(
+        stream_with_context(body),
+        mimetype='application/gzip' if compress else EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+
+def _rows(statement):
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    try:
+        for row in result:
+            yield row._mapping
+    finally:
+        result.close()
+
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(statement):
+    for row in _rows(statement):
+        yield json.dumps({key: _json_value(value) for key, value in row.items()}) + '\n'
+
+
+def encode_csv(statement):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column.name for column in statement.selected_columns)
+    for row in _rows(statement):
+        writer.writerow(
+            json.dumps(value) if isinstance(value, (dict, list)) else _json_value(value)
+            for value in row.values()
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def generate_chunks(lines):
+    """Groups encoded lines into CHUNK_SIZE byte chunks to keep write calls few."""
+    chunk, size = [], 0
+    for line in lines:
+        data = line.encode()
+        chunk.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b''.join(chunk)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,98 @@
+from flask import jsonify, request
+from models.chat import ChatRoom, ChatMessage, ChatRoomMember, message_search_document
+from models.shipment_action import ShipmentAction, action_search_document
+from models.shipment import Shipment
+from models.user import User
+from auth.auth import token_required
+from config.database import db
+from utils.search import match_subquery, has_search_terms
+from utils.serialization import columns, rows_to_dicts
+
+SEARCH_TYPES = ['messages', 'actions']
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+@token_required
+def search(user_id):
+    """
+    GET /search?q=<text>&type=messages|actions
+
+    Ranked full-text search, scoped to the caller's organization.
+    - messages: chat messages in rooms the caller is a member of
+    - actions: shipment action descriptions and metadata; regular users only
+      see actions on their own shipments, transporter managers see all of
+      the organization's
+
+    Query Parameters:
+    - q: Search text (required). Words are matched by stem, all must appear.
+    - type (optional): 'messages' (default) or 'actions'
+    - room_id (optional, messages): Restrict to one chat room
+    - shipment_id (optional, actions): Restrict to one shipment
+    - limit (optional): Number of results (default: 20, max: 100)
+    - offset (optional): Offset for pagination (default: 0)
+
+    Possible Error Responses:
+    - 400 Bad Request: "q is required" / "type must be one of messages, actions"
+    - 400 Bad Request: "q must contain at least one word"
+    - 404 Not Found: "User not found or not in organization"
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    q = (request.args.get('q') or '').strip()
+    search_type = request.args.get('type', 'messages')
+    if not q:
+        return jsonify({'error': 'q is required'}), 400
+    if not has_search_terms(q):
+        return jsonify({'error': 'q must contain at least one word'}), 400
+    if search_type not in SEARCH_TYPES:
+        return jsonify({'error': f'type must be one of {", ".join(SEARCH_TYPES)}'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_SEARCH_LIMIT)), 1), MAX_SEARCH_LIMIT)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+
+    user = db.session.get(User, user_id)
+    if not user or not user.organization_id:
+        return jsonify({'error': 'User not found or not in organization'}), 404
+
+    try:
+        dialect = db.engine.dialect.name
+        if search_type == 'messages':
+            matches = match_subquery(dialect, ChatMessage, message_search_document, q)
+            query = db.session.query(*columns(ChatMessage), matches.c.rank).join(
+                matches, matches.c.id == ChatMessage.id
+            ).join(
+                ChatRoomMember, (ChatRoomMember.room_id == ChatMessage.chat_room_id) & (ChatRoomMember.user_id == user_id)
+            ).join(ChatRoom, ChatRoom.id == ChatMessage.chat_room_id).filter(
+                ChatRoom.organization_id == user.organization_id,
+                ChatMessage.is_deleted.is_not(True)
+            )
+            if request.args.get('room_id'):
+                query = query.filter(ChatMessage.chat_room_id == request.args.get('room_id', type=int))
+            order = (matches.c.rank.desc(), ChatMessage.id.desc())
+        else:
+            matches = match_subquery(dialect, ShipmentAction, action_search_document, q)
+            query = db.session.query(*columns(ShipmentAction), matches.c.rank).join(
+                matches, matches.c.id == ShipmentAction.id
+            ).join(Shipment, Shipment.id == ShipmentAction.shipment_id).filter(
+                Shipment.organization_id == user.organization_id
+            )
+            if user.role != 'transporter_manager':
+                query = query.filter(Shipment.user_id == user_id)
+            if request.args.get('shipment_id'):
+                query = query.filter(ShipmentAction.shipment_id == request.args.get('shipment_id'))
+            order = (matches.c.rank.desc(), ShipmentAction.id.desc())
+
+        total_count = query.order_by(None).count()
+        results = rows_to_dicts(query.order_by(*order).offset(offset).limit(limit).all())
+
+        return jsonify({
+            'results': results,
+            'type': search_type,
+            'total_count': total_count,
+            'has_more': (offset + limit) < total_count,
+            'limit': limit,
+            'offset': offset
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
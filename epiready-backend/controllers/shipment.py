@@ -1,13 +1,106 @@
 from flask import request, jsonify, current_app
-from models.shipment import Shipment  # Assuming your model is in models/shipment.py
+from models.shipment import Shipment, coordinate_values  # Assuming your model is in models/shipment.py
 from models.user import User
+from models.organization_summary import OrganizationSummary, count_new_shipments, rebuild_organization_summary
 from config.database import db
+from config.replicas import read_only
 from datetime import datetime, timezone
-from models.weather import WeatherData
+from models.weather import WeatherData, ShipmentLatestReading
+from sqlalchemy import func, select, insert, or_
+from utils.downsample import LTTBDownsampler, to_epoch_seconds
+from utils.serialization import project, columns, parse_timestamp
+from utils.http_cache import conditional
+from utils.geo import valid_coordinates, bounding_box, cover, distance_km
 import uuid
+import json
 from auth.auth import token_required
 import jwt
 
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5000
+
+SHIPMENT_REQUIRED_FIELDS = [
+    'name', 'product_type', 'origin', 'destination',
+    'min_temp', 'max_temp', 'humidity_sensitivity', 'aqi_sensitivity',
+    'transit_time_hrs', 'risk_factor', 'mode_of_transport', 'status'
+]
+SHIPMENT_STRING_FIELDS = [
+    'name', 'product_type', 'origin', 'destination', 'humidity_sensitivity',
+    'aqi_sensitivity', 'mode_of_transport', 'status'
+]
+SHIPMENT_STATUSES = ['active', 'completed', 'cancelled']
+MAX_BULK_SHIPMENTS = 1000
+MAX_BATCH_LATEST = 500
+DEFAULT_SPATIAL_LIMIT = 100
+MAX_SPATIAL_LIMIT = 500
+MAX_RADIUS_KM = 2000
+
+def validate_shipment_data(data):
+    """
+    Validates a shipment payload.
+
+    Returns (error, values): error is a message for a 400 response, otherwise
+    values holds the column values for a new Shipment (without id/user/org).
+    """
+    if not isinstance(data, dict):
+        return 'Shipment must be a JSON object', None
+
+    missing = [field for field in SHIPMENT_REQUIRED_FIELDS if field not in data]
+    if missing:
+        return f'Missing fields: {", ".join(missing)}', None
+
+    invalid = [field for field in SHIPMENT_STRING_FIELDS if not isinstance(data[field], str) or not data[field].strip()]
+    if invalid:
+        return f'Fields must be non-empty strings: {", ".join(invalid)}', None
+    if data.get('current_location') is not None and not isinstance(data['current_location'], str):
+        return 'current_location must be a string', None
+    # A label ("high") or a score; either is stored as text
+    risk_factor = data['risk_factor']
+    if isinstance(risk_factor, bool) or not isinstance(risk_factor, (str, int, float)) or not str(risk_factor).strip():
+        return 'risk_factor must be a non-empty string or a number', None
+
+    # Validate temperature range
+    try:
+        min_temp = float(data['min_temp'])
+        max_temp = float(data['max_temp'])
+    except (ValueError, TypeError):
+        return 'min_temp and max_temp must be valid numbers', None
+    if min_temp >= max_temp:
+        return 'min_temp must be less than max_temp', None
+
+    try:
+        expected_arrival = datetime.fromisoformat(data['expected_arrival']) if data.get('expected_arrival') else None
+    except (ValueError, TypeError):
+        return 'expected_arrival must be an ISO 8601 timestamp', None
+
+    latitude, longitude = data.get('latitude'), data.get('longitude')
+    if latitude is not None or longitude is not None:
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+        except (ValueError, TypeError):
+            return 'latitude and longitude must be valid numbers', None
+        if not valid_coordinates(latitude, longitude):
+            return 'latitude must be within [-90, 90] and longitude within [-180, 180]', None
+
+    return None, {
+        'name': data['name'],
+        'product_type': data['product_type'],
+        'origin': data['origin'],
+        'destination': data['destination'],
+        'min_temp': min_temp,
+        'max_temp': max_temp,
+        'humidity_sensitivity': data['humidity_sensitivity'],
+        'aqi_sensitivity': data['aqi_sensitivity'],
+        'transit_time_hrs': data['transit_time_hrs'],
+        'risk_factor': str(risk_factor),
+        'mode_of_transport': data['mode_of_transport'],
+        'status': data['status'],
+        'expected_arrival': expected_arrival,
+        'current_location': data.get('current_location', None),
+        # Set explicitly because bulk inserts skip the model's listeners
+        **coordinate_values(latitude, longitude, data.get('current_location'))
+    }
+
 @token_required
 def create_shipment(user_id):
     
@@ -18,6 +111,7 @@ def create_shipment(user_id):
 
     Possible Error Responses:
     - 400 Bad Request: "Missing fields {field names}"
+    - 400 Bad Request: "Fields must be non-empty strings: {field names}"
     - 400 Bad Request: "Shipment name already exists"
     - 403 Forbidden: "Only manufacturers can create shipments"
     - 401 Unauthorized: "Session token was invalid."
@@ -28,24 +122,9 @@ def create_shipment(user_id):
         return jsonify({'error': 'Only manufacturers can create shipments'}), 403
     
     data = request.get_json()
-    required_fields = [
-        'name', 'product_type', 'origin', 'destination',
-        'min_temp', 'max_temp', 'humidity_sensitivity', 'aqi_sensitivity',
-        'transit_time_hrs', 'risk_factor', 'mode_of_transport', 'status'
-    ]
-    
-    missing = [field for field in required_fields if field not in data]
-    if missing:
-        return jsonify({'error': f'Missing fields: {", ".join(missing)}'}), 400
-
-    # Validate temperature range
-    try:
-        min_temp = float(data['min_temp'])
-        max_temp = float(data['max_temp'])
-        if min_temp >= max_temp:
-            return jsonify({'error': 'min_temp must be less than max_temp'}), 400
-    except (ValueError, TypeError):
-        return jsonify({'error': 'min_temp and max_temp must be valid numbers'}), 400
+    error, values = validate_shipment_data(data)
+    if error:
+        return jsonify({'error': error}), 400
 
     existing_shipment = Shipment.query.filter_by(name=data['name']).first()
     if existing_shipment:
@@ -54,22 +133,9 @@ def create_shipment(user_id):
     try:
         shipment = Shipment(
             id=str(uuid.uuid4()),
-            name=data['name'],
             user_id=user_id,
-            product_type=data['product_type'],
-            origin=data['origin'],
-            destination=data['destination'],
-            min_temp=min_temp,
-            max_temp=max_temp,
-            humidity_sensitivity=data['humidity_sensitivity'],
-            aqi_sensitivity=data['aqi_sensitivity'],
-            transit_time_hrs=data['transit_time_hrs'],
-            risk_factor=data['risk_factor'],
-            mode_of_transport=data['mode_of_transport'],
             organization_id=user.organization_id,
-            status=data['status'],
-            expected_arrival=datetime.fromisoformat(data['expected_arrival']) if data.get('expected_arrival') else None,
-            current_location=data.get('current_location', None)
+            **values
         )
 
         db.session.add(shipment)
@@ -80,7 +146,114 @@ def create_shipment(user_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _read_bulk_items():
+    """
+    Reads a bulk payload: a JSON array, {"shipments": [...]}, or NDJSON
+    (one object per line). Lines that fail to parse become None so they can
+    be reported per item.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)
+        return items
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('shipments')
+    return data if isinstance(data, list) else None
+
+@token_required
+def create_shipments_bulk(user_id):
+    """
+    POST /shipments/bulk
+
+    Creates many shipments in one request. Only manufacturers can create shipments.
+    Accepts a JSON array, {"shipments": [...]}, or an NDJSON body
+    (Content-Type: application/x-ndjson). Every item is validated, names are
+    checked for uniqueness with a single query, and the valid items are written
+    with one bulk insert. Invalid items do not block the rest of the batch.
+
+    Response: {"created": n, "failed": n, "results": [{"index", "status", "shipment" | "error"}]}
+    with 201 when every item was created, 207 when some failed and 400 when none were.
+
+    Possible Error Responses:
+    - 400 Bad Request: "Expected a list of shipments"
+    - 400 Bad Request: "At most 1000 shipments per request"
+    - 403 Forbidden: "Only manufacturers can create shipments"
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    user = db.session.get(User, user_id)
+    if user.role != 'manufacturer':
+        return jsonify({'error': 'Only manufacturers can create shipments'}), 403
+
+    items = _read_bulk_items()
+    if items is None:
+        return jsonify({'error': 'Expected a list of shipments'}), 400
+    if len(items) > MAX_BULK_SHIPMENTS:
+        return jsonify({'error': f'At most {MAX_BULK_SHIPMENTS} shipments per request'}), 400
+
+    results = [None] * len(items)
+    candidates = []
+    for index, item in enumerate(items):
+        error, values = validate_shipment_data(item) if item is not None else ('Invalid JSON', None)
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+        else:
+            candidates.append((index, values))
+
+    names = {values['name'] for _, values in candidates}
+    existing = {
+        name for (name,) in db.session.execute(select(Shipment.name).where(Shipment.name.in_(names)))
+    } if names else set()
+
+    now = datetime.now(timezone.utc)
+    rows, seen = [], set()
+    for index, values in candidates:
+        if values['name'] in existing or values['name'] in seen:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Shipment name already exists'}
+            continue
+        seen.add(values['name'])
+        row = dict(values, id=str(uuid.uuid4()), user_id=user_id, organization_id=user.organization_id,
+                   created_at=now, updated_at=now, actual_arrival=None)
+        rows.append(row)
+        results[index] = {'index': index, 'status': 'created', 'shipment': row}
+
+    if rows:
+        try:
+            db.session.execute(insert(Shipment), rows)
+            # Bulk inserts skip the summary listeners
+            count_new_shipments(db.session.connection(), user.organization_id, [row['status'] for row in rows])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    for result in results:
+        if result['status'] == 'created':
+            result['shipment'] = Shipment(**result['shipment']).to_dict()
+
+    created = len(rows)
+    failed = len(items) - created
+    status_code = 201 if not failed else (207 if created else 400)
+    return jsonify({'created': created, 'failed': failed, 'results': results}), status_code
+
+def shipments_version(user_id):
+    """ETag marker for get_shipments_by_user: row count and last update in the caller's scope."""
+    user = db.session.get(User, user_id)
+    if user.role == 'transporter_manager':
+        query = Shipment.query.filter_by(organization_id=user.organization_id)
+    else:
+        query = Shipment.query.filter_by(user_id=user_id)
+    return tuple(query.with_entities(func.count(Shipment.id), func.max(Shipment.updated_at)).one())
+
 @token_required
+@conditional(shipments_version)
 def get_shipments_by_user(user_id):
     
     """
@@ -121,7 +294,20 @@ def set_transit_status(user_id, shipment_id):
     POST /shipments/<shipment_id>/transit_status
     Set the transit status of a shipment. Only transporter managers can set transit status.
 
+    Request Body:
+    {
+        "status": "...",
+        "latitude": 43.65,     (optional, with longitude)
+        "longitude": -79.38
+    }
+
+    The status text is stored as current_location. The shipment's position
+    comes from latitude/longitude, or from a status of the form "lat, lon";
+    any other status text leaves the last known position as it is.
+
     Possible Error Responses:
+    - 400 Bad Request: "Status is required"
+    - 400 Bad Request: "latitude and longitude must be valid coordinates"
     - 403 Forbidden: "Access denied. Only transporter managers can set transit status."
     - 404 Not Found: "Shipment not found"
     - 401 Unauthorized: "Session token was invalid."
@@ -138,6 +324,15 @@ def set_transit_status(user_id, shipment_id):
     if not new_status:
         return jsonify({'error': 'Status is required'}), 400
 
+    if data.get('latitude') is not None or data.get('longitude') is not None:
+        try:
+            latitude, longitude = float(data.get('latitude')), float(data.get('longitude'))
+        except (ValueError, TypeError):
+            latitude = longitude = None
+        if not valid_coordinates(latitude, longitude):
+            return jsonify({'error': 'latitude and longitude must be valid coordinates'}), 400
+        shipment.latitude, shipment.longitude = latitude, longitude
+
     print("NESTTTTT: ", new_status)
     shipment.current_location = new_status
     db.session.commit()
@@ -166,6 +361,48 @@ def get_all_shipments(user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
+def organization_summary_version(user_id):
+    """ETag marker for get_organization_summary: the summary's last update."""
+    user = db.session.get(User, user_id)
+    if not user or user.role != 'transporter_manager' or user.organization_id is None:
+        return None
+    updated_at = db.session.query(OrganizationSummary.updated_at).filter_by(organization_id=user.organization_id).scalar()
+    return ('summary', updated_at) if updated_at else None
+
+@token_required
+@conditional(organization_summary_version)
+def get_organization_summary(user_id):
+    """
+    GET /shipments/organization/summary
+
+    Overview of the caller's organization from one row: shipment counts by
+    status, open breach alerts by severity, the last alert time and the latest
+    reading of each active shipment. Kept up to date as shipments and alerts
+    change, so it replaces listing every shipment and its alerts.
+
+    Possible Error Responses:
+    - 403 Forbidden: "Access denied. Only transporter managers can view the organization summary."
+    - 404 Not Found: "You are not part of an organization"
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    user = db.session.get(User, user_id)
+    if user.role != 'transporter_manager':
+        return jsonify({'error': 'Access denied. Only transporter managers can view the organization summary.'}), 403
+    if user.organization_id is None:
+        return jsonify({'error': 'You are not part of an organization'}), 404
+
+    try:
+        summary = db.session.get(OrganizationSummary, user.organization_id)
+        if summary is None:
+            # Organizations that had no shipments or alerts since the table was added
+            rebuild_organization_summary(db.session.connection(), user.organization_id)
+            db.session.commit()
+            summary = db.session.get(OrganizationSummary, user.organization_id)
+        return jsonify(summary.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @token_required
 def get_shipment_by_name(user_id, name):
     """
@@ -196,6 +433,7 @@ def get_shipment_by_name(user_id, name):
 
 
 @token_required
+@read_only
 def get_weather_data(user_id, shipment_id):
     """
     GET /shipments/<shipment_id>/weather
@@ -204,6 +442,16 @@ def get_weather_data(user_id, shipment_id):
     - Returns 404 if shipment not found.
     - Returns 403 if user does not have access.
     - Returns all weather data under 'all', with temperature and humidity grouped as specified.
+
+    Query Parameters:
+    - from (optional): ISO 8601 start of the range
+    - to (optional): ISO 8601 end of the range (default: now)
+    - max_points (optional): Maximum points per series (default: 500, max: 5000)
+
+    Without any of the above only the latest 70 readings are returned. When any of
+    them is given, the temperature and humidity series for the whole range are
+    downsampled with Largest-Triangle-Three-Buckets so long histories stay cheap to
+    render.
     """
     # Validate shipment exists
     shipment = Shipment.query.get(shipment_id)
@@ -215,31 +463,108 @@ def get_weather_data(user_id, shipment_id):
         return jsonify({'error': 'Access denied. You can only view weather data for your own shipments.'}), 403
     elif shipment.organization_id != user.organization_id:
         return jsonify({'error': 'Access denied. You can only view weather data for shipments in your own organization.'}), 403
+    if any(request.args.get(arg) for arg in ('from', 'to', 'max_points')):
+        return get_downsampled_weather_data(shipment)
     try:
-        weather_data = WeatherData.query.filter_by(shipment_id=shipment_id, user_id=shipment.user_id).order_by(WeatherData.id.desc()).limit(70).all()
-        temp_data = []
-        humidity_data = []
-        for w in weather_data:
-            w_dict = w.to_dict() if hasattr(w, 'to_dict') else dict(w)
-            # Group temperature and humidity as requested
-            temp_entry = {
-                'internal': w_dict.get('internal_temp') if 'internal_temp' in w_dict else w_dict.get('temperature'),
-                'external': w_dict.get('external_temp'),
-                'timestamp': w_dict.get('timestamp')
-            }
-            temp_data.append(temp_entry)
-            humidity_entry = {
-                'humidity': w_dict.get('humidity'),
-                'timestamp': w_dict.get('timestamp')
-            }
-            humidity_data.append(humidity_entry)
-        return jsonify({'all': [w.to_dict() for w in weather_data], 'humidity': humidity_data, 'temperature': temp_data}), 200
+        weather_data = project(
+            WeatherData.query.filter_by(shipment_id=shipment_id, user_id=shipment.user_id).order_by(WeatherData.id.desc()).limit(70),
+            WeatherData
+        )
+        # Group temperature and humidity as requested
+        temp_data = [
+            {'internal': w['internal_temp'], 'external': w['external_temp'], 'timestamp': w['timestamp']}
+            for w in weather_data
+        ]
+        humidity_data = [{'humidity': w['humidity'], 'timestamp': w['timestamp']} for w in weather_data]
+        return jsonify({'all': weather_data, 'humidity': humidity_data, 'temperature': temp_data}), 200
     except Exception as e:
         import traceback
         print("[get_weather_data] Exception:", traceback.format_exc())
         return jsonify({'error': str(e)}), 500
     
+def get_downsampled_weather_data(shipment):
+    """
+    Streams the shipment's readings between `from` and `to` in timestamp order and
+    runs both series through an LTTB downsampler in the same pass, so memory is
+    bounded by the bucket size rather than the length of the history.
+    """
+    try:
+        start = parse_timestamp(request.args['from']) if request.args.get('from') else None
+        end = parse_timestamp(request.args['to']) if request.args.get('to') else datetime.now(timezone.utc).replace(tzinfo=None)
+    except ValueError:
+        return jsonify({'error': 'from and to must be ISO 8601 timestamps'}), 400
+    max_points = request.args.get('max_points', DEFAULT_MAX_POINTS, type=int)
+    max_points = max(3, min(max_points, MAX_POINTS_LIMIT))
+
+    try:
+        query = WeatherData.query.filter(
+            WeatherData.shipment_id == shipment.id,
+            WeatherData.user_id == shipment.user_id,
+            WeatherData.timestamp <= end
+        )
+        if start:
+            query = query.filter(WeatherData.timestamp >= start)
+
+        temp_total, humidity_total = query.with_entities(
+            func.count(WeatherData.internal_temp), func.count(WeatherData.humidity)
+        ).one()
+
+        rows = query.with_entities(*columns(WeatherData)).order_by(WeatherData.timestamp, WeatherData.id).yield_per(1000)
+
+        temp_sampler = LTTBDownsampler(temp_total, max_points)
+        humidity_sampler = LTTBDownsampler(humidity_total, max_points)
+        temp_data, humidity_data, selected = [], [], {}
+
+        for row in rows:
+            x = to_epoch_seconds(row.timestamp)
+            if row.internal_temp is not None:
+                temp_data.extend(temp_sampler.add(x, row.internal_temp, row))
+            if row.humidity is not None:
+                humidity_data.extend(humidity_sampler.add(x, row.humidity, row))
+        temp_data.extend(temp_sampler.finish())
+        humidity_data.extend(humidity_sampler.finish())
+
+        for row in temp_data + humidity_data:
+            selected[row.id] = row
+
+        # Newest first, matching the undownsampled response
+        return jsonify({
+            'all': [dict(selected[key]._mapping) for key in sorted(selected, reverse=True)],
+            'temperature': [
+                {'internal': row.internal_temp, 'external': row.external_temp, 'timestamp': row.timestamp}
+                for row in reversed(temp_data)
+            ],
+            'humidity': [
+                {'humidity': row.humidity, 'timestamp': row.timestamp}
+                for row in reversed(humidity_data)
+            ],
+            'downsampled': {
+                'from': start.isoformat() if start else None,
+                'to': end.isoformat(),
+                'max_points': max_points,
+                'source_points': max(temp_total, humidity_total)
+            }
+        }), 200
+    except Exception as e:
+        import traceback
+        print("[get_downsampled_weather_data] Exception:", traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+def latest_weather_version(user_id, shipment_id):
+    """ETag marker for get_latest_weather_data: the newest reading id, or None when access is denied."""
+    shipment = db.session.get(Shipment, shipment_id)
+    user = db.session.get(User, user_id)
+    if not shipment or not user:
+        return None
+    if user.role != 'transporter_manager' and shipment.user_id != user_id:
+        return None
+    if shipment.organization_id != user.organization_id:
+        return None
+    latest_id = db.session.query(ShipmentLatestReading.weather_data_id).filter_by(shipment_id=shipment_id).scalar()
+    return ('latest', latest_id)
+
 @token_required
+@conditional(latest_weather_version, cache_control='private, max-age=5')
 def get_latest_weather_data(user_id, shipment_id):
     """
     GET /shipments/<shipment_id>/weather/latest
@@ -259,13 +584,158 @@ def get_latest_weather_data(user_id, shipment_id):
     elif shipment.organization_id != user.organization_id:
         return jsonify({'error': 'Access denied. You can only view weather data for shipments in your own organization.'}), 403
     try:
-        weather_data = WeatherData.query.filter_by(shipment_id=shipment_id, user_id=shipment.user_id).order_by(WeatherData.id.desc()).first()
+        weather_data = db.session.get(ShipmentLatestReading, shipment_id)
         if not weather_data:
             return jsonify({'id': '-', 'temperature': '-', 'humidity': '-', 'timestamp': '-', 'location': '-', 'aqi': '-'}), 200
         return jsonify(weather_data.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@token_required
+@read_only
+def get_latest_weather_data_batch(user_id):
+    """
+    GET /shipments/weather/latest?ids=<id>,<id>,...
+
+    The latest reading of many shipments in one query, for dashboards that
+    show current telemetry for every visible shipment. Access rules match
+    GET /shipments/<shipment_id>/weather/latest; shipments that are unknown or
+    not accessible are omitted, and accessible shipments without readings map
+    to null.
+
+    Response: {"readings": {"<shipment_id>": {...} | null}}
+
+    Possible Error Responses:
+    - 400 Bad Request: "ids is required"
+    - 400 Bad Request: "At most 500 shipments per request"
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    ids = list(dict.fromkeys(i.strip() for i in request.args.get('ids', '').split(',') if i.strip()))
+    if not ids:
+        return jsonify({'error': 'ids is required'}), 400
+    if len(ids) > MAX_BATCH_LATEST:
+        return jsonify({'error': f'At most {MAX_BATCH_LATEST} shipments per request'}), 400
+
+    user = db.session.get(User, user_id)
+    try:
+        query = db.session.query(Shipment.id, ShipmentLatestReading).outerjoin(
+            ShipmentLatestReading, ShipmentLatestReading.shipment_id == Shipment.id
+        ).filter(Shipment.id.in_(ids), Shipment.organization_id == user.organization_id)
+        if user.role != 'transporter_manager':
+            query = query.filter(Shipment.user_id == user_id)
+        readings = {shipment_id: reading.to_dict() if reading else None for shipment_id, reading in query}
+        return jsonify({'readings': readings}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _float_args(*names):
+    """The named query parameters as floats, or None if any is missing or not a number."""
+    try:
+        return [float(request.args[name]) for name in names]
+    except (KeyError, ValueError):
+        return None
+
+def _spatial_query(user, min_lat, min_lon, max_lat, max_lon):
+    """
+    Shipments the user can see whose position is inside the box. The geohash
+    prefixes covering the box narrow the scan through ix_shipments_geohash;
+    the coordinate comparisons then trim the cells' overhang.
+    """
+    if user.role == 'transporter_manager':
+        query = Shipment.query.filter_by(organization_id=user.organization_id)
+    else:
+        query = Shipment.query.filter_by(user_id=user.id)
+    query = query.filter(
+        or_(*[Shipment.geohash.like(prefix + '%') for prefix in cover(min_lat, min_lon, max_lat, max_lon)]),
+        Shipment.latitude.between(min_lat, max_lat),
+        Shipment.longitude.between(min_lon, max_lon) if min_lon <= max_lon
+        else or_(Shipment.longitude >= min_lon, Shipment.longitude <= max_lon)
+    )
+    if request.args.get('status'):
+        query = query.filter(Shipment.status == request.args['status'].lower())
+    return query
+
+def _spatial_limit():
+    return min(max(request.args.get('limit', DEFAULT_SPATIAL_LIMIT, type=int), 1), MAX_SPATIAL_LIMIT)
+
+@token_required
+@read_only
+def get_shipments_nearby(user_id):
+    """
+    GET /shipments/geo/nearby?lat=<lat>&lon=<lon>&radius_km=<km>
+
+    Shipments within radius_km (at most 2000) of a point, nearest first, e.g.
+    every active shipment near a heat event. Scoped like GET /shipments:
+    the organization for transporter managers, own shipments otherwise.
+
+    Query Parameters:
+    - status: only shipments with this status (optional)
+    - limit: maximum number of shipments (optional, default 100, at most 500)
+
+    Response: {"shipments": [{...shipment, "distance_km"}]}
+
+    Possible Error Responses:
+    - 400 Bad Request: "lat, lon and radius_km must be numbers"
+    - 400 Bad Request: "Invalid coordinates or radius"
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    args = _float_args('lat', 'lon', 'radius_km')
+    if args is None:
+        return jsonify({'error': 'lat, lon and radius_km must be numbers'}), 400
+    lat, lon, radius_km = args
+    if not valid_coordinates(lat, lon) or not 0 < radius_km <= MAX_RADIUS_KM:
+        return jsonify({'error': 'Invalid coordinates or radius'}), 400
+
+    user = db.session.get(User, user_id)
+    try:
+        # The box contains the circle; the exact distance check runs on the typed columns
+        nearby = []
+        for shipment in _spatial_query(user, *bounding_box(lat, lon, radius_km)):
+            distance = distance_km(lat, lon, shipment.latitude, shipment.longitude)
+            if distance <= radius_km:
+                nearby.append((distance, shipment))
+        nearby = sorted(nearby, key=lambda item: item[0])[:_spatial_limit()]
+        return jsonify({'shipments': [
+            dict(shipment.to_dict(), distance_km=round(distance, 3)) for distance, shipment in nearby
+        ]}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@token_required
+@read_only
+def get_shipments_within(user_id):
+    """
+    GET /shipments/geo/within?min_lat=..&min_lon=..&max_lat=..&max_lon=..
+
+    Shipments whose position is inside a bounding box, e.g. the map viewport.
+    A box with min_lon greater than max_lon crosses the antimeridian. Scoped
+    like GET /shipments.
+
+    Query Parameters:
+    - status: only shipments with this status (optional)
+    - limit: maximum number of shipments (optional, default 100, at most 500)
+
+    Response: {"shipments": [...]}
+
+    Possible Error Responses:
+    - 400 Bad Request: "min_lat, min_lon, max_lat and max_lon must be numbers"
+    - 400 Bad Request: "Invalid bounding box"
+    - 401 Unauthorized: "Session token was invalid."
+    """
+    args = _float_args('min_lat', 'min_lon', 'max_lat', 'max_lon')
+    if args is None:
+        return jsonify({'error': 'min_lat, min_lon, max_lat and max_lon must be numbers'}), 400
+    min_lat, min_lon, max_lat, max_lon = args
+    if not (valid_coordinates(min_lat, min_lon) and valid_coordinates(max_lat, max_lon)) or min_lat > max_lat:
+        return jsonify({'error': 'Invalid bounding box'}), 400
+
+    user = db.session.get(User, user_id)
+    try:
+        shipments = _spatial_query(user, min_lat, min_lon, max_lat, max_lon).order_by(Shipment.id).limit(_spatial_limit()).all()
+        return jsonify({'shipments': [shipment.to_dict() for shipment in shipments]}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # def get_shipment_by_id(shipment_id):
 #     try:
 #         shipment = Shipment.query.get(shipment_id)
@@ -288,7 +758,7 @@ def update_shipment_status(user_id):
         return jsonify({'error': 'Missing required field: status'}), 400
 
     status = data['status'].lower()
-    if status not in ['active', 'completed', 'cancelled']:
+    if status not in SHIPMENT_STATUSES:
         return jsonify({'error': 'Invalid status'}), 400
     
     print(status, shipment_id)
@@ -306,4 +776,78 @@ def update_shipment_status(user_id):
 
     db.session.commit()
 
-    return jsonify(shipment.to_dict()), 200
\ No newline at end of file
+    return jsonify(shipment.to_dict()), 200
+
+@token_required
+def update_shipment_status_bulk(user_id):
+    """
+    PUT /shipments/bulk/status
+
+    Batch version of PUT /shipments/status. Accepts a JSON array or
+    {"updates": [...]} of {"shipment_id": ..., "status": ...} items. All target
+    shipments are loaded with one query (scoped like the single endpoint:
+    organization for transporter managers, own shipments otherwise) and saved
+    with one commit.
+
+    Response: {"updated": n, "failed": n, "results": [{"index", "status", "shipment" | "error"}]}
+
+    Possible Error Responses:
+    - 400 Bad Request: "Expected a list of status updates"
+    - 401 Unauthorized: "User not found"
+    """
+    user = db.session.get(User, user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 401
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('updates')
+    if not isinstance(data, list):
+        return jsonify({'error': 'Expected a list of status updates'}), 400
+    if len(data) > MAX_BULK_SHIPMENTS:
+        return jsonify({'error': f'At most {MAX_BULK_SHIPMENTS} updates per request'}), 400
+
+    def valid_id(item):
+        return isinstance(item, dict) and isinstance(item.get('shipment_id'), str) and item['shipment_id'].strip() != ''
+
+    ids = {item['shipment_id'] for item in data if valid_id(item)}
+    query = Shipment.query.filter(Shipment.id.in_(ids))
+    if user.role == 'transporter_manager':
+        query = query.filter(Shipment.organization_id == user.organization_id)
+    else:
+        query = query.filter(Shipment.user_id == user_id)
+    shipments = {shipment.id: shipment for shipment in query.all()} if ids else {}
+
+    now = datetime.now(timezone.utc)
+    results, touched = [], []
+    for index, item in enumerate(data):
+        if not isinstance(item, dict) or not item.get('status'):
+            results.append({'index': index, 'status': 'error', 'error': 'Missing required field: status'})
+            continue
+        if not valid_id(item):
+            results.append({'index': index, 'status': 'error', 'error': 'shipment_id must be a non-empty string'})
+            continue
+        status = str(item['status']).lower()
+        if status not in SHIPMENT_STATUSES:
+            results.append({'index': index, 'status': 'error', 'error': 'Invalid status'})
+            continue
+        shipment = shipments.get(item['shipment_id'])
+        if not shipment:
+            results.append({'index': index, 'status': 'error', 'error': 'Shipment not found'})
+            continue
+        shipment.status = status
+        shipment.updated_at = now
+        touched.append((index, shipment))
+        results.append(None)
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+    for index, shipment in touched:
+        results[index] = {'index': index, 'status': 'updated', 'shipment': shipment.to_dict()}
+
+    updated = len(touched)
+    return jsonify({'updated': updated, 'failed': len(data) - updated, 'results': results}), 200
@@ -3,8 +3,10 @@ from models.shipment_action import ShipmentAction
 from models.shipment import Shipment
 from models.user import User
 from config.database import db
+from config.replicas import read_only
 from auth.auth import token_required
 from datetime import datetime, timezone
+from utils.serialization import project
 
 @token_required
 def create_shipment_action(user_id):
@@ -72,6 +74,7 @@ def create_shipment_action(user_id):
         return jsonify({'error': str(e)}), 500
 
 @token_required
+@read_only
 def get_shipment_actions(user_id):
     """
     GET /actions?shipment_id=<shipment_id>
@@ -104,8 +107,8 @@ def get_shipment_actions(user_id):
         return jsonify({'error': 'Access denied. You can only access your own shipments.'}), 403
     
     try:
-        actions = ShipmentAction.query.filter_by(shipment_id=shipment_id).order_by(ShipmentAction.created_at.desc()).all()
-        return jsonify([action.to_dict() for action in actions]), 200
+        actions = project(ShipmentAction.query.filter_by(shipment_id=shipment_id).order_by(ShipmentAction.created_at.desc()), ShipmentAction)
+        return jsonify(actions), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -267,10 +270,10 @@ def get_user_action_history(auth_user_id, user_id):
         
         total_count = query.count()
         
-        actions = query.order_by(ShipmentAction.created_at.desc()).offset(offset).limit(limit).all()
+        actions = project(query.order_by(ShipmentAction.created_at.desc()).offset(offset).limit(limit), ShipmentAction)
         
         return jsonify({
-            'actions': [action.to_dict() for action in actions],
+            'actions': actions,
             'total_count': total_count,
             'has_more': (offset + limit) < total_count,
             'limit': limit,
@@ -329,6 +332,7 @@ def create_shipment_action_by_id(user_id, shipment_id):
         return jsonify({'error': str(e)}), 500
 
 @token_required
+@read_only
 def get_shipment_actions_by_id(user_id, shipment_id):
     """
     GET /<shipment_id>/actions
@@ -350,7 +354,7 @@ def get_shipment_actions_by_id(user_id, shipment_id):
         return jsonify({'error': 'Access denied. You can only access your own shipments.'}), 403
     
     try:
-        actions = ShipmentAction.query.filter_by(shipment_id=shipment_id).order_by(ShipmentAction.created_at.desc()).all()
-        return jsonify([action.to_dict() for action in actions]), 200
+        actions = project(ShipmentAction.query.filter_by(shipment_id=shipment_id).order_by(ShipmentAction.created_at.desc()), ShipmentAction)
+        return jsonify(actions), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -3,6 +3,7 @@ from models.user import User
 from auth.auth import token_required
 from config.database import db
 from models.organization import Organization
+from utils.presence import presence
 
 @token_required
 def get_user(user_id):
@@ -162,3 +163,30 @@ def get_organization_by_id(user_id):
     if not org:
         return jsonify({'error': 'Organization not found.'}), 404
     return jsonify(org.to_dict()), 200
+
+@token_required
+def get_presence(user_id):
+    """
+    GET /users/presence?ids=1,2,3
+    
+    Which users in the caller's organization are connected over Socket.IO.
+    Without ids, every online member of the organization is returned.
+    
+    Possible Error Responses:
+    - 400 Bad Request: "ids must be a comma-separated list of user ids."
+    - 404 Not Found: "User not found or not in organization."
+    """
+    user = db.session.get(User, user_id)
+    if not user or not user.organization_id:
+        return jsonify({'error': 'User not found or not in organization.'}), 404
+
+    query = db.session.query(User.id).filter(User.organization_id == user.organization_id)
+    if request.args.get('ids'):
+        try:
+            ids = [int(i) for i in request.args['ids'].split(',') if i.strip()]
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of user ids.'}), 400
+        query = query.filter(User.id.in_(ids))
+
+    member_ids = [uid for (uid,) in query.all()]
+    return jsonify({'online': sorted(presence.online(member_ids))}), 200
@@ -0,0 +1,26 @@
+"""Index weather_data on shipment_id, timestamp
+
+Revision ID: 3c1f7a9e2b10
+Revises: 81497a4ce377
+Create Date: 2026-10-19 09:12:41.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f7a9e2b10'
+down_revision = '81497a4ce377'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('weather_data', schema=None) as batch_op:
+        batch_op.create_index('ix_weather_data_shipment_id_timestamp', ['shipment_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('weather_data', schema=None) as batch_op:
+        batch_op.drop_index('ix_weather_data_shipment_id_timestamp')
@@ -0,0 +1,41 @@
+"""Add socket_sessions for shared presence
+
+Revision ID: 3e9a1d7b5c62
+Revises: f0b6d3c92a48
+Create Date: 2026-10-19 16:52:13.904551
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9a1d7b5c62'
+down_revision = 'f0b6d3c92a48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'socket_sessions' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('socket_sessions',
+        sa.Column('sid', sa.String(length=64), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('connected_at', sa.DateTime(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('sid')
+    )
+    with op.batch_alter_table('socket_sessions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_socket_sessions_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_socket_sessions_last_seen'), ['last_seen'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('socket_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_socket_sessions_last_seen'))
+        batch_op.drop_index(batch_op.f('ix_socket_sessions_user_id'))
+
+    op.drop_table('socket_sessions')
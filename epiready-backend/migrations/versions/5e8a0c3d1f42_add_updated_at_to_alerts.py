@@ -0,0 +1,28 @@
+"""Add updated_at to alerts
+
+Revision ID: 5e8a0c3d1f42
+Revises: 9d4b2e61c7a3
+Create Date: 2026-10-19 11:58:02.913448
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a0c3d1f42'
+down_revision = '9d4b2e61c7a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE alerts SET updated_at = COALESCE(resolved_at, created_at)")
+
+
+def downgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,37 @@
+"""Add read cursors to chat_room_members
+
+Revision ID: 7a3c5e0f2b91
+Revises: e41f6c8b9d27
+Create Date: 2026-10-19 14:47:55.120384
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3c5e0f2b91'
+down_revision = 'e41f6c8b9d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    # Skip what db.create_all() already created on a fresh database
+    if 'last_read_message_id' not in [c['name'] for c in inspector.get_columns('chat_room_members')]:
+        with op.batch_alter_table('chat_room_members', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('last_read_message_id', sa.Integer(), nullable=True))
+
+    if 'ix_chat_messages_chat_room_id_id' not in [i['name'] for i in inspector.get_indexes('chat_messages')]:
+        with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+            batch_op.create_index('ix_chat_messages_chat_room_id_id', ['chat_room_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_messages_chat_room_id_id')
+
+    with op.batch_alter_table('chat_room_members', schema=None) as batch_op:
+        batch_op.drop_column('last_read_message_id')
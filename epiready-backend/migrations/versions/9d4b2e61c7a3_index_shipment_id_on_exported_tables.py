@@ -0,0 +1,38 @@
+"""Index shipment_id on alerts, shipment_actions and temperature_data
+
+Revision ID: 9d4b2e61c7a3
+Revises: 3c1f7a9e2b10
+Create Date: 2026-10-19 10:03:17.584102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4b2e61c7a3'
+down_revision = '3c1f7a9e2b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_alerts_shipment_id'), ['shipment_id'], unique=False)
+
+    with op.batch_alter_table('shipment_actions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_shipment_actions_shipment_id'), ['shipment_id'], unique=False)
+
+    with op.batch_alter_table('temperature_data', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_temperature_data_shipment_id'), ['shipment_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('temperature_data', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_temperature_data_shipment_id'))
+
+    with op.batch_alter_table('shipment_actions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_shipment_actions_shipment_id'))
+
+    with op.batch_alter_table('alerts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_alerts_shipment_id'))
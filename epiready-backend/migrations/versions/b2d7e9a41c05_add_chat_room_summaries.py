@@ -0,0 +1,54 @@
+"""Add chat_room_summaries
+
+Revision ID: b2d7e9a41c05
+Revises: 5e8a0c3d1f42
+Create Date: 2026-10-19 13:20:41.507112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d7e9a41c05'
+down_revision = '5e8a0c3d1f42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The chat tables are created by db.create_all() at startup, so the summary
+    # table may already exist (empty) by the time this runs.
+    if 'chat_room_summaries' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('chat_room_summaries',
+            sa.Column('chat_room_id', sa.Integer(), nullable=False),
+            sa.Column('message_count', sa.Integer(), nullable=False),
+            sa.Column('last_message_id', sa.Integer(), nullable=True),
+            sa.Column('last_message_preview', sa.String(length=100), nullable=True),
+            sa.Column('last_message_sender_id', sa.Integer(), nullable=True),
+            sa.Column('last_message_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['chat_room_id'], ['chat_rooms.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('chat_room_id')
+        )
+
+    op.execute("DELETE FROM chat_room_summaries")
+    op.execute("""
+        INSERT INTO chat_room_summaries (
+            chat_room_id, message_count, last_message_id, last_message_preview,
+            last_message_sender_id, last_message_at, updated_at
+        )
+        SELECT r.id,
+               (SELECT COUNT(*) FROM chat_messages m
+                 WHERE m.chat_room_id = r.id AND m.is_deleted IS NOT TRUE),
+               last.id, SUBSTR(last.content, 1, 100), last.sender_id, last.created_at,
+               CURRENT_TIMESTAMP
+          FROM chat_rooms r
+          LEFT JOIN chat_messages last ON last.id = (
+                SELECT MAX(m.id) FROM chat_messages m
+                 WHERE m.chat_room_id = r.id AND m.is_deleted IS NOT TRUE)
+    """)
+
+
+def downgrade():
+    op.drop_table('chat_room_summaries')
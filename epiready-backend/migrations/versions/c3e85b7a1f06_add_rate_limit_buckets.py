@@ -0,0 +1,32 @@
+"""Add rate_limit_buckets for the shared rate limiter
+
+Revision ID: c3e85b7a1f06
+Revises: a6c4f1e8d203
+Create Date: 2026-10-19 19:12:08.553172
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e85b7a1f06'
+down_revision = 'a6c4f1e8d203'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'rate_limit_buckets' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('rate_limit_buckets',
+        sa.Column('key', sa.String(length=128), nullable=False),
+        sa.Column('tokens', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('rate_limit_buckets')
@@ -0,0 +1,39 @@
+"""Add full-text search indexes on chat messages and shipment actions
+
+Revision ID: c58d2a7e4f19
+Revises: 7a3c5e0f2b91
+Create Date: 2026-10-19 15:31:08.642771
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c58d2a7e4f19'
+down_revision = '7a3c5e0f2b91'
+branch_labels = None
+depends_on = None
+
+
+# Must match utils.search.search_document() exactly or the planner won't use them
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_chat_messages_content_fts ON chat_messages "
+        "USING gin (to_tsvector(CAST('english' AS REGCONFIG), coalesce(content, '')))"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_shipment_actions_fts ON shipment_actions "
+        "USING gin (to_tsvector(CAST('english' AS REGCONFIG), "
+        "(coalesce(description, '') || ' ') || coalesce(CAST(action_metadata AS TEXT), '')))"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_shipment_actions_fts")
+    op.execute("DROP INDEX IF EXISTS ix_chat_messages_content_fts")
@@ -0,0 +1,64 @@
+"""Add organization_summaries
+
+Revision ID: d82f4a6c9e17
+Revises: c3e85b7a1f06
+Create Date: 2026-10-19 20:31:55.804619
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd82f4a6c9e17'
+down_revision = 'c3e85b7a1f06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'organization_summaries' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('organization_summaries',
+            sa.Column('organization_id', sa.Integer(), nullable=False),
+            sa.Column('shipments_active', sa.Integer(), nullable=False),
+            sa.Column('shipments_completed', sa.Integer(), nullable=False),
+            sa.Column('shipments_cancelled', sa.Integer(), nullable=False),
+            sa.Column('breaches_low', sa.Integer(), nullable=False),
+            sa.Column('breaches_medium', sa.Integer(), nullable=False),
+            sa.Column('breaches_high', sa.Integer(), nullable=False),
+            sa.Column('breaches_very_high', sa.Integer(), nullable=False),
+            sa.Column('last_alert_at', sa.DateTime(), nullable=True),
+            sa.Column('latest_readings', sa.JSON(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('organization_id')
+        )
+
+    op.execute("DELETE FROM organization_summaries")
+    op.execute("""
+        INSERT INTO organization_summaries (
+            organization_id, shipments_active, shipments_completed, shipments_cancelled,
+            breaches_low, breaches_medium, breaches_high, breaches_very_high,
+            last_alert_at, updated_at
+        )
+        SELECT o.id,
+               (SELECT COUNT(*) FROM shipments s WHERE s.organization_id = o.id AND s.status = 'active'),
+               (SELECT COUNT(*) FROM shipments s WHERE s.organization_id = o.id AND s.status = 'completed'),
+               (SELECT COUNT(*) FROM shipments s WHERE s.organization_id = o.id AND s.status = 'cancelled'),
+               (SELECT COUNT(*) FROM alerts a JOIN shipments s ON s.id = a.shipment_id
+                 WHERE s.organization_id = o.id AND a.active IS TRUE AND a.status != 'resolved' AND a.severity = 'low'),
+               (SELECT COUNT(*) FROM alerts a JOIN shipments s ON s.id = a.shipment_id
+                 WHERE s.organization_id = o.id AND a.active IS TRUE AND a.status != 'resolved' AND a.severity = 'medium'),
+               (SELECT COUNT(*) FROM alerts a JOIN shipments s ON s.id = a.shipment_id
+                 WHERE s.organization_id = o.id AND a.active IS TRUE AND a.status != 'resolved' AND a.severity = 'high'),
+               (SELECT COUNT(*) FROM alerts a JOIN shipments s ON s.id = a.shipment_id
+                 WHERE s.organization_id = o.id AND a.active IS TRUE AND a.status != 'resolved' AND a.severity = 'very high'),
+               (SELECT MAX(a.created_at) FROM alerts a JOIN shipments s ON s.id = a.shipment_id
+                 WHERE s.organization_id = o.id),
+               CURRENT_TIMESTAMP
+          FROM organizations o
+    """)
+
+
+def downgrade():
+    op.drop_table('organization_summaries')
@@ -0,0 +1,69 @@
+"""Add chat_room_members
+
+Revision ID: e41f6c8b9d27
+Revises: b2d7e9a41c05
+Create Date: 2026-10-19 14:02:17.331940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41f6c8b9d27'
+down_revision = 'b2d7e9a41c05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # As with chat_room_summaries, db.create_all() may have created it already
+    if 'chat_room_members' not in sa.inspect(bind).get_table_names():
+        op.create_table('chat_room_members',
+            sa.Column('room_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('joined_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['room_id'], ['chat_rooms.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('room_id', 'user_id')
+        )
+        with op.batch_alter_table('chat_room_members', schema=None) as batch_op:
+            batch_op.create_index('ix_chat_room_members_user_id_room_id', ['user_id', 'room_id'], unique=False)
+
+    if bind.dialect.name == 'postgresql':
+        group_members = """
+            SELECT r.id, CAST(p.value AS INTEGER), r.created_at
+              FROM chat_rooms r, json_array_elements_text(r.participants) AS p(value)
+             WHERE r.room_type = 'group' AND r.participants IS NOT NULL
+        """
+    else:
+        group_members = """
+            SELECT r.id, CAST(p.value AS INTEGER), r.created_at
+              FROM chat_rooms r, json_each(r.participants) AS p
+             WHERE r.room_type = 'group' AND r.participants IS NOT NULL
+        """
+
+    op.execute(f"""
+        INSERT INTO chat_room_members (room_id, user_id, joined_at)
+        SELECT DISTINCT m.room_id, m.user_id, m.joined_at FROM (
+            SELECT id AS room_id, participant1_id AS user_id, created_at AS joined_at
+              FROM chat_rooms WHERE room_type = 'direct' AND participant1_id IS NOT NULL
+            UNION
+            SELECT id, participant2_id, created_at
+              FROM chat_rooms WHERE room_type = 'direct' AND participant2_id IS NOT NULL
+            UNION
+            {group_members}
+        ) m
+        WHERE m.user_id IN (SELECT id FROM users)
+          AND NOT EXISTS (
+                SELECT 1 FROM chat_room_members e
+                 WHERE e.room_id = m.room_id AND e.user_id = m.user_id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('chat_room_members', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_room_members_user_id_room_id')
+
+    op.drop_table('chat_room_members')
@@ -0,0 +1,50 @@
+"""Add shipment_latest_readings
+
+Revision ID: e5a9c2b7d418
+Revises: d82f4a6c9e17
+Create Date: 2026-10-19 21:44:17.392016
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c2b7d418'
+down_revision = 'd82f4a6c9e17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'shipment_latest_readings' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('shipment_latest_readings',
+            sa.Column('shipment_id', sa.String(length=50), nullable=False),
+            sa.Column('weather_data_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('location', sa.String(length=100), nullable=True),
+            sa.Column('internal_temp', sa.Float(), nullable=True),
+            sa.Column('external_temp', sa.Float(), nullable=True),
+            sa.Column('humidity', sa.Float(), nullable=True),
+            sa.Column('aqi', sa.Float(), nullable=True),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['shipment_id'], ['shipments.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('shipment_id')
+        )
+
+    op.execute("DELETE FROM shipment_latest_readings")
+    op.execute("""
+        INSERT INTO shipment_latest_readings (
+            shipment_id, weather_data_id, user_id, location, internal_temp,
+            external_temp, humidity, aqi, timestamp
+        )
+        SELECT w.shipment_id, w.id, w.user_id, w.location, w.internal_temp,
+               w.external_temp, w.humidity, w.aqi, w.timestamp
+          FROM weather_data w
+          JOIN (SELECT shipment_id, MAX(id) AS id FROM weather_data
+                 WHERE shipment_id IS NOT NULL GROUP BY shipment_id) latest ON latest.id = w.id
+    """)
+
+
+def downgrade():
+    op.drop_table('shipment_latest_readings')
@@ -0,0 +1,31 @@
+"""Add (chat_room_id, updated_at) index to chat_messages
+
+Revision ID: f0b6d3c92a48
+Revises: c58d2a7e4f19
+Create Date: 2026-10-19 16:10:36.208415
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0b6d3c92a48'
+down_revision = 'c58d2a7e4f19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if 'ix_chat_messages_chat_room_id_updated_at' not in [i['name'] for i in sa.inspect(op.get_bind()).get_indexes('chat_messages')]:
+        with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+            batch_op.create_index('ix_chat_messages_chat_room_id_updated_at', ['chat_room_id', 'updated_at'], unique=False)
+
+    # created_at/updated_at used to default to the server start time, so older
+    # rows can have an updated_at before they were created
+    op.execute("UPDATE chat_messages SET updated_at = created_at WHERE updated_at IS NULL OR updated_at < created_at")
+
+
+def downgrade():
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_messages_chat_room_id_updated_at')
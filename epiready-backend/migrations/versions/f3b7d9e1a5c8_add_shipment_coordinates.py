@@ -0,0 +1,59 @@
+"""Add typed coordinates and a geohash index for shipment locations
+
+Revision ID: f3b7d9e1a5c8
+Revises: e5a9c2b7d418
+Create Date: 2026-10-19 22:58:36.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from utils.geo import encode, parse_coordinates
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7d9e1a5c8'
+down_revision = 'e5a9c2b7d418'
+branch_labels = None
+depends_on = None
+
+COORDINATE_TABLES = ('shipments', 'weather_data', 'shipment_latest_readings')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table in COORDINATE_TABLES:
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            if 'latitude' not in existing:
+                batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+            if 'longitude' not in existing:
+                batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+            if table == 'shipments' and 'geohash' not in existing:
+                batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+
+    if 'ix_shipments_geohash' not in {index['name'] for index in inspector.get_indexes('shipments')}:
+        op.create_index('ix_shipments_geohash', 'shipments', ['geohash'], unique=False,
+                        postgresql_ops={'geohash': 'varchar_pattern_ops'})
+
+    # Locations entered as "lat, lon" become typed coordinates
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, current_location FROM shipments WHERE current_location IS NOT NULL AND latitude IS NULL"
+    )).fetchall()
+    for shipment_id, current_location in rows:
+        parsed = parse_coordinates(current_location)
+        if parsed:
+            bind.execute(
+                sa.text("UPDATE shipments SET latitude = :lat, longitude = :lon, geohash = :geohash WHERE id = :id"),
+                {'lat': parsed[0], 'lon': parsed[1], 'geohash': encode(*parsed), 'id': shipment_id}
+            )
+
+
+def downgrade():
+    op.drop_index('ix_shipments_geohash', table_name='shipments')
+    for table in reversed(COORDINATE_TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            if table == 'shipments':
+                batch_op.drop_column('geohash')
+            batch_op.drop_column('longitude')
+            batch_op.drop_column('latitude')
@@ -1,20 +1,31 @@
 from .alert import Alert                         
 from .organization import Organization           
+from .organization_summary import OrganizationSummary
 from .shipment import Shipment                  
 from .shipment_action import ShipmentAction      
 from .temperature import TemperatureData             
 from .user import User                           
-from .weather import WeatherData                     
-from .chat import ChatRoom, ChatMessage
+from .weather import WeatherData, ShipmentLatestReading
+from .chat import ChatRoom, ChatMessage, ChatRoomSummary, ChatRoomMember
+from .presence import SocketSession
+from .refresh_token import RefreshToken
+from .rate_limit import RateLimitBucket
 
 __all__ = [
     "Alert",
     "Organization",
+    "OrganizationSummary",
     "Shipment",
     "ShipmentAction",
     "TemperatureData",
     "User",
     "WeatherData",
+    "ShipmentLatestReading",
     "ChatRoom",
     "ChatMessage",
+    "ChatRoomSummary",
+    "ChatRoomMember",
+    "SocketSession",
+    "RefreshToken",
+    "RateLimitBucket",
 ]
@@ -6,15 +6,16 @@ class Alert(db.Model):
     __tablename__ = 'alerts'
 
     id = db.Column(db.Integer, primary_key=True)
-    shipment_id = db.Column(db.String(50), db.ForeignKey('shipments.id'), nullable=False)
+    shipment_id = db.Column(db.String(50), db.ForeignKey('shipments.id'), index=True, nullable=False)
     type = db.Column(db.String(20), nullable=False)
     severity = db.Column(db.String(10), nullable=False)  # low, medium, high
     message = db.Column(db.String(200), nullable=False)
     status = db.Column(db.String(20), nullable=False)  # active, inprogress, resolved
     active = db.Column(db.Boolean, default=True, nullable=True)
     
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), nullable=False)
     resolved_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), onupdate=lambda *_: datetime.now(timezone.utc))
     
     actions = db.relationship('ActionLog', backref='alert', lazy=True)
 
@@ -31,7 +32,8 @@ class Alert(db.Model):
             'status': self.status,
             'active': self.active,
             'created_at': self.created_at.isoformat(),
-            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None
+            'resolved_at': self.resolved_at.isoformat() if self.resolved_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 @event.listens_for(Alert, 'before_update')
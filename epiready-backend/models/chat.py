@@ -1,6 +1,18 @@
 from datetime import datetime, timezone
 from config.database import db
+from config.replicas import on_primary
+from sqlalchemy import event, inspect, select, update, insert, or_, case
 from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.orm import Session, object_session
+from utils.ttl_cache import TTLCache
+from utils.fanout import fanout
+from utils.search import search_document, register_sqlite_fts
+import os
+
+PREVIEW_LENGTH = 100
+
+# Room ids per user, read by the socket handlers on every event
+room_membership_cache = TTLCache(ttl=float(os.getenv('CHAT_MEMBERSHIP_CACHE_TTL', '30')))
 
 class ChatRoom(db.Model):
     __tablename__ = 'chat_rooms'
@@ -16,7 +28,8 @@ class ChatRoom(db.Model):
     participant1_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     participant2_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     
-    # For group chats, store all participants in JSON
+    # For group chats, store all participants in JSON. Kept in sync with
+    # chat_room_members for API responses; membership checks use the table.
     participants = db.Column(JSON, nullable=True)  # Array of user IDs
     
     # Relationships
@@ -25,6 +38,8 @@ class ChatRoom(db.Model):
     participant1 = db.relationship('User', foreign_keys=[participant1_id])
     participant2 = db.relationship('User', foreign_keys=[participant2_id])
     messages = db.relationship('ChatMessage', backref='chat_room', lazy='dynamic', cascade='all, delete-orphan')
+    # Joined so listing rooms never needs a per-room COUNT
+    summary = db.relationship('ChatRoomSummary', uselist=False, lazy='joined', cascade='all, delete-orphan')
     
     def to_dict(self):
         return {
@@ -37,11 +52,110 @@ class ChatRoom(db.Model):
             'participant1_id': self.participant1_id,
             'participant2_id': self.participant2_id,
             'participants': self.participants,
-            'message_count': self.messages.count()
+            'message_count': self.summary.message_count if self.summary else 0,
+            'last_message': self.summary.to_dict() if self.summary and self.summary.last_message_id else None
+        }
+
+    def member_ids(self):
+        """User ids taking part in the room according to its own columns."""
+        if self.room_type == 'direct':
+            return [uid for uid in (self.participant1_id, self.participant2_id) if uid is not None]
+        return list(dict.fromkeys(self.participants or []))
+
+class ChatRoomMember(db.Model):
+    __tablename__ = 'chat_room_members'
+    __table_args__ = (
+        db.Index('ix_chat_room_members_user_id_room_id', 'user_id', 'room_id'),
+    )
+
+    room_id = db.Column(db.Integer, db.ForeignKey('chat_rooms.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    joined_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), nullable=False)
+    # Everything up to and including this message id has been read
+    last_read_message_id = db.Column(db.Integer, nullable=True)
+
+    def to_dict(self):
+        return {
+            'room_id': self.room_id,
+            'user_id': self.user_id,
+            'joined_at': self.joined_at.isoformat() if self.joined_at else None,
+            'last_read_message_id': self.last_read_message_id
+        }
+
+def participant_clause(user_id):
+    """SQL condition matching the rooms *user_id* takes part in."""
+    return ChatRoom.id.in_(select(ChatRoomMember.room_id).where(ChatRoomMember.user_id == user_id))
+
+def user_room_ids(user_id):
+    """Ids of the rooms *user_id* belongs to, served from room_membership_cache."""
+    def load():
+        # From the primary: a lagging replica's answer would be cached for the whole TTL
+        with on_primary():
+            return frozenset(db.session.execute(
+                select(ChatRoomMember.room_id).where(ChatRoomMember.user_id == user_id)
+            ).scalars())
+    return room_membership_cache.get_or_load(user_id, load)
+
+def mark_room_read(user_id, room_id, message_id):
+    """
+    Moves the member's read cursor forward to *message_id* (never backwards),
+    clamped to the room's last message so a made-up id can't park the cursor
+    past messages that haven't been sent yet. Returns the new cursor, or None
+    when it didn't move.
+    """
+    last_message_id = db.session.query(ChatRoomSummary.last_message_id).filter(
+        ChatRoomSummary.chat_room_id == room_id
+    ).scalar()
+    if last_message_id is None:
+        return None
+    message_id = min(message_id, last_message_id)
+    members = ChatRoomMember.__table__
+    result = db.session.execute(
+        update(members)
+        .where(
+            members.c.room_id == room_id,
+            members.c.user_id == user_id,
+            or_(members.c.last_read_message_id.is_(None), members.c.last_read_message_id < message_id)
+        )
+        .values(last_read_message_id=message_id)
+    )
+    return message_id if result.rowcount > 0 else None
+
+def is_room_member(user_id, room_id):
+    try:
+        return int(room_id) in user_room_ids(user_id)
+    except (TypeError, ValueError):
+        return False
+
+class ChatRoomSummary(db.Model):
+    """
+    Denormalized per-room message count and last message preview, maintained by
+    the ChatMessage insert/update listeners below.
+    """
+    __tablename__ = 'chat_room_summaries'
+
+    chat_room_id = db.Column(db.Integer, db.ForeignKey('chat_rooms.id', ondelete='CASCADE'), primary_key=True)
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_message_preview = db.Column(db.String(PREVIEW_LENGTH), nullable=True)
+    last_message_sender_id = db.Column(db.Integer, nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), onupdate=lambda *_: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            'id': self.last_message_id,
+            'preview': self.last_message_preview,
+            'sender_id': self.last_message_sender_id,
+            'created_at': self.last_message_at.isoformat() if self.last_message_at else None
         }
 
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        db.Index('ix_chat_messages_chat_room_id_id', 'chat_room_id', 'id'),
+        db.Index('ix_chat_messages_chat_room_id_updated_at', 'chat_room_id', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     chat_room_id = db.Column(db.Integer, db.ForeignKey('chat_rooms.id'), nullable=False)
@@ -49,20 +163,21 @@ class ChatMessage(db.Model):
     content = db.Column(db.Text, nullable=False)
     message_type = db.Column(db.String(20), nullable=False, default='text')  # 'text', 'file', 'image'
     file_url = db.Column(db.String(500), nullable=True)  # For file/image messages
-    created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), nullable=False)
-    updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=lambda *_: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), onupdate=lambda *_: datetime.now(timezone.utc))
     is_edited = db.Column(db.Boolean, default=False)
     is_deleted = db.Column(db.Boolean, default=False)
     
     # Relationships
     sender = db.relationship('User', backref='chat_messages')
     
-    def to_dict(self):
+    def to_dict(self, senders=None):
+        """*senders* maps sender_id to email; pass it to avoid lazy-loading self.sender."""
         return {
             'id': self.id,
             'chat_room_id': self.chat_room_id,
             'sender_id': self.sender_id,
-            'sender_email': self.sender.email if self.sender else None,
+            'sender_email': senders.get(self.sender_id) if senders is not None else (self.sender.email if self.sender else None),
             'content': self.content,
             'message_type': self.message_type,
             'file_url': self.file_url,
@@ -70,4 +185,135 @@ class ChatMessage(db.Model):
             'updated_at': self.updated_at.isoformat(),
             'is_edited': self.is_edited,
             'is_deleted': self.is_deleted
-        } 
\ No newline at end of file
+        } 
+
+# Full-text search: GIN expression index on Postgres, FTS5 table on SQLite
+message_search_document = search_document(ChatMessage.content)
+db.Index('ix_chat_messages_content_fts', message_search_document, postgresql_using='gin').ddl_if(dialect='postgresql')
+register_sqlite_fts(ChatMessage.__table__, ['content'])
+
+@event.listens_for(ChatRoom, 'after_insert')
+def create_room_summary(mapper, connection, target):
+    # Inserted here rather than through the relationship so that messages
+    # flushed alongside a new room always find their summary row
+    now = datetime.now(timezone.utc)
+    connection.execute(insert(ChatRoomSummary.__table__).values(
+        chat_room_id=target.id, message_count=0, updated_at=now
+    ))
+    member_ids = target.member_ids()
+    if member_ids:
+        connection.execute(insert(ChatRoomMember.__table__), [
+            {'room_id': target.id, 'user_id': uid, 'joined_at': now} for uid in member_ids
+        ])
+        _membership_changed(target, target.id, member_ids)
+
+@event.listens_for(ChatRoom, 'before_delete')
+def forget_room_members(mapper, connection, target):
+    _membership_changed(target, target.id, connection.execute(
+        select(ChatRoomMember.user_id).where(ChatRoomMember.room_id == target.id)
+    ).scalars(), removed=True)
+
+def _membership_changed(target, room_id, user_ids, removed=False):
+    """
+    Notes the change on the flushing session; the cache and sockets follow
+    once it commits (see apply_membership_changes), so no reader can cache
+    the old membership again between the flush and the commit.
+    """
+    info = object_session(target).info
+    for user_id in user_ids:
+        info.setdefault('membership_changed', set()).add(user_id)
+        if removed:
+            info.setdefault('rooms_left', set()).add((user_id, room_id))
+
+def _bump_room_summary(connection, room_id):
+    # So the other members' room list ETags change too
+    connection.execute(
+        update(ChatRoomSummary.__table__)
+        .where(ChatRoomSummary.__table__.c.chat_room_id == room_id)
+        .values(updated_at=datetime.now(timezone.utc))
+    )
+
+@event.listens_for(ChatRoomMember, 'after_insert')
+def member_added(mapper, connection, target):
+    _membership_changed(target, target.room_id, [target.user_id])
+    _bump_room_summary(connection, target.room_id)
+
+@event.listens_for(ChatRoomMember, 'after_delete')
+def member_removed(mapper, connection, target):
+    _membership_changed(target, target.room_id, [target.user_id], removed=True)
+    _bump_room_summary(connection, target.room_id)
+
+@event.listens_for(Session, 'after_commit')
+def apply_membership_changes(session):
+    room_membership_cache.invalidate(*session.info.pop('membership_changed', ()))
+    for user_id, room_id in session.info.pop('rooms_left', ()):
+        # Their open sockets stop receiving the room's messages
+        fanout.leave(str(user_id), f"chat_room_{room_id}")
+
+@event.listens_for(Session, 'after_soft_rollback')
+def discard_membership_changes(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop('membership_changed', None)
+        session.info.pop('rooms_left', None)
+
+def _last_message_values(message):
+    return {
+        'last_message_id': message.id,
+        'last_message_preview': (message.content or '')[:PREVIEW_LENGTH],
+        'last_message_sender_id': message.sender_id,
+        'last_message_at': message.created_at,
+    }
+
+@event.listens_for(ChatMessage, 'after_insert')
+def summarize_new_message(mapper, connection, target):
+    if target.is_deleted:
+        return
+    summaries = ChatRoomSummary.__table__
+    is_newer = or_(summaries.c.last_message_id.is_(None), summaries.c.last_message_id < target.id)
+    values = {key: case((is_newer, value), else_=summaries.c[key]) for key, value in _last_message_values(target).items()}
+    result = connection.execute(
+        update(summaries)
+        .where(summaries.c.chat_room_id == target.chat_room_id)
+        .values(message_count=summaries.c.message_count + 1, updated_at=datetime.now(timezone.utc), **values)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(summaries).values(
+            chat_room_id=target.chat_room_id, message_count=1, updated_at=datetime.now(timezone.utc),
+            **_last_message_values(target)
+        ))
+
+@event.listens_for(ChatMessage, 'after_update')
+def summarize_changed_message(mapper, connection, target):
+    summaries = ChatRoomSummary.__table__
+    deleted = inspect(target).attrs.is_deleted.history
+    content = inspect(target).attrs.content.history
+    now = datetime.now(timezone.utc)
+
+    if deleted.has_changes() and target.is_deleted:
+        connection.execute(
+            update(summaries)
+            .where(summaries.c.chat_room_id == target.chat_room_id)
+            .values(message_count=summaries.c.message_count - 1, updated_at=now)
+        )
+        last_id = connection.execute(
+            select(summaries.c.last_message_id).where(summaries.c.chat_room_id == target.chat_room_id)
+        ).scalar()
+        if last_id == target.id:
+            messages = ChatMessage.__table__
+            previous = connection.execute(
+                select(messages)
+                .where(messages.c.chat_room_id == target.chat_room_id, messages.c.is_deleted.is_not(True))
+                .order_by(messages.c.id.desc())
+                .limit(1)
+            ).first()
+            connection.execute(
+                update(summaries)
+                .where(summaries.c.chat_room_id == target.chat_room_id)
+                .values(**(_last_message_values(previous) if previous else dict.fromkeys(_last_message_values(target))))
+            )
+    elif content.has_changes() and not target.is_deleted:
+        connection.execute(
+            update(summaries)
+            .where(summaries.c.chat_room_id == target.chat_room_id, summaries.c.last_message_id == target.id)
+            .values(last_message_preview=target.content[:PREVIEW_LENGTH], updated_at=now)
+        )
@@ -0,0 +1,199 @@
+from datetime import datetime, timezone
+from config.database import db
+from sqlalchemy import event, inspect, select, update, insert, func, case
+from models.shipment import Shipment
+from models.alert import Alert
+
+SHIPMENT_STATUSES = ('active', 'completed', 'cancelled')
+BREACH_SEVERITIES = ('low', 'medium', 'high', 'very high')
+
+def _status_column(status):
+    return f"shipments_{status}" if status in SHIPMENT_STATUSES else None
+
+def _severity_column(severity):
+    return f"breaches_{severity.replace(' ', '_')}" if severity in BREACH_SEVERITIES else None
+
+def _is_open_breach(active, status):
+    # The same alerts the dashboard shows as needing attention
+    return bool(active) and status != 'resolved'
+
+COUNTER_COLUMNS = [_status_column(s) for s in SHIPMENT_STATUSES] + [_severity_column(s) for s in BREACH_SEVERITIES]
+
+class OrganizationSummary(db.Model):
+    """
+    Denormalized per-organization overview: shipments by status, open breach
+    alerts by severity, the last alert time and each active shipment's latest
+    reading. The counters are maintained by the Shipment and Alert listeners
+    below, so every writer (controllers, bulk endpoints, the monitor) keeps
+    them current; the readings are written by the monitor.
+    """
+    __tablename__ = 'organization_summaries'
+
+    organization_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='CASCADE'), primary_key=True)
+    shipments_active = db.Column(db.Integer, nullable=False, default=0)
+    shipments_completed = db.Column(db.Integer, nullable=False, default=0)
+    shipments_cancelled = db.Column(db.Integer, nullable=False, default=0)
+    breaches_low = db.Column(db.Integer, nullable=False, default=0)
+    breaches_medium = db.Column(db.Integer, nullable=False, default=0)
+    breaches_high = db.Column(db.Integer, nullable=False, default=0)
+    breaches_very_high = db.Column(db.Integer, nullable=False, default=0)
+    last_alert_at = db.Column(db.DateTime, nullable=True)
+    # {shipment_id: {"timestamp", "internal_temperature", ...}} for active shipments
+    latest_readings = db.Column(db.JSON, nullable=True)
+    updated_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), onupdate=lambda *_: datetime.now(timezone.utc))
+
+    def to_dict(self):
+        return {
+            'organization_id': self.organization_id,
+            'shipments': {status: getattr(self, _status_column(status)) for status in SHIPMENT_STATUSES},
+            'active_breaches': {severity: getattr(self, _severity_column(severity)) for severity in BREACH_SEVERITIES},
+            'last_alert_at': self.last_alert_at.isoformat() if self.last_alert_at else None,
+            'latest_readings': self.latest_readings or {},
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+def adjust_summary(connection, organization_id, counts, last_alert_at=None):
+    """
+    Adds *counts* ({column: delta}) to the organization's summary row,
+    creating it on first use. Runs on the flush's connection, so it commits
+    or rolls back with the change that caused it.
+    """
+    if organization_id is None:
+        return
+    summaries = OrganizationSummary.__table__
+    now = datetime.now(timezone.utc)
+    values = {column: summaries.c[column] + delta for column, delta in counts.items() if column and delta}
+    if last_alert_at is not None:
+        values['last_alert_at'] = case(
+            (summaries.c.last_alert_at.is_(None), last_alert_at),
+            (summaries.c.last_alert_at < last_alert_at, last_alert_at),
+            else_=summaries.c.last_alert_at
+        )
+    result = connection.execute(
+        update(summaries).where(summaries.c.organization_id == organization_id).values(updated_at=now, **values)
+    )
+    if result.rowcount == 0:
+        # Existing organizations were backfilled by the migration, so a
+        # missing row means nothing has been counted yet
+        row = dict.fromkeys(COUNTER_COLUMNS, 0)
+        row.update({column: delta for column, delta in counts.items() if column})
+        connection.execute(insert(summaries).values(
+            organization_id=organization_id, last_alert_at=last_alert_at, updated_at=now, **row
+        ))
+
+def rebuild_organization_summary(connection, organization_id):
+    """Recomputes the organization's counters from shipments and alerts; keeps its readings."""
+    summaries = OrganizationSummary.__table__
+    shipments = Shipment.__table__
+    alerts = Alert.__table__
+    values = dict.fromkeys(COUNTER_COLUMNS, 0)
+
+    for status, count in connection.execute(
+        select(shipments.c.status, func.count()).where(shipments.c.organization_id == organization_id).group_by(shipments.c.status)
+    ):
+        if _status_column(status):
+            values[_status_column(status)] = count
+
+    open_alert = alerts.c.active.is_(True) & (alerts.c.status != 'resolved')
+    for severity, count in connection.execute(
+        select(alerts.c.severity, func.count())
+        .join(shipments, shipments.c.id == alerts.c.shipment_id)
+        .where(shipments.c.organization_id == organization_id, open_alert)
+        .group_by(alerts.c.severity)
+    ):
+        if _severity_column(severity):
+            values[_severity_column(severity)] = count
+
+    values['last_alert_at'] = connection.execute(
+        select(func.max(alerts.c.created_at))
+        .join(shipments, shipments.c.id == alerts.c.shipment_id)
+        .where(shipments.c.organization_id == organization_id)
+    ).scalar()
+    values['updated_at'] = datetime.now(timezone.utc)
+
+    result = connection.execute(update(summaries).where(summaries.c.organization_id == organization_id).values(**values))
+    if result.rowcount == 0:
+        connection.execute(insert(summaries).values(organization_id=organization_id, **values))
+
+def count_new_shipments(connection, organization_id, statuses):
+    """For bulk inserts, which skip the per-object listeners: *statuses* is one status per new shipment."""
+    counts = {}
+    for status in statuses:
+        column = _status_column(status)
+        counts[column] = counts.get(column, 0) + 1
+    adjust_summary(connection, organization_id, counts)
+
+def record_latest_readings(readings):
+    """
+    Stores the monitor's readings, {organization_id: {shipment_id: reading}},
+    in the summaries through the current session; the caller commits.
+    """
+    for organization_id, shipment_readings in readings.items():
+        if organization_id is None:
+            continue
+        summary = db.session.get(OrganizationSummary, organization_id)
+        if summary is None:
+            rebuild_organization_summary(db.session.connection(), organization_id)
+            summary = db.session.get(OrganizationSummary, organization_id)
+        # A new dict so the JSON column is seen as changed
+        summary.latest_readings = dict(summary.latest_readings or {}, **shipment_readings)
+
+def _shipment_organization(connection, shipment_id):
+    shipments = Shipment.__table__
+    return connection.execute(select(shipments.c.organization_id).where(shipments.c.id == shipment_id)).scalar()
+
+def _forget_reading(connection, organization_id, shipment_id):
+    summaries = OrganizationSummary.__table__
+    readings = connection.execute(
+        select(summaries.c.latest_readings).where(summaries.c.organization_id == organization_id)
+    ).scalar()
+    if readings and shipment_id in readings:
+        readings = {key: value for key, value in readings.items() if key != shipment_id}
+        connection.execute(update(summaries).where(summaries.c.organization_id == organization_id).values(latest_readings=readings))
+
+@event.listens_for(Shipment, 'after_insert')
+def summarize_new_shipment(mapper, connection, target):
+    adjust_summary(connection, target.organization_id, {_status_column(target.status): 1})
+
+@event.listens_for(Shipment, 'after_update')
+def summarize_changed_shipment(mapper, connection, target):
+    status = inspect(target).attrs.status.history
+    if not status.has_changes() or not status.deleted:
+        return
+    old_status = status.deleted[0]
+    if old_status == target.status:
+        return
+    adjust_summary(connection, target.organization_id, {_status_column(old_status): -1, _status_column(target.status): 1})
+    if old_status == 'active':
+        _forget_reading(connection, target.organization_id, target.id)
+
+@event.listens_for(Shipment, 'after_delete')
+def summarize_deleted_shipment(mapper, connection, target):
+    adjust_summary(connection, target.organization_id, {_status_column(target.status): -1})
+    _forget_reading(connection, target.organization_id, target.id)
+
+@event.listens_for(Alert, 'after_insert')
+def summarize_new_alert(mapper, connection, target):
+    counts = {}
+    if _is_open_breach(target.active, target.status):
+        counts[_severity_column(target.severity)] = 1
+    adjust_summary(connection, _shipment_organization(connection, target.shipment_id), counts, last_alert_at=target.created_at)
+
+@event.listens_for(Alert, 'after_update')
+def summarize_changed_alert(mapper, connection, target):
+    state = inspect(target)
+    def previous(attr):
+        history = state.attrs[attr].history
+        return history.deleted[0] if history.deleted else getattr(target, attr)
+    was_open = _is_open_breach(previous('active'), previous('status'))
+    is_open = _is_open_breach(target.active, target.status)
+    old_severity = previous('severity')
+    if was_open == is_open and (not is_open or old_severity == target.severity):
+        return
+    counts = {}
+    if was_open:
+        counts[_severity_column(old_severity)] = -1
+    if is_open:
+        column = _severity_column(target.severity)
+        counts[column] = counts.get(column, 0) + 1
+    adjust_summary(connection, _shipment_organization(connection, target.shipment_id), counts)
@@ -0,0 +1,19 @@
+from datetime import datetime, timezone
+from config.database import db
+
+class SocketSession(db.Model):
+    """One connected Socket.IO client; the shared presence backend for multi-worker deployments."""
+    __tablename__ = 'socket_sessions'
+
+    sid = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), index=True, nullable=False)
+    connected_at = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), nullable=False)
+    last_seen = db.Column(db.DateTime, default=lambda *_: datetime.now(timezone.utc), index=True, nullable=False)
+
+    def to_dict(self):
+        return {
+            'sid': self.sid,
+            'user_id': self.user_id,
+            'connected_at': self.connected_at.isoformat(),
+            'last_seen': self.last_seen.isoformat()
+        }
@@ -0,0 +1,13 @@
+from config.database import db
+
+class RateLimitBucket(db.Model):
+    """
+    One token bucket of the shared rate limiter (RATE_LIMIT_BACKEND=database),
+    so every worker draws from the same budget.
+    """
+    __tablename__ = 'rate_limit_buckets'
+
+    key = db.Column(db.String(128), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    # Epoch seconds of the last refill
+    updated_at = db.Column(db.Float, nullable=False)
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from config.database import db
+import hashlib
+import os
+import secrets
+import uuid
+
+REFRESH_TOKEN_DAYS = int(os.getenv('REFRESH_TOKEN_DAYS', '14'))
+
+def _now():
+    # Naive UTC, like the other timestamp comparisons in the app
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def hash_refresh_token(raw_token: str) -> str:
+    # The token is 256 random bits, so a fast digest is enough; no bcrypt on refresh
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+class RefreshToken(db.Model):
+    """
+    One issued refresh token, stored only as its SHA-256. Each refresh
+    revokes the presented token and issues a new one in the same family;
+    presenting a revoked token again means it was copied, so the whole
+    family is revoked.
+    """
+    __tablename__ = 'refresh_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), index=True, nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, index=True, nullable=False)
+    family_id = db.Column(db.String(36), index=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda *_: _now(), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+def issue_refresh_token(user_id: int, family_id: str = None) -> str:
+    """Adds a new refresh token for *user_id* to the session and returns the raw token; the caller commits."""
+    raw_token = secrets.token_urlsafe(32)
+    db.session.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(raw_token),
+        family_id=family_id or str(uuid.uuid4()),
+        expires_at=_now() + timedelta(days=REFRESH_TOKEN_DAYS)
+    ))
+    return raw_token
+
+def revoke_refresh_tokens(*criteria):
+    db.session.execute(
+        update(RefreshToken).where(RefreshToken.revoked_at.is_(None), *criteria).values(revoked_at=_now())
+    )
+
+def rotate_refresh_token(raw_token: str):
+    """
+    Exchanges *raw_token* for a new one. Returns (user_id, new_raw_token), or
+    (None, None) if the token is unknown, expired or already used. Commits.
+    """
+    token = RefreshToken.query.filter_by(token_hash=hash_refresh_token(raw_token)).first()
+    if not token or token.expires_at <= _now():
+        return None, None
+
+    # Conditional update so two concurrent refreshes can't both succeed
+    used = db.session.execute(
+        update(RefreshToken).where(RefreshToken.id == token.id, RefreshToken.revoked_at.is_(None)).values(revoked_at=_now())
+    ).rowcount
+    if not used:
+        # Reuse of a rotated token: whoever holds the family may be an attacker
+        revoke_refresh_tokens(RefreshToken.family_id == token.family_id)
+        db.session.commit()
+        return None, None
+
+    new_token = issue_refresh_token(token.user_id, token.family_id)
+    db.session.commit()
+    return token.user_id, new_token
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from config.database import db
-from sqlalchemy import event
+from sqlalchemy import event, inspect
+from utils.geo import encode, parse_coordinates, valid_coordinates
 
 class Shipment(db.Model):
     __tablename__ = 'shipments'
@@ -26,6 +27,15 @@ class Shipment(db.Model):
     expected_arrival = db.Column(db.DateTime, nullable=True)
     actual_arrival = db.Column(db.DateTime)
     current_location = db.Column(db.String(100))
+    # Typed position for spatial queries; geohash is kept in step by sync_coordinates below
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True)
+
+    # Pattern ops so LIKE 'prefix%' uses the index whatever the database collation
+    __table_args__ = (
+        db.Index('ix_shipments_geohash', 'geohash', postgresql_ops={'geohash': 'varchar_pattern_ops'}),
+    )
 
     def __repr__(self):
         return f'<Shipment {self.id}>'
@@ -50,7 +60,9 @@ class Shipment(db.Model):
             'updated_at': self.updated_at.isoformat(),
             'expected_arrival': self.expected_arrival.isoformat() if self.expected_arrival else None,
             'actual_arrival': self.actual_arrival.isoformat() if self.actual_arrival else None,
-            'current_location': self.current_location
+            'current_location': self.current_location,
+            'latitude': self.latitude,
+            'longitude': self.longitude
         }
 
 @event.listens_for(Shipment, 'before_update')
@@ -60,3 +72,31 @@ def validate_completed_shipment(mapper, connection, target):
             target.actual_arrival = datetime.now(timezone.utc)
         elif target.status == 'cancelled' and not target.actual_arrival:
             target.actual_arrival = datetime.now(timezone.utc)
+
+def coordinate_values(latitude, longitude, current_location=None):
+    """
+    Column values for a shipment's position: the given coordinates, or those
+    parsed from a "lat, lon" *current_location*, with their geohash.
+    """
+    if not valid_coordinates(latitude, longitude):
+        latitude, longitude = parse_coordinates(current_location) or (None, None)
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'geohash': encode(latitude, longitude) if latitude is not None else None
+    }
+
+@event.listens_for(Shipment, 'before_insert')
+@event.listens_for(Shipment, 'before_update')
+def sync_coordinates(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.latitude.history.has_changes() or state.attrs.longitude.history.has_changes():
+        values = coordinate_values(target.latitude, target.longitude)
+    elif state.attrs.current_location.history.has_changes() and parse_coordinates(target.current_location):
+        # Free-text locations that are really "lat, lon" fill the typed columns;
+        # other text (e.g. a transit note) leaves the last known position alone
+        values = coordinate_values(None, None, target.current_location)
+    else:
+        return
+    for key, value in values.items():
+        setattr(target, key, value)
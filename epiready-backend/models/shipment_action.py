@@ -1,12 +1,13 @@
 from datetime import datetime, timezone
 from config.database import db
 from sqlalchemy.orm import validates 
+from utils.search import search_document, register_sqlite_fts
 
 class ShipmentAction(db.Model):
     __tablename__ = 'shipment_actions'
 
     id = db.Column(db.Integer, primary_key=True)
-    shipment_id = db.Column(db.String(50), db.ForeignKey('shipments.id'), nullable=False)
+    shipment_id = db.Column(db.String(50), db.ForeignKey('shipments.id'), index=True, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     action_type = db.Column(db.String(50), nullable=False)  # e.g., 'status_update', 'location_update', 'temperature_alert', 'delivery_complete'
     description = db.Column(db.String(200), nullable=False)
@@ -36,6 +37,11 @@ class ShipmentAction(db.Model):
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
         }
 
+# Full-text search: GIN expression index on Postgres, FTS5 table on SQLite
+action_search_document = search_document(ShipmentAction.description, ShipmentAction.action_metadata)
+db.Index('ix_shipment_actions_fts', action_search_document, postgresql_using='gin').ddl_if(dialect='postgresql')
+register_sqlite_fts(ShipmentAction.__table__, ['description', 'action_metadata'])
+
 @validates("status")
 def validate_completed_action(self, key, status):
     allowed = {"active", "in_progress", "completed"}
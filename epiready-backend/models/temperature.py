@@ -11,7 +11,7 @@ class TemperatureData(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc), nullable=False)
     # location of where temperature reading was taken is optional
     location = db.Column(db.String(100))
-    shipment_id = db.Column(db.String(50), db.ForeignKey("shipments.id"), nullable=False)
+    shipment_id = db.Column(db.String(50), db.ForeignKey("shipments.id"), index=True, nullable=False)
     
     def __repr__(self):
         return f'<TemperatureData {self.sensor_id} at {self.timestamp}>'
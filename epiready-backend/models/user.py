@@ -1,6 +1,6 @@
 from config.database import db
 from datetime import datetime, timezone
-import bcrypt
+from utils.passwords import hash_password, check_password, needs_rehash
 
 class User(db.Model):
     __tablename__ = "users"
@@ -34,8 +34,7 @@ def create_user(email: str, raw_password: str, role: str = 'manufacturer') -> Us
     if role not in valid_roles:
         role = 'manufacturer'
     
-    pw_hash = bcrypt.hashpw(raw_password.encode(), bcrypt.gensalt()).decode()
-    user = User(email=email, password_hash=pw_hash, role=role)
+    user = User(email=email, password_hash=hash_password(raw_password), role=role)
     db.session.add(user)
     db.session.commit()
     return user
@@ -45,7 +44,15 @@ def verify_user(email: str, raw_password: str) -> bool:
     if not user:
         return False
     
-    if bcrypt.checkpw(raw_password.encode(), user.password_hash.encode()):
+    if check_password(raw_password, user.password_hash):
+        if needs_rehash(user.password_hash):
+            # Cost factor changed since this hash was made; upgrade it while we have the password
+            try:
+                user.password_hash = hash_password(raw_password)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error rehashing password for user {user.id}: {e}")
         return user
     
     return False
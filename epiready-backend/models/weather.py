@@ -1,11 +1,15 @@
 from datetime import datetime, timezone
 from config.database import db
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
 
 class WeatherData(db.Model):
     __tablename__ = 'weather_data'
 
     id = db.Column(db.Integer, primary_key=True)
     location = db.Column(db.String(100), nullable=True)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
     internal_temp = db.Column(db.Float, nullable=True)
     external_temp = db.Column(db.Float, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # Optional link to User
@@ -15,6 +19,11 @@ class WeatherData(db.Model):
     aqi = db.Column(db.Float)
     # time when weather data was recorded in UTC (to have a standard globally)
     timestamp = db.Column(db.DateTime, default=datetime.now(timezone.utc), nullable=False)
+
+    # Range scans for the chart endpoints walk one shipment's readings in time order
+    __table_args__ = (
+        db.Index('ix_weather_data_shipment_id_timestamp', 'shipment_id', 'timestamp'),
+    )
     
     def __repr__(self):
         return f'<WeatherData {self.location} at {self.timestamp}>'
@@ -23,6 +32,44 @@ class WeatherData(db.Model):
         return {
             'id': self.id,
             'location': self.location,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'internal_temp': self.internal_temp,
+            'external_temp': self.external_temp,
+            'humidity': self.humidity,
+            'user_id': self.user_id,
+            'shipment_id': self.shipment_id,
+            'aqi': self.aqi,
+            'timestamp': self.timestamp.isoformat()
+        }
+
+class ShipmentLatestReading(db.Model):
+    """
+    The newest weather_data row of each shipment, copied on insert by the
+    listener below, so "current telemetry" is a primary-key lookup instead of
+    a sort over the shipment's history.
+    """
+    __tablename__ = 'shipment_latest_readings'
+
+    shipment_id = db.Column(db.String(50), db.ForeignKey('shipments.id', ondelete='CASCADE'), primary_key=True)
+    weather_data_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    location = db.Column(db.String(100), nullable=True)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    internal_temp = db.Column(db.Float, nullable=True)
+    external_temp = db.Column(db.Float, nullable=True)
+    humidity = db.Column(db.Float)
+    aqi = db.Column(db.Float)
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        # Same shape as the WeatherData it was copied from
+        return {
+            'id': self.weather_data_id,
+            'location': self.location,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
             'internal_temp': self.internal_temp,
             'external_temp': self.external_temp,
             'humidity': self.humidity,
@@ -30,4 +77,31 @@ class WeatherData(db.Model):
             'shipment_id': self.shipment_id,
             'aqi': self.aqi,
             'timestamp': self.timestamp.isoformat()
-        } 
\ No newline at end of file
+        }
+
+@event.listens_for(WeatherData, 'after_insert')
+def remember_latest_reading(mapper, connection, target):
+    if target.shipment_id is None:
+        return
+    latest = ShipmentLatestReading.__table__
+    dialect = postgresql if connection.dialect.name == 'postgresql' else sqlite
+    values = {
+        'shipment_id': target.shipment_id,
+        'weather_data_id': target.id,
+        'user_id': target.user_id,
+        'location': target.location,
+        'latitude': target.latitude,
+        'longitude': target.longitude,
+        'internal_temp': target.internal_temp,
+        'external_temp': target.external_temp,
+        'humidity': target.humidity,
+        'aqi': target.aqi,
+        'timestamp': target.timestamp,
+    }
+    upsert = dialect.insert(latest).values(**values)
+    connection.execute(upsert.on_conflict_do_update(
+        index_elements=[latest.c.shipment_id],
+        set_={key: upsert.excluded[key] for key in values if key != 'shipment_id'},
+        # Ids only grow, so an older row flushed late can't win
+        where=latest.c.weather_data_id < upsert.excluded.weather_data_id,
+    ))
@@ -4,6 +4,8 @@ from .shipment import shipment_blueprint
 from .shipment_action import shipment_action_blueprint
 from .alerts import alerts_blueprint
 from .chat import chat_blueprint
+from .export import export_blueprint
+from .search import search_blueprint
 
 all_blueprints = [
     (auth_blueprint, "/api/auth"),
@@ -11,5 +13,7 @@ all_blueprints = [
     (shipment_blueprint, "/api/shipments"),
     (shipment_action_blueprint, "/api/shipments"),
     (alerts_blueprint, "/api/alerts"),
-    (chat_blueprint, "/api/chat")
+    (chat_blueprint, "/api/chat"),
+    (export_blueprint, "/api/export"),
+    (search_blueprint, "/api/search")
 ]
\ No newline at end of file
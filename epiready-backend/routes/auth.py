@@ -1,7 +1,9 @@
 from flask import Blueprint
-from controllers.auth import signup, login, change_password
+from controllers.auth import signup, login, refresh, logout, change_password
 
 auth_blueprint = Blueprint("auth", __name__)
 auth_blueprint.route("/signup", methods=["POST"])(signup)
 auth_blueprint.route("/login", methods=["POST"])(login)
+auth_blueprint.route("/refresh", methods=["POST"])(refresh)
+auth_blueprint.route("/logout", methods=["POST"])(logout)
 auth_blueprint.route("/change-password", methods=["POST"])(change_password)
\ No newline at end of file
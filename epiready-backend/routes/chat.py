@@ -3,6 +3,12 @@ from controllers.chat import (
     get_user_chat_rooms,
     create_direct_chat,
     create_group_chat,
+    get_room_members,
+    add_room_members,
+    remove_room_member,
+    get_unread_counts,
+    mark_read,
+    sync_messages,
     get_chat_messages,
     send_message,
     edit_message,
@@ -16,10 +22,16 @@ chat_blueprint = Blueprint("chat", __name__)
 chat_blueprint.route("/rooms", methods=["GET"])(get_user_chat_rooms)
 chat_blueprint.route("/direct", methods=["POST"])(create_direct_chat)
 chat_blueprint.route("/group", methods=["POST"])(create_group_chat)
+chat_blueprint.route("/rooms/<int:room_id>/members", methods=["GET"])(get_room_members)
+chat_blueprint.route("/rooms/<int:room_id>/members", methods=["POST"])(add_room_members)
+chat_blueprint.route("/rooms/<int:room_id>/members/<int:member_id>", methods=["DELETE"])(remove_room_member)
+chat_blueprint.route("/rooms/<int:room_id>/read", methods=["POST"])(mark_read)
+chat_blueprint.route("/unread", methods=["GET"])(get_unread_counts)
 
 # Message management
 chat_blueprint.route("/messages", methods=["GET"])(get_chat_messages)
 chat_blueprint.route("/messages", methods=["POST"])(send_message)
+chat_blueprint.route("/sync", methods=["POST"])(sync_messages)
 chat_blueprint.route("/messages/<int:message_id>", methods=["PUT"])(edit_message)
 chat_blueprint.route("/messages/<int:message_id>", methods=["DELETE"])(delete_message)
 
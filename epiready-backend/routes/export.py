@@ -0,0 +1,6 @@
+from flask import Blueprint
+from controllers.export import export_shipment_data, export_organization_data
+
+export_blueprint = Blueprint("export", __name__)
+export_blueprint.route("/shipments/<string:shipment_id>/<dataset>", methods=["GET"])(export_shipment_data)
+export_blueprint.route("/organization/<dataset>", methods=["GET"])(export_organization_data)
@@ -0,0 +1,5 @@
+from flask import Blueprint
+from controllers.search import search
+
+search_blueprint = Blueprint("search", __name__)
+search_blueprint.route("", methods=["GET"])(search)
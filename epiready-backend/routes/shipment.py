@@ -1,12 +1,19 @@
 from flask import Blueprint
-from controllers.shipment import create_shipment, get_shipments_by_user, get_shipment_by_name, get_all_shipments, get_weather_data, update_shipment_status, set_transit_status
+from controllers.shipment import create_shipment, get_shipments_by_user, get_shipment_by_name, get_all_shipments, get_weather_data, update_shipment_status, set_transit_status, create_shipments_bulk, update_shipment_status_bulk, get_latest_weather_data, get_organization_summary, get_latest_weather_data_batch, get_shipments_nearby, get_shipments_within
 
 
 shipment_blueprint = Blueprint("shipment", __name__)
 shipment_blueprint.route("", methods=["POST"])(create_shipment)
 shipment_blueprint.route("", methods=["GET"])(get_shipments_by_user)
 shipment_blueprint.route("/all", methods=["GET"])(get_all_shipments)
+shipment_blueprint.route("/organization/summary", methods=["GET"])(get_organization_summary)
+shipment_blueprint.route("/geo/nearby", methods=["GET"])(get_shipments_nearby)
+shipment_blueprint.route("/geo/within", methods=["GET"])(get_shipments_within)
+shipment_blueprint.route("/weather/latest", methods=["GET"])(get_latest_weather_data_batch)
 shipment_blueprint.route("/<name>", methods=["GET"])(get_shipment_by_name)
 shipment_blueprint.route("/<string:shipment_id>/weather", methods=["GET"])(get_weather_data)
+shipment_blueprint.route("/<string:shipment_id>/weather/latest", methods=["GET"])(get_latest_weather_data)
 shipment_blueprint.route("/<string:shipment_id>/transit_status", methods=["POST"])(set_transit_status)
 shipment_blueprint.route("/status", methods=["PUT"])(update_shipment_status)
+shipment_blueprint.route("/bulk", methods=["POST"])(create_shipments_bulk)
+shipment_blueprint.route("/bulk/status", methods=["PUT"])(update_shipment_status_bulk)
@@ -1,5 +1,5 @@
 from flask import Blueprint
-from controllers.user import get_user, get_users_by_role, get_all_users, create_organization, join_organization, get_organization_by_id
+from controllers.user import get_user, get_users_by_role, get_all_users, create_organization, join_organization, get_organization_by_id, get_presence
 from controllers.shipment_action import get_user_action_history
 
 user_blueprint = Blueprint("users", __name__)
@@ -9,4 +9,5 @@ user_blueprint.route("/role/<role>", methods=["GET"])(get_users_by_role)
 user_blueprint.route("/<int:user_id>/actions", methods=["GET"])(get_user_action_history)
 user_blueprint.route("/create-organization", methods=["POST"])(create_organization)
 user_blueprint.route("/join-organization", methods=["POST"])(join_organization)
-user_blueprint.route("/organization", methods=["GET"])(get_organization_by_id)
\ No newline at end of file
+user_blueprint.route("/organization", methods=["GET"])(get_organization_by_id)
+user_blueprint.route("/presence", methods=["GET"])(get_presence)
\ No newline at end of file
@@ -1,29 +1,86 @@
-from controllers.alerts import start_temperature_monitor
+from controllers.alerts import start_temperature_monitor, missed_breach_alerts
+from flask import request
 from flask_socketio import join_room, emit, leave_room
-from models.chat import ChatRoom, ChatMessage
-from models.user import User
+from models.chat import ChatMessage, is_room_member, mark_room_read
+from utils.read_receipts import read_receipts
+from utils.write_behind import chat_write_behind
+from utils.user_directory import sender_emails
+from utils.presence import presence
+from utils.fanout import fanout
+from utils.replay import replay_buffer
+from utils.serialization import parse_timestamp
 from config.database import db
+from config.replicas import replica_router
 import jwt
 import os
 
+def socket_user_id(app, data):
+    """User id from the 'Bearer <jwt>' token a socket event carries, or None if there is none."""
+    token = data.get('token', '').split(" ")[1] if data and data.get('token') else None
+    if not token:
+        return None
+    return jwt.decode(token, app.secret_key, algorithms=["HS256"])['user_id']
+
+def replay_events(user_id, data):
+    """The 'replay' payload for a client that last saw data['epoch'] / data['last_seq']."""
+    events = replay_buffer.since(user_id, data.get('epoch'), int(data.get('last_seq') or 0))
+    source = 'memory'
+    if events is None:
+        # Buffer rolled over or belongs to another process: go to the alerts table
+        since = parse_timestamp(data['since']) if data.get('since') else None
+        events = [('breach_alert', payload) for payload in missed_breach_alerts(user_id, since)]
+        source = 'database'
+    
+    return {
+        'epoch': replay_buffer.epoch,
+        'last_seq': replay_buffer.last_seq(user_id),
+        'source': source,
+        'events': [{'event': event, 'data': payload} for event, payload in events]
+    }
+
+def store_chat_message(user_id, room_id, content, message_type='text'):
+    """Saves (or queues, with write-behind) a chat message and returns its payload."""
+    if chat_write_behind.enabled:
+        # Emit now; the row is written by the next batch flush
+        message = chat_write_behind.submit(int(room_id), user_id, content, message_type)
+    else:
+        message = ChatMessage(
+            chat_room_id=room_id,
+            sender_id=user_id,
+            content=content,
+            message_type=message_type
+        )
+        
+        db.session.add(message)
+        db.session.commit()
+    # Socket writes have no request user, so tell the replica router directly
+    replica_router.note_write(user_id)
+    return message.to_dict(senders=sender_emails([user_id]))
+
+def record_read(user_id, room_id, message_id):
+    """Moves the read cursor and queues a receipt if it moved."""
+    cursor = mark_room_read(user_id, int(room_id), message_id)
+    if cursor is not None:
+        db.session.commit()
+        replica_router.note_write(user_id)
+        read_receipts.add(int(room_id), user_id, cursor)
+
 def register_socketio_events(socketio, app, mail):
     
-    if os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+    if os.environ.get("WERKZEUG_RUN_MAIN") != "true" or os.getenv("SERVER_MODE") == "asgi":
         return
     
     @socketio.on('connect')
     def handle_connect(auth):
-        token = auth.get('token').split(" ")[1] if auth else None
-
-        if not token:
-            print("No token provided on socket connection.")
-            return False
- 
         try:
-            data = jwt.decode(token, app.secret_key, algorithms=["HS256"])
-            user_id = data['user_id']
+            user_id = socket_user_id(app, auth)
+            if not user_id:
+                print("No token provided on socket connection.")
+                return False
+ 
             print(f"Socket connected for user {user_id}")
             join_room(str(user_id))
+            presence.connect(user_id, request.sid)
 
         except jwt.ExpiredSignatureError:
             print("Token expired")
@@ -32,36 +89,56 @@ def register_socketio_events(socketio, app, mail):
             print("Invalid token")
             return False
     
+    @socketio.on('disconnect')
+    def handle_disconnect(*args):
+        try:
+            fanout.forget(request.sid)
+            user_id = presence.disconnect(request.sid)
+            print(f"Socket disconnected for user {user_id}")
+        except Exception as e:
+            print(f"Error recording disconnect: {e}")
+    
+    @socketio.on('heartbeat')
+    def handle_heartbeat(*args):
+        """Optional client keep-alive; returns False if the socket isn't known"""
+        try:
+            return presence.heartbeat(request.sid)
+        except Exception as e:
+            print(f"Error recording heartbeat: {e}")
+            return False
+    
+    @socketio.on('replay')
+    def handle_replay(data):
+        """
+        Replays the events a reconnecting client missed. The client sends the
+        epoch and seq of the last event it saw (both are on every replayable
+        payload) and, for the database fallback, that event's timestamp.
+        """
+        try:
+            user_id = socket_user_id(app, data)
+            if not user_id:
+                return False
+            
+            emit('replay', replay_events(user_id, data))
+            
+        except Exception as e:
+            print(f"Error replaying events: {e}")
+            return False
+    
     @socketio.on('join_chat_room')
     def handle_join_chat_room(data):
         """Join a specific chat room for real-time messaging"""
         try:
-            token = data.get('token', '').split(" ")[1] if data.get('token') else None
-            if not token:
+            user_id = socket_user_id(app, data)
+            if not user_id:
                 return False
-            
-            jwt_data = jwt.decode(token, app.secret_key, algorithms=["HS256"])
-            user_id = jwt_data['user_id']
             room_id = data.get('room_id')
             
             if not room_id:
                 return False
             
-            # Verify user has access to this chat room
-            user = db.session.get(User, user_id)
-            chat_room = db.session.get(ChatRoom, room_id)
-            
-            if not chat_room or chat_room.organization_id != user.organization_id:
-                return False
-            
-            # Check if user is participant
-            is_participant = False
-            if chat_room.room_type == 'direct':
-                is_participant = (chat_room.participant1_id == user_id or chat_room.participant2_id == user_id)
-            elif chat_room.room_type == 'group':
-                is_participant = chat_room.participants and user_id in chat_room.participants
-            
-            if not is_participant:
+            # Verify user has access to this chat room (cached per user)
+            if not is_room_member(user_id, room_id):
                 return False
             
             join_room(f"chat_room_{room_id}")
@@ -86,12 +163,9 @@ def register_socketio_events(socketio, app, mail):
     def handle_send_message(data):
         """Handle real-time message sending"""
         try:
-            token = data.get('token', '').split(" ")[1] if data.get('token') else None
-            if not token:
+            user_id = socket_user_id(app, data)
+            if not user_id:
                 return False
-            
-            jwt_data = jwt.decode(token, app.secret_key, algorithms=["HS256"])
-            user_id = jwt_data['user_id']
             room_id = data.get('room_id')
             content = data.get('content')
             message_type = data.get('message_type', 'text')
@@ -99,36 +173,13 @@ def register_socketio_events(socketio, app, mail):
             if not room_id or not content:
                 return False
             
-            # Verify user has access to this chat room
-            user = db.session.get(User, user_id)
-            chat_room = db.session.get(ChatRoom, room_id)
-            
-            if not chat_room or chat_room.organization_id != user.organization_id:
-                return False
-            
-            # Check if user is participant
-            is_participant = False
-            if chat_room.room_type == 'direct':
-                is_participant = (chat_room.participant1_id == user_id or chat_room.participant2_id == user_id)
-            elif chat_room.room_type == 'group':
-                is_participant = chat_room.participants and user_id in chat_room.participants
-            
-            if not is_participant:
+            # Verify user has access to this chat room (cached per user)
+            if not is_room_member(user_id, room_id):
                 return False
             
-            # Create and save message
-            message = ChatMessage(
-                chat_room_id=room_id,
-                sender_id=user_id,
-                content=content,
-                message_type=message_type
-            )
-            
-            db.session.add(message)
-            db.session.commit()
+            message_data = store_chat_message(user_id, room_id, content, message_type)
             
             # Emit message to all users in the chat room
-            message_data = message.to_dict()
             socketio.emit('new_message', message_data, room=f"chat_room_{room_id}")
             
             print(f"Message sent in room {room_id} by user {user_id}")
@@ -137,4 +188,31 @@ def register_socketio_events(socketio, app, mail):
             print(f"Error sending message: {e}")
             return False
         
+    @socketio.on('mark_read')
+    def handle_mark_read(data):
+        """Move the sender's read cursor; receipts go out coalesced per room"""
+        try:
+            user_id = socket_user_id(app, data)
+            if not user_id:
+                return False
+            room_id = data.get('room_id')
+            message_id = data.get('message_id')
+            
+            if not room_id or not isinstance(message_id, int):
+                return False
+            
+            if not is_room_member(user_id, room_id):
+                return False
+            
+            record_read(user_id, room_id, message_id)
+            
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error marking messages read: {e}")
+            return False
+    
+    read_receipts.start(socketio)
+    chat_write_behind.start(socketio, app)
+    presence.start(socketio, app)
+    fanout.start(socketio)
     socketio.start_background_task(start_temperature_monitor, socketio, app, mail)
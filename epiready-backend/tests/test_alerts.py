@@ -18,6 +18,7 @@ def _q(obj):
         def order_by(self, *a, **k):  return self
         def limit(self, *a, **k):     return self
         def offset(self, *a, **k):    return self
+        def with_entities(self, *a, **k): return self
         def all(self):   return [obj] if obj else []
         def first(self): return obj
         def get(self, _): return obj
@@ -104,7 +105,7 @@ def test_get_alerts_success(monkeypatch, client):
         name = "Test Shipment"
     class Al:
         shipment_id = 1
-        def to_dict(self): return {"id":1,"shipment_id":1,"type":"temp","status":"active", "active": "true"}
+        _mapping = {"id":1,"shipment_id":1,"type":"temp","status":"active", "active": "true"}
     for mod in (ship_m, a_ctrl):
         monkeypatch.setattr(mod.Shipment, "query", _q(S()), raising=False)
     for mod in (alert_m, a_ctrl):
@@ -212,7 +213,7 @@ def test_get_shipment_alerts_success(monkeypatch, client):
     import models.shipment as ship_m, models.alert as alert_m, controllers.alerts as a_ctrl
     class S: id=1; user_id=1
     class Al:
-        def to_dict(self): return {"id":1,"type":"temp","status":"active"}
+        _mapping = {"id":1,"type":"temp","status":"active"}
     for mod in (ship_m, a_ctrl):
         monkeypatch.setattr(mod.Shipment, "query", _q(S()), raising=False)
     for mod in (alert_m, a_ctrl):
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import pytest
+from config.async_database import async_database_url
+from utils.async_bridge import AsyncSocketIOBridge
+
+
+class FakeAsyncServer:
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data=None, to=None, namespace='/'):
+        self.emitted.append((event, data, to, threading.current_thread()))
+
+
+def test_emit_from_worker_thread_runs_on_event_loop():
+    server = FakeAsyncServer()
+
+    async def main():
+        bridge = AsyncSocketIOBridge(server, asyncio.get_running_loop())
+        future = await asyncio.to_thread(bridge.emit, 'temperature_alert', {'reading': 1}, room='7')
+        await asyncio.wrap_future(future)
+        bridge.emit('breach_alert', {}, to='sid-1')
+        await asyncio.sleep(0)
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(main())
+    assert [(e[0], e[2]) for e in server.emitted] == [('temperature_alert', '7'), ('breach_alert', 'sid-1')]
+    assert all(e[3] is loop_thread for e in server.emitted)
+
+
+def test_background_task_runs_in_daemon_thread():
+    bridge = AsyncSocketIOBridge(FakeAsyncServer())
+    done = threading.Event()
+    thread = bridge.start_background_task(done.set)
+    thread.join(1)
+    assert done.is_set() and thread.daemon
+
+
+def test_async_database_url():
+    url = async_database_url('postgresql://app:secret@db:5432/epiready?sslmode=require')
+    assert url.drivername == 'postgresql+asyncpg'
+    assert url.query == {'ssl': 'require'}
+    assert url.database == 'epiready' and url.password == 'secret'
+    with pytest.raises(ValueError):
+        async_database_url('sqlite:///:memory:')
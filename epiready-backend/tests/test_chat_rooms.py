@@ -0,0 +1,317 @@
+import pytest
+from flask import Flask
+from config.database import db
+from utils.serialization import init_json
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        from controllers.chat import (
+            get_user_chat_rooms, get_chat_messages, add_room_members, remove_room_member, get_unread_counts, mark_read,
+            sync_messages
+        )
+        from models.chat import room_membership_cache
+        room_membership_cache.clear()
+        app.add_url_rule('/chat/rooms', view_func=get_user_chat_rooms, methods=['GET'])
+        app.add_url_rule('/chat/messages', view_func=get_chat_messages, methods=['GET'])
+        app.add_url_rule('/chat/rooms/<int:room_id>/members', view_func=add_room_members, methods=['POST'])
+        app.add_url_rule('/chat/sync', view_func=sync_messages, methods=['POST'])
+        app.add_url_rule('/chat/unread', view_func=get_unread_counts, methods=['GET'])
+        app.add_url_rule('/chat/rooms/<int:room_id>/read', view_func=mark_read, methods=['POST'])
+        app.add_url_rule('/chat/rooms/<int:room_id>/members/<int:member_id>', view_func=remove_room_member, methods=['DELETE'])
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    from models import User, Organization, ChatRoom, ChatMessage
+    db.session.add(Organization(id=1, name='Org', join_code='JOIN'))
+    for uid in (1, 2, 3, 4):
+        db.session.add(User(id=uid, email=f'u{uid}@test.local', password_hash='x', organization_id=1))
+    direct = ChatRoom(id=1, room_type='direct', organization_id=1, created_by=1, participant1_id=1, participant2_id=2)
+    group = ChatRoom(id=2, room_type='group', name='Ops', organization_id=1, created_by=2, participants=[2, 3, 1])
+    other = ChatRoom(id=3, room_type='group', name='Other', organization_id=1, created_by=2, participants=[2, 3])
+    db.session.add_all([direct, group, other])
+    db.session.commit()
+    db.session.add_all([
+        ChatMessage(chat_room_id=1, sender_id=1, content='hello'),
+        ChatMessage(chat_room_id=1, sender_id=2, content='hi there'),
+        ChatMessage(chat_room_id=3, sender_id=2, content='not for user 1'),
+    ])
+    db.session.commit()
+
+
+def test_rooms_filtered_in_sql_with_summary(client, app):
+    with app.app_context():
+        _seed()
+    r = client.get('/chat/rooms')
+    assert r.status_code == 200
+    rooms = {room['id']: room for room in r.get_json()}
+    assert set(rooms) == {1, 2}
+    assert rooms[1]['message_count'] == 2
+    assert rooms[1]['last_message']['preview'] == 'hi there'
+    assert rooms[2]['message_count'] == 0 and rooms[2]['last_message'] is None
+
+
+def test_summary_tracks_edit_and_delete(app):
+    from models import ChatMessage, ChatRoomSummary
+    with app.app_context():
+        _seed()
+        last = ChatMessage.query.filter_by(chat_room_id=1).order_by(ChatMessage.id.desc()).first()
+        last.content = 'edited'
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(ChatRoomSummary, 1).last_message_preview == 'edited'
+
+        last.is_deleted = True
+        db.session.commit()
+        db.session.expire_all()
+        summary = db.session.get(ChatRoomSummary, 1)
+        assert summary.message_count == 1
+        assert summary.last_message_preview == 'hello'
+
+
+def test_rooms_etag_changes_with_new_message(client, app):
+    from models import ChatMessage
+    with app.app_context():
+        _seed()
+    etag = client.get('/chat/rooms').headers['ETag']
+    assert client.get('/chat/rooms', headers={'If-None-Match': etag}).status_code == 304
+    with app.app_context():
+        db.session.add(ChatMessage(chat_room_id=2, sender_id=1, content='new'))
+        db.session.commit()
+    assert client.get('/chat/rooms', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_members_backfilled_from_room_columns(app):
+    from models import ChatRoomMember
+    with app.app_context():
+        _seed()
+        pairs = {(m.room_id, m.user_id) for m in ChatRoomMember.query.all()}
+    assert pairs == {(1, 1), (1, 2), (2, 2), (2, 3), (2, 1), (3, 2), (3, 3)}
+
+
+def test_add_and_remove_members(client, app):
+    from models import ChatRoom
+    with app.app_context():
+        _seed()
+    # Authenticated as user 1 (token_required in TESTING); not a member of room 3
+    assert client.get('/chat/messages?room_id=3').status_code == 403
+    assert client.post('/chat/rooms/3/members', json={'user_ids': [1]}).status_code == 403
+
+    r = client.post('/chat/rooms/2/members', json={'user_ids': [4, 3]})
+    assert r.status_code == 200
+    assert r.get_json()['added'] == [4]
+    with app.app_context():
+        assert db.session.get(ChatRoom, 2).participants == [2, 3, 1, 4]
+
+    # Only the creator (user 2) may remove others; leaving is always allowed
+    assert client.delete('/chat/rooms/2/members/4').status_code == 403
+    assert client.delete('/chat/rooms/2/members/1').status_code == 200
+    assert client.get('/chat/messages?room_id=2').status_code == 403
+    assert [room['id'] for room in client.get('/chat/rooms').get_json()] == [1]
+
+
+def test_membership_changes_apply_on_commit(app, monkeypatch):
+    from models import ChatRoomMember
+    from models import chat as chat_models
+    left = []
+    monkeypatch.setattr(chat_models.fanout, 'leave', lambda user_room, room: left.append((user_room, room)))
+    with app.app_context():
+        _seed()
+        assert 2 in chat_models.user_room_ids(1)
+
+        db.session.delete(db.session.get(ChatRoomMember, (2, 1)))
+        db.session.flush()
+        db.session.rollback()
+        # Rolled back: nothing to invalidate and nobody to disconnect
+        db.session.commit()
+        assert 2 in chat_models.user_room_ids(1) and left == []
+
+        db.session.delete(db.session.get(ChatRoomMember, (2, 1)))
+        db.session.flush()
+        assert left == []
+        db.session.commit()
+        assert 2 not in chat_models.user_room_ids(1)
+        assert left == [('1', 'chat_room_2')]
+
+
+def test_add_members_rejects_other_organization(client, app):
+    from models import User
+    with app.app_context():
+        _seed()
+        db.session.add(User(id=9, email='x@test.local', password_hash='x', organization_id=None))
+        db.session.commit()
+    r = client.post('/chat/rooms/2/members', json={'user_ids': [9]})
+    assert r.status_code == 400
+
+
+def test_unread_counts_and_mark_read(client, app):
+    from models import ChatMessage
+    with app.app_context():
+        _seed()
+        db.session.add(ChatMessage(chat_room_id=2, sender_id=3, content='group hello'))
+        db.session.commit()
+
+    body = client.get('/chat/unread').get_json()
+    # User 1's own message in room 1 is not unread
+    assert {r['room_id']: r['unread_count'] for r in body['rooms']} == {1: 1, 2: 1}
+    assert body['total'] == 2
+
+    r = client.post('/chat/rooms/1/read', json={})
+    assert r.status_code == 200 and r.get_json()['last_read_message_id'] == 2
+    # The cursor never moves backwards
+    assert client.post('/chat/rooms/1/read', json={'message_id': 1}).get_json()['last_read_message_id'] == 2
+    assert client.post('/chat/rooms/3/read', json={}).status_code == 403
+    # Ids past the room's last message (or the column's range) stop at it
+    r = client.post('/chat/rooms/2/read', json={'message_id': 2**31})
+    assert r.status_code == 200 and r.get_json()['last_read_message_id'] == 4
+
+    body = client.get('/chat/unread').get_json()
+    assert {r['room_id']: r['unread_count'] for r in body['rooms']} == {1: 0, 2: 0}
+
+    with app.app_context():
+        db.session.add(ChatMessage(chat_room_id=2, sender_id=3, content='later'))
+        db.session.commit()
+    body = client.get('/chat/unread').get_json()
+    assert {r['room_id']: r['unread_count'] for r in body['rooms']} == {1: 0, 2: 1}
+
+
+def test_read_receipts_coalesced_per_room():
+    from utils.read_receipts import ReadReceiptCoalescer
+
+    class FakeSocketIO:
+        def __init__(self):
+            self.emitted = []
+
+        def emit(self, event, data, room=None):
+            self.emitted.append((event, data, room))
+
+    socketio = FakeSocketIO()
+    coalescer = ReadReceiptCoalescer(interval=60)
+    coalescer._socketio = socketio
+    for message_id in (5, 9, 7):
+        coalescer.add(1, 10, message_id)
+    coalescer.add(1, 11, 3)
+    coalescer.flush()
+    coalescer.flush()
+
+    assert len(socketio.emitted) == 1
+    event, data, room = socketio.emitted[0]
+    assert event == 'read_receipts' and room == 'chat_room_1'
+    assert {r['user_id']: r['last_read_message_id'] for r in data['receipts']} == {10: 9, 11: 3}
+
+
+def test_sync_returns_only_changes_past_watermark(client, app):
+    from models import ChatMessage
+    with app.app_context():
+        _seed()
+
+    first = client.post('/chat/sync', json={'rooms': [{'room_id': 1}, {'room_id': 3}]}).get_json()
+    assert first['denied'] == [3]
+    room = first['rooms'][0]
+    assert [m['content'] for m in room['messages']] == ['hello', 'hi there']
+    watermark = room['watermark']
+    assert watermark['after_id'] == 2
+
+    # Nothing changed: nothing comes back
+    again = client.post('/chat/sync', json={'rooms': [dict(watermark, room_id=1)]}).get_json()['rooms'][0]
+    assert again['messages'] == [] and again['tombstones'] == []
+
+    with app.app_context():
+        db.session.get(ChatMessage, 1).content = 'hello (edited)'
+        db.session.get(ChatMessage, 2).is_deleted = True
+        db.session.add(ChatMessage(chat_room_id=1, sender_id=2, content='new one'))
+        db.session.commit()
+
+    delta = client.post('/chat/sync', json={'rooms': [dict(watermark, room_id=1)]}).get_json()['rooms'][0]
+    assert sorted(m['content'] for m in delta['messages']) == ['hello (edited)', 'new one']
+    assert [t['id'] for t in delta['tombstones']] == [2]
+    again = client.post('/chat/sync', json={'rooms': [dict(delta['watermark'], room_id=1)]}).get_json()['rooms'][0]
+    assert again['messages'] == [] and again['tombstones'] == []
+
+
+def test_sync_pages_with_limit(client, app):
+    with app.app_context():
+        _seed()
+    page = client.post('/chat/sync', json={'rooms': [{'room_id': 1}], 'limit': 1}).get_json()['rooms'][0]
+    assert len(page['messages']) == 1 and page['has_more'] is True
+    assert client.post('/chat/sync', json={'rooms': 'all'}).status_code == 400
+
+
+def test_sync_pages_resume_at_keyset(client, app):
+    from datetime import datetime
+    from models import ChatMessage
+    with app.app_context():
+        _seed()
+        # A new message sorts before two edits sharing one updated_at
+        db.session.add(ChatMessage(chat_room_id=1, sender_id=2, content='new'))
+        db.session.commit()
+        for message_id, minute in ((4, 1), (1, 2), (2, 2)):
+            db.session.get(ChatMessage, message_id).updated_at = datetime(2030, 1, 1, 0, minute)
+        db.session.commit()
+
+    seen, watermark = [], {'since': '2029-01-01T00:00:00'}
+    while True:
+        page = client.post('/chat/sync', json={'rooms': [dict(watermark, room_id=1)], 'limit': 2}).get_json()['rooms'][0]
+        seen += [m['id'] for m in page['messages']]
+        watermark = page['watermark']
+        if not page['has_more']:
+            break
+    assert seen == [4, 1, 2]
+    assert watermark['after_id'] == 2
+
+
+def test_messages_with_sender_table(client, app):
+    with app.app_context():
+        _seed()
+    body = client.get('/chat/messages?room_id=1&senders=table').get_json()
+    assert [m['sender_id'] for m in body['messages']] == [1, 2]
+    assert 'sender_email' not in body['messages'][0]
+    assert body['senders'] == {
+        '1': {'id': 1, 'email': 'u1@test.local', 'role': 'manufacturer'},
+        '2': {'id': 2, 'email': 'u2@test.local', 'role': 'manufacturer'},
+    }
+    # Default shape is unchanged
+    assert client.get('/chat/messages?room_id=1').get_json()[0]['sender_email'] == 'u1@test.local'
+
+
+def test_user_directory_loads_each_user_once(app):
+    from sqlalchemy import event
+    from utils.user_directory import get_users, sender_emails
+    with app.app_context():
+        _seed()
+    statements = []
+    with app.test_request_context():
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            assert sender_emails([1, 2]) == {1: 'u1@test.local', 2: 'u2@test.local'}
+            get_users([2, 1])
+            assert get_users([1, 99]) == {1: get_users([1])[1], 99: None}
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    assert len(statements) == 2
@@ -0,0 +1,36 @@
+import threading
+from sqlalchemy import create_engine
+import config.database as database
+from config.database import engine_options, pool_metrics, wait_for_pool, watch_pool
+
+
+def test_engine_options_from_environment(monkeypatch):
+    monkeypatch.setattr(database, 'DB_POOL_SIZE', 4)
+    monkeypatch.setattr(database, 'DB_STATEMENT_TIMEOUT_MS', 5000)
+    options = engine_options('postgresql://app@db/epiready')
+    assert options['pool_size'] == 4 and options['pool_pre_ping']
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+
+    # PgBouncer transaction mode can't take startup options
+    monkeypatch.setattr(database, 'DB_PGBOUNCER', 'transaction')
+    assert 'connect_args' not in engine_options('postgresql://app@db/epiready')
+
+    assert engine_options('sqlite:///:memory:') == {'pool_pre_ping': True}
+
+
+def test_pool_metrics_and_guard(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2, max_overflow=1, pool_timeout=1)
+    watch_pool(engine)
+    held = [engine.connect(), engine.connect()]
+
+    metrics = pool_metrics(engine)
+    assert metrics['checked_out'] == 2 and metrics['utilization'] == round(2 / 3, 3)
+    assert metrics['peak_checked_out'] >= 2
+
+    # One free connection is not more than the reserve of one
+    assert not wait_for_pool(reserve=1, timeout=0.1, engine=engine)
+
+    threading.Timer(0.1, held.pop().close).start()
+    assert wait_for_pool(reserve=1, timeout=2, engine=engine)
+    for connection in held:
+        connection.close()
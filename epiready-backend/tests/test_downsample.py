@@ -0,0 +1,103 @@
+import math
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from config.database import db
+from utils.downsample import LTTBDownsampler
+from utils.serialization import init_json
+import pkgutil, importlib, models
+
+
+def _run(points, threshold):
+    sampler = LTTBDownsampler(len(points), threshold)
+    selected = []
+    for x, y in points:
+        selected.extend(sampler.add(x, y, (x, y)))
+    selected.extend(sampler.finish())
+    return selected
+
+
+def test_lttb_passthrough_when_under_threshold():
+    points = [(i, i * 2) for i in range(10)]
+    assert _run(points, 20) == points
+
+
+def test_lttb_keeps_endpoints_and_threshold():
+    points = [(i, math.sin(i / 10)) for i in range(1000)]
+    selected = _run(points, 50)
+    assert len(selected) == 50
+    assert selected[0] == points[0] and selected[-1] == points[-1]
+    assert [p[0] for p in selected] == sorted(p[0] for p in selected)
+
+
+def test_lttb_keeps_spike():
+    points = [(i, 0.0) for i in range(500)]
+    points[250] = (250, 100.0)
+    assert (250, 100.0) in _run(points, 10)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        from controllers.shipment import get_weather_data
+        app.add_url_rule('/shipments/<string:shipment_id>/weather', view_func=get_weather_data, methods=['GET'])
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed(count):
+    from models import User, Shipment, WeatherData
+    db.session.add(User(id=1, email='m@test.local', password_hash='x', role='manufacturer'))
+    db.session.add(Shipment(
+        id='s1', name='Box', user_id=1, product_type='A', origin='x', destination='y',
+        min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+        transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status='active'
+    ))
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        db.session.add(WeatherData(
+            shipment_id='s1', user_id=1, internal_temp=5 + math.sin(i / 7), external_temp=20,
+            humidity=50 + (i % 13), timestamp=start + timedelta(minutes=i)
+        ))
+    db.session.commit()
+
+
+def test_weather_downsampled_range(client, app):
+    with app.app_context():
+        _seed(400)
+    r = client.get('/shipments/s1/weather?from=2025-01-01T00:00:00Z&to=2025-01-02T00:00:00Z&max_points=40')
+    assert r.status_code == 200
+    body = r.get_json()
+    assert len(body['temperature']) == 40 and len(body['humidity']) == 40
+    assert body['downsampled']['source_points'] == 400
+    # Newest first, like the undownsampled response
+    assert body['temperature'][0]['timestamp'] > body['temperature'][-1]['timestamp']
+    assert body['all'][0]['id'] > body['all'][-1]['id']
+
+
+def test_weather_downsampled_bad_timestamp(client, app):
+    with app.app_context():
+        _seed(1)
+    r = client.get('/shipments/s1/weather?from=yesterday')
+    assert r.status_code == 400
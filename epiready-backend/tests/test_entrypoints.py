@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code, **env):
+    """Imports an entry point in a fresh interpreter, so patching and SERVER_MODE don't leak into the test run."""
+    env = dict({key: value for key, value in os.environ.items() if key != 'SERVER_MODE'},
+               DATABASE_URL='sqlite:///:memory:', DB_CREATE_ALL='false', **env)
+    return subprocess.run([sys.executable, '-c', code], cwd=BACKEND, env=env, capture_output=True, text=True, timeout=60)
+
+
+def test_eventlet_background_task_runs():
+    # The monitor and the fanout/presence loops are background tasks; they
+    # must run while the main thread is busy elsewhere
+    result = _run(
+        "import time\n"
+        "from app import socketio\n"
+        "ran = []\n"
+        "socketio.start_background_task(lambda: ran.append(socketio.async_mode))\n"
+        "time.sleep(0.5)\n"
+        "print(ran)\n"
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "['eventlet']"
+
+
+def test_asgi_module_imports():
+    result = _run("import asgi\nprint(type(asgi.app).__name__, asgi.sio.async_mode)")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'ASGIApp asgi'
+
+
+def test_metrics_need_token_or_allowed_address():
+    result = _run(
+        "from app import app\n"
+        "client = app.test_client()\n"
+        "print(client.get('/metrics').status_code,\n"
+        "      client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code,\n"
+        "      client.get('/metrics', headers={'Authorization': 'Bearer s3cret'}).status_code,\n"
+        "      client.get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'}).status_code)\n",
+        METRICS_TOKEN='s3cret', METRICS_ALLOWED_IPS='10.1.2.3', CORS_ORIGIN='http://localhost:3000'
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '403 403 200 200'
@@ -0,0 +1,105 @@
+import csv
+import gzip
+import io
+import json
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from config.database import db
+from controllers import export as export_ctrl
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        app.add_url_rule('/export/shipments/<string:shipment_id>/<dataset>',
+                         view_func=export_ctrl.export_shipment_data, methods=['GET'])
+        app.add_url_rule('/export/organization/<dataset>',
+                         view_func=export_ctrl.export_organization_data, methods=['GET'])
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed(role='manufacturer', readings=5):
+    from models import User, Shipment, WeatherData, Organization, ShipmentAction
+    db.session.add(Organization(id=1, name='Org', join_code='CODE'))
+    db.session.add(User(id=1, email='m@test.local', password_hash='x', role=role, organization_id=1))
+    db.session.add(Shipment(
+        id='s1', name='Box', user_id=1, product_type='A', origin='x', destination='y',
+        min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+        transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status='active',
+        organization_id=1
+    ))
+    start = datetime(2025, 1, 1)
+    for i in range(readings):
+        db.session.add(WeatherData(shipment_id='s1', user_id=1, internal_temp=4.0 + i,
+                                   humidity=50.0, timestamp=start + timedelta(minutes=i)))
+    db.session.add(ShipmentAction(shipment_id='s1', user_id=1, action_type='note',
+                                  description='checked', action_metadata={'k': 'v'}))
+    db.session.commit()
+
+
+def test_export_weather_ndjson(client, app):
+    with app.app_context():
+        _seed(readings=3000)
+    r = client.get('/export/shipments/s1/weather')
+    assert r.status_code == 200
+    assert r.mimetype == 'application/x-ndjson'
+    lines = r.data.decode().splitlines()
+    assert len(lines) == 3000
+    first = json.loads(lines[0])
+    assert first['internal_temp'] == 4.0 and first['timestamp'] == '2025-01-01T00:00:00'
+
+
+def test_export_actions_csv_gzip(client, app):
+    with app.app_context():
+        _seed()
+    r = client.get('/export/shipments/s1/actions?format=csv&gzip=true')
+    assert r.status_code == 200
+    assert 'actions-s1.csv.gz' in r.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(r.data).decode())))
+    assert len(rows) == 1
+    assert rows[0]['description'] == 'checked' and json.loads(rows[0]['action_metadata']) == {'k': 'v'}
+
+
+def test_export_unknown_dataset(client, app):
+    with app.app_context():
+        _seed()
+    r = client.get('/export/shipments/s1/passwords')
+    assert r.status_code == 400
+
+
+def test_export_organization_requires_manager(client, app):
+    with app.app_context():
+        _seed(role='manufacturer')
+    r = client.get('/export/organization/weather')
+    assert r.status_code == 403
+
+
+def test_export_organization_weather(client, app):
+    with app.app_context():
+        _seed(role='transporter_manager', readings=4)
+    r = client.get('/export/organization/weather?format=csv')
+    assert r.status_code == 200
+    assert len(r.data.decode().splitlines()) == 5
@@ -0,0 +1,102 @@
+from utils.fanout import Fanout
+
+
+class FakeQueue:
+    def __init__(self):
+        self.depth = 0
+
+    def qsize(self):
+        return self.depth
+
+
+class FakeEioSocket:
+    def __init__(self):
+        self.queue = FakeQueue()
+        self.closed = False
+
+
+class FakeSocketIO:
+    """Just enough of flask_socketio.SocketIO for Fanout: rooms, sids and transport queues."""
+
+    def __init__(self, rooms):
+        self.rooms = rooms
+        self.emitted = []
+        eio_sockets = {eio: FakeEioSocket() for members in rooms.values() for _, eio in members}
+        manager = type('Manager', (), {
+            'get_participants': lambda _, ns, room: iter(rooms.get(room, [])),
+            'eio_sid_from_sid': lambda _, sid, ns: next(
+                (eio for members in rooms.values() for s, eio in members if s == sid), None
+            ),
+            'basic_leave_room': lambda _, sid, ns, room: rooms.__setitem__(
+                room, [member for member in rooms.get(room, []) if member[0] != sid]
+            ),
+        })()
+        self.server = type('Server', (), {'manager': manager, 'eio': type('Eio', (), {'sockets': eio_sockets})()})()
+
+    def emit(self, event, data, room=None, to=None):
+        self.emitted.append((event, data, room or to))
+
+
+def _fanout(policy='coalesce', max_pending=3):
+    socketio = FakeSocketIO({'1': [('fast', 'e-fast'), ('slow', 'e-slow')]})
+    fanout = Fanout(max_transport_depth=2, max_pending=max_pending, policy=policy)
+    fanout.socketio = socketio
+    socketio.server.eio.sockets['e-slow'].queue.depth = 5
+    return fanout, socketio
+
+
+def test_fast_consumer_gets_everything_slow_one_is_coalesced():
+    fanout, socketio = _fanout()
+    for reading in range(4):
+        fanout.emit('temperature_alert', {'shipment': 's1', 'reading': reading}, room='1', key='s1')
+    fanout.emit('temperature_alert', {'shipment': 's2', 'reading': 0}, room='1', key='s2')
+
+    assert len([e for e in socketio.emitted if e[2] == 'fast']) == 5
+    assert not [e for e in socketio.emitted if e[2] == 'slow']
+    metrics = fanout.metrics()
+    assert metrics['pending_frames'] == 2 and metrics['coalesced'] == 3
+
+    # Slow client catches up: only the latest reading per shipment is sent
+    socketio.server.eio.sockets['e-slow'].queue.depth = 0
+    fanout.drain()
+    sent = [e[1] for e in socketio.emitted if e[2] == 'slow']
+    assert sent == [{'shipment': 's1', 'reading': 3}, {'shipment': 's2', 'reading': 0}]
+    assert fanout.metrics()['slow_connections'] == 0
+
+
+def test_drop_oldest_bounds_backlog():
+    fanout, socketio = _fanout(policy='drop-oldest', max_pending=2)
+    for reading in range(5):
+        fanout.emit('temperature_alert', {'reading': reading}, room='1', key='s1')
+    assert fanout.metrics()['dropped'] == 3
+
+    socketio.server.eio.sockets['e-slow'].queue.depth = 0
+    fanout.drain()
+    assert [e[1]['reading'] for e in socketio.emitted if e[2] == 'slow'] == [3, 4]
+
+
+def test_priority_events_bypass_backpressure():
+    fanout, socketio = _fanout()
+    fanout.emit('breach_alert', {'message': 'breach'}, room='1', priority=True)
+    assert socketio.emitted == [('breach_alert', {'message': 'breach'}, '1')]
+    assert fanout.metrics()['priority'] == 1
+
+
+def test_disconnected_backlog_is_discarded():
+    fanout, socketio = _fanout()
+    fanout.emit('temperature_alert', {'reading': 1}, room='1', key='s1')
+    socketio.server.eio.sockets['e-slow'].closed = True
+    fanout.drain()
+    metrics = fanout.metrics()
+    assert metrics['discarded'] == 1 and metrics['pending_frames'] == 0
+
+
+def test_leave_takes_user_sockets_out_of_room():
+    socketio = FakeSocketIO({
+        '1': [('a', 'e-a'), ('b', 'e-b')],
+        'chat_room_2': [('a', 'e-a'), ('b', 'e-b'), ('c', 'e-c')],
+    })
+    fanout = Fanout()
+    fanout.socketio = socketio
+    fanout.leave('1', 'chat_room_2')
+    assert socketio.rooms['chat_room_2'] == [('c', 'e-c')]
@@ -0,0 +1,134 @@
+import pytest
+from flask import Flask
+from config.database import db
+from controllers import shipment as ship_ctrl
+from utils.serialization import init_json
+from utils.geo import encode, cover, bounding_box, distance_km, parse_coordinates
+import pkgutil, importlib, models
+
+TORONTO = (43.6532, -79.3832)
+HAMILTON = (43.2557, -79.8711)   # ~58 km from Toronto
+OSHAWA = (43.8971, -78.8658)     # ~48 km
+MONTREAL = (45.5019, -73.5674)   # ~505 km
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        app.add_url_rule('/shipments/geo/nearby', view_func=ship_ctrl.get_shipments_nearby, methods=['GET'])
+        app.add_url_rule('/shipments/geo/within', view_func=ship_ctrl.get_shipments_within, methods=['GET'])
+        app.add_url_rule('/shipments/<string:shipment_id>/transit_status',
+                         view_func=ship_ctrl.set_transit_status, methods=['POST'])
+
+        from models import User, Organization
+        db.session.add(Organization(id=1, name='Org', join_code='A'))
+        db.session.add(User(id=1, email='boss@test.local', password_hash='x', role='transporter_manager', organization_id=1))
+        db.session.add(User(id=2, email='other@test.local', password_hash='x', role='manufacturer', organization_id=2))
+        db.session.add_all([
+            _shipment('toronto', current_location=f'{TORONTO[0]}, {TORONTO[1]}'),
+            _shipment('hamilton', latitude=HAMILTON[0], longitude=HAMILTON[1]),
+            _shipment('oshawa', latitude=OSHAWA[0], longitude=OSHAWA[1], status='completed'),
+            _shipment('montreal', latitude=MONTREAL[0], longitude=MONTREAL[1]),
+            _shipment('elsewhere', user_id=2, organization_id=2, latitude=TORONTO[0], longitude=TORONTO[1]),
+            _shipment('unknown', current_location='Waiting for loading'),
+        ])
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _shipment(shipment_id, user_id=1, organization_id=1, status='active', **position):
+    from models import Shipment
+    return Shipment(
+        id=shipment_id, name=shipment_id, user_id=user_id, organization_id=organization_id, product_type='A',
+        origin='x', destination='y', min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+        transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status=status, **position
+    )
+
+
+def test_geohash_and_distance():
+    assert encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert parse_coordinates('43.65, -79.38') == (43.65, -79.38)
+    assert parse_coordinates('Waiting for loading') is None and parse_coordinates('91 0') is None
+    assert 55 < distance_km(*TORONTO, *HAMILTON) < 60
+
+
+def test_cover_contains_every_point_in_box():
+    box = bounding_box(*TORONTO, 60)
+    prefixes = cover(*box)
+    assert 0 < len(prefixes) <= 32
+    min_lat, min_lon, max_lat, max_lon = box
+    for i in range(11):
+        for j in range(11):
+            point = encode(min_lat + (max_lat - min_lat) * i / 10, min_lon + (max_lon - min_lon) * j / 10)
+            assert any(point.startswith(prefix) for prefix in prefixes)
+
+    # Across the antimeridian
+    prefixes = cover(-10, 179, 10, -179)
+    assert any(encode(0, 179.5).startswith(p) for p in prefixes) and any(encode(0, -179.5).startswith(p) for p in prefixes)
+
+
+def test_nearby_orders_by_distance_and_scopes(client):
+    res = client.get(f'/shipments/geo/nearby?lat={TORONTO[0]}&lon={TORONTO[1]}&radius_km=60')
+    assert res.status_code == 200
+    shipments = res.get_json()['shipments']
+    # Montreal is out of range and 'elsewhere' is another organization's
+    assert [s['id'] for s in shipments] == ['toronto', 'oshawa', 'hamilton']
+    assert shipments[0]['distance_km'] == 0
+
+    active = client.get(f'/shipments/geo/nearby?lat={TORONTO[0]}&lon={TORONTO[1]}&radius_km=60&status=active').get_json()
+    assert [s['id'] for s in active['shipments']] == ['toronto', 'hamilton']
+
+    assert client.get('/shipments/geo/nearby?lat=1&lon=2').status_code == 400
+    assert client.get('/shipments/geo/nearby?lat=95&lon=2&radius_km=5').status_code == 400
+
+
+def test_within_bounding_box(client):
+    res = client.get('/shipments/geo/within?min_lat=43&min_lon=-80&max_lat=44&max_lon=-78.5')
+    assert sorted(s['id'] for s in res.get_json()['shipments']) == ['hamilton', 'oshawa', 'toronto']
+    assert client.get('/shipments/geo/within?min_lat=44&min_lon=-80&max_lat=43&max_lon=-78').status_code == 400
+
+
+def test_transit_status_updates_position(client):
+    from models import Shipment
+    res = client.post('/shipments/hamilton/transit_status', json={'status': 'At the border', 'latitude': 45.5, 'longitude': -73.6})
+    assert res.status_code == 200 and res.get_json()['latitude'] == 45.5
+
+    # Free text keeps the last known position
+    client.post('/shipments/hamilton/transit_status', json={'status': 'Unloading'})
+    shipment = db.session.get(Shipment, 'hamilton')
+    assert shipment.current_location == 'Unloading' and shipment.geohash == encode(45.5, -73.6)
+
+    assert client.post('/shipments/hamilton/transit_status', json={'status': 'x', 'latitude': 'north'}).status_code == 400
+    assert db.session.get(Shipment, 'unknown').geohash is None
+
+
+def test_spatial_routes_leave_names_to_get_by_name():
+    from routes.shipment import shipment_blueprint
+    app = Flask(__name__)
+    app.register_blueprint(shipment_blueprint, url_prefix='/api/shipments')
+    urls = app.url_map.bind('localhost')
+    assert urls.match('/api/shipments/geo/nearby')[0] == 'shipment.get_shipments_nearby'
+    assert urls.match('/api/shipments/geo/within')[0] == 'shipment.get_shipments_within'
+    for name in ('nearby', 'within'):
+        assert urls.match(f'/api/shipments/{name}') == ('shipment.get_shipment_by_name', {'name': name})
@@ -0,0 +1,94 @@
+import pytest
+from flask import Flask
+from config.database import db
+from controllers import shipment as ship_ctrl
+from controllers import alerts as alerts_ctrl
+from utils.serialization import init_json
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        app.add_url_rule('/shipments', view_func=ship_ctrl.get_shipments_by_user, methods=['GET'])
+        app.add_url_rule('/shipments/<string:shipment_id>/weather/latest',
+                         view_func=ship_ctrl.get_latest_weather_data, methods=['GET'])
+        app.add_url_rule('/alerts', view_func=alerts_ctrl.get_alerts_for_user, methods=['GET'])
+
+        from models import User, Shipment
+        db.session.add(User(id=1, email='m@test.local', password_hash='x', role='manufacturer'))
+        db.session.add(Shipment(
+            id='s1', name='Box', user_id=1, product_type='A', origin='x', destination='y',
+            min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+            transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status='active'
+        ))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_shipments_not_modified(client, app):
+    first = client.get('/shipments')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/') and first.headers['Cache-Control'] == 'private, no-cache'
+
+    again = client.get('/shipments', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b''
+
+    # A different page is a different representation
+    assert client.get('/shipments?page=2', headers={'If-None-Match': etag}).status_code == 200
+
+    with app.app_context():
+        from models import Shipment
+        db.session.get(Shipment, 's1').status = 'completed'
+        db.session.commit()
+    changed = client.get('/shipments', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+
+
+def test_alerts_etag_changes_on_status_update(client, app):
+    with app.app_context():
+        from models import Alert
+        db.session.add(Alert(shipment_id='s1', type='temp', severity='low', message='m', status='active'))
+        db.session.commit()
+    etag = client.get('/alerts').headers['ETag']
+    assert client.get('/alerts', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        from models import Alert
+        Alert.query.first().status = 'resolved'
+        db.session.commit()
+    assert client.get('/alerts', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_latest_weather_max_age_and_not_found(client, app):
+    with app.app_context():
+        from models import WeatherData
+        db.session.add(WeatherData(shipment_id='s1', user_id=1, internal_temp=4.0))
+        db.session.commit()
+    r = client.get('/shipments/s1/weather/latest')
+    assert r.status_code == 200 and r.headers['Cache-Control'] == 'private, max-age=5'
+    missing = client.get('/shipments/nope/weather/latest')
+    assert missing.status_code == 404 and 'ETag' not in missing.headers
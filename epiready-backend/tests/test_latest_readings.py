@@ -0,0 +1,148 @@
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from config.database import db
+from controllers import shipment as ship_ctrl
+from utils.serialization import init_json
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        app.add_url_rule('/shipments/weather/latest', view_func=ship_ctrl.get_latest_weather_data_batch, methods=['GET'])
+        app.add_url_rule('/shipments/<string:shipment_id>/weather/latest',
+                         view_func=ship_ctrl.get_latest_weather_data, methods=['GET'])
+
+        from models import User, Organization
+        db.session.add_all([Organization(id=1, name='Org', join_code='A'), Organization(id=2, name='Other', join_code='B')])
+        db.session.add(User(id=1, email='m@test.local', password_hash='x', role='manufacturer', organization_id=1))
+        db.session.add(User(id=2, email='o@test.local', password_hash='x', role='manufacturer', organization_id=1))
+        db.session.add(User(id=3, email='x@test.local', password_hash='x', role='manufacturer', organization_id=2))
+        db.session.add_all([_shipment('s1', 1, 1), _shipment('s2', 1, 1), _shipment('s3', 2, 1), _shipment('s4', 3, 2)])
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _shipment(shipment_id, user_id, organization_id):
+    from models import Shipment
+    return Shipment(
+        id=shipment_id, name=f'Box {shipment_id}', user_id=user_id, organization_id=organization_id,
+        product_type='A', origin='x', destination='y', min_temp=2, max_temp=8, humidity_sensitivity='low',
+        aqi_sensitivity='low', transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status='active'
+    )
+
+
+def _reading(shipment_id, user_id, temp, minutes=0):
+    from models import WeatherData
+    return WeatherData(shipment_id=shipment_id, user_id=user_id, internal_temp=temp,
+                       timestamp=datetime(2026, 1, 1) + timedelta(minutes=minutes))
+
+
+def test_insert_keeps_latest_row(app):
+    from models import ShipmentLatestReading
+    db.session.add(_reading('s1', 1, 3.0))
+    db.session.commit()
+    db.session.add_all([_reading('s1', 1, 4.0, 1), _reading('s1', 1, 5.0, 2)])
+    db.session.commit()
+
+    latest = db.session.get(ShipmentLatestReading, 's1')
+    assert latest.internal_temp == 5.0 and latest.weather_data_id == 3
+    assert ShipmentLatestReading.query.count() == 1
+
+
+def test_single_endpoint_reads_latest_table(client):
+    db.session.add_all([_reading('s1', 1, 3.0), _reading('s1', 1, 6.5, 1)])
+    db.session.commit()
+    body = client.get('/shipments/s1/weather/latest').get_json()
+    assert body['internal_temp'] == 6.5 and body['id'] == 2 and body['shipment_id'] == 's1'
+
+
+def test_batch_endpoint_scopes_to_access(client):
+    db.session.add_all([_reading('s1', 1, 3.0), _reading('s3', 2, 7.0), _reading('s4', 3, 9.0)])
+    db.session.commit()
+
+    res = client.get('/shipments/weather/latest?ids=s1,s2,s3,s4,nope')
+    assert res.status_code == 200
+    readings = res.get_json()['readings']
+    # s3 belongs to another user, s4 to another organization
+    assert set(readings) == {'s1', 's2'}
+    assert readings['s1']['internal_temp'] == 3.0 and readings['s2'] is None
+
+    from models import User
+    db.session.get(User, 1).role = 'transporter_manager'
+    db.session.commit()
+    readings = client.get('/shipments/weather/latest?ids=s1,s3,s4').get_json()['readings']
+    assert set(readings) == {'s1', 's3'}
+
+    assert client.get('/shipments/weather/latest').status_code == 400
+    ids = ','.join(f'id{i}' for i in range(ship_ctrl.MAX_BATCH_LATEST + 1))
+    assert client.get(f'/shipments/weather/latest?ids={ids}').status_code == 400
+
+
+def test_monitor_discards_pass_when_commit_fails(app, monkeypatch):
+    from controllers import alerts
+    sent = []
+    monkeypatch.setattr(alerts, 'wait_for_pool', lambda: True)
+    monkeypatch.setattr(alerts.random, 'uniform', lambda low, high: 20.0)
+    monkeypatch.setattr(alerts, 'previous_alerts', {})
+    monkeypatch.setattr(alerts.fanout, 'emit', lambda *a, **k: sent.append(a[0]))
+    monkeypatch.setattr(alerts.replay_buffer, 'record', lambda *a: sent.append('replay'))
+    monkeypatch.setattr(alerts, 'send_breach_email', lambda *a: sent.append('email'))
+    monkeypatch.setattr(alerts.presence, 'is_online', lambda user_id: False)
+
+    def fail(readings):
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(alerts, 'record_latest_readings', fail)
+    state = {'emails_sent': 0}
+    alerts.monitor_tick(app, None, state)
+
+    # Nothing about the rolled-back pass escapes: no emits, mail or breach state
+    assert sent == [] and alerts.previous_alerts == {} and state == {'emails_sent': 0}
+
+    monkeypatch.undo()
+    monkeypatch.setattr(alerts, 'wait_for_pool', lambda: True)
+    monkeypatch.setattr(alerts.random, 'uniform', lambda low, high: 20.0)
+    monkeypatch.setattr(alerts, 'previous_alerts', {})
+    monkeypatch.setattr(alerts.fanout, 'emit', lambda *a, **k: sent.append(a[0]))
+    monkeypatch.setattr(alerts, 'send_breach_email', lambda *a: sent.append('email'))
+    monkeypatch.setattr(alerts.presence, 'is_online', lambda user_id: False)
+    alerts.monitor_tick(app, None, state)
+    assert sent.count('breach_alert') == 4 and sent.count('email') == 2
+    assert set(alerts.previous_alerts) == {'s1', 's2', 's3', 's4'}
+
+
+def test_monitor_pass_writes_readings(app, monkeypatch):
+    from controllers import alerts
+    from models import WeatherData, ShipmentLatestReading, OrganizationSummary
+    monkeypatch.setattr(alerts, 'wait_for_pool', lambda: True)
+    monkeypatch.setattr(alerts.random, 'uniform', lambda low, high: 5.0)
+    monkeypatch.setattr(alerts, 'previous_alerts', {})
+    monkeypatch.setattr(alerts.fanout, 'emit', lambda *a, **k: None)
+    alerts.monitor_tick(app, None, {'emails_sent': 0})
+
+    assert WeatherData.query.count() == 4
+    latest = db.session.get(ShipmentLatestReading, 's1')
+    assert latest.internal_temp == 5.0 and isinstance(latest.timestamp, datetime)
+    assert set(db.session.get(OrganizationSummary, 1).latest_readings) == {'s1', 's2', 's3'}
@@ -0,0 +1,154 @@
+import pytest
+from flask import Flask
+from config.database import db
+from controllers import shipment as ship_ctrl
+from utils.serialization import init_json
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        app.add_url_rule('/shipments/organization/summary', view_func=ship_ctrl.get_organization_summary, methods=['GET'])
+        app.add_url_rule('/shipments/bulk', view_func=ship_ctrl.create_shipments_bulk, methods=['POST'])
+
+        from models import User, Organization
+        db.session.add(Organization(id=1, name='Org', join_code='JOIN'))
+        db.session.add(User(id=1, email='boss@test.local', password_hash='x', role='transporter_manager', organization_id=1))
+        db.session.add(User(id=2, email='maker@test.local', password_hash='x', role='manufacturer', organization_id=1))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _shipment(shipment_id, status='active'):
+    from models import Shipment
+    return Shipment(
+        id=shipment_id, name=f'Box {shipment_id}', user_id=2, organization_id=1, product_type='A', origin='x',
+        destination='y', min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+        transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status=status
+    )
+
+
+def _counters(summary):
+    data = summary.to_dict()
+    return data['shipments'], data['active_breaches'], data['last_alert_at']
+
+
+def test_counters_follow_shipment_and_alert_changes(app):
+    from models import Alert, OrganizationSummary, Shipment
+    from models.organization_summary import rebuild_organization_summary
+
+    db.session.add_all([_shipment('s1'), _shipment('s2'), _shipment('s3', status='completed')])
+    db.session.commit()
+    db.session.add_all([
+        Alert(shipment_id='s1', type='temp', severity='high', message='hot', status='active', active=True),
+        Alert(shipment_id='s2', type='temp', severity='very high', message='hotter', status='active', active=True),
+        Alert(shipment_id='s2', type='humidity', severity='low', message='damp', status='resolved', active=True),
+    ])
+    db.session.commit()
+
+    db.session.get(Shipment, 's2').status = 'cancelled'
+    first = Alert.query.filter_by(shipment_id='s1').one()
+    first.status = 'resolved'
+    second = Alert.query.filter_by(shipment_id='s2', severity='very high').one()
+    second.severity = 'medium'
+    db.session.commit()
+
+    summary = db.session.get(OrganizationSummary, 1)
+    shipments, breaches, last_alert_at = _counters(summary)
+    assert shipments == {'active': 1, 'completed': 1, 'cancelled': 1}
+    assert breaches == {'low': 0, 'medium': 1, 'high': 0, 'very high': 0}
+    assert last_alert_at is not None
+
+    # The incremental counters agree with a full recount
+    rebuild_organization_summary(db.session.connection(), 1)
+    db.session.commit()
+    db.session.expire_all()
+    assert _counters(db.session.get(OrganizationSummary, 1))[:2] == (shipments, breaches)
+
+
+def _set_role(role):
+    from models import User
+    db.session.get(User, 1).role = role
+    db.session.commit()
+
+
+def test_bulk_insert_is_counted(client):
+    payload = [{
+        'name': f'Bulk {i}', 'product_type': 'A', 'origin': 'x', 'destination': 'y', 'min_temp': 2, 'max_temp': 8,
+        'humidity_sensitivity': 'low', 'aqi_sensitivity': 'low', 'transit_time_hrs': 1, 'risk_factor': 'low',
+        'mode_of_transport': 'air', 'status': 'completed' if i == 0 else 'active'
+    } for i in range(3)]
+    _set_role('manufacturer')
+    assert client.post('/shipments/bulk', json=payload).status_code == 201
+    _set_role('transporter_manager')
+
+    res = client.get('/shipments/organization/summary')
+    assert res.status_code == 200
+    assert res.get_json()['shipments'] == {'active': 2, 'completed': 1, 'cancelled': 0}
+
+
+def test_readings_are_dropped_when_shipment_leaves_active(app):
+    from models import OrganizationSummary, Shipment
+    from models.organization_summary import record_latest_readings
+
+    db.session.add_all([_shipment('s1'), _shipment('s2')])
+    db.session.commit()
+    record_latest_readings({1: {'s1': {'internal_temperature': 4.2}, 's2': {'internal_temperature': 9.1}}})
+    db.session.commit()
+
+    db.session.get(Shipment, 's2').status = 'completed'
+    db.session.commit()
+    db.session.expire_all()
+    summary = db.session.get(OrganizationSummary, 1)
+    assert summary.latest_readings == {'s1': {'internal_temperature': 4.2}}
+    assert summary.shipments_active == 1 and summary.shipments_completed == 1
+
+
+def test_summary_endpoint(client):
+    # No shipments yet: the row is built on first request
+    res = client.get('/shipments/organization/summary')
+    assert res.status_code == 200
+    assert res.get_json()['shipments'] == {'active': 0, 'completed': 0, 'cancelled': 0}
+
+    etag = client.get('/shipments/organization/summary').headers['ETag']
+    assert client.get('/shipments/organization/summary', headers={'If-None-Match': etag}).status_code == 304
+
+    db.session.add(_shipment('s1'))
+    db.session.commit()
+    res = client.get('/shipments/organization/summary', headers={'If-None-Match': etag})
+    assert res.status_code == 200 and res.get_json()['shipments']['active'] == 1
+
+    _set_role('manufacturer')
+    assert client.get('/shipments/organization/summary').status_code == 403
+
+
+def test_summary_route_leaves_names_to_get_by_name():
+    from routes.shipment import shipment_blueprint
+    app = Flask(__name__)
+    app.register_blueprint(shipment_blueprint, url_prefix='/api/shipments')
+    urls = app.url_map.bind('localhost')
+    assert urls.match('/api/shipments/organization/summary')[0] == 'shipment.get_organization_summary'
+    # A shipment may be called "summary"
+    assert urls.match('/api/shipments/summary') == ('shipment.get_shipment_by_name', {'name': 'summary'})
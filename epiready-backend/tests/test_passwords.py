@@ -0,0 +1,53 @@
+import pytest
+from flask import Flask
+from config.database import db
+import utils.passwords as passwords
+from utils.passwords import hash_password, check_password, needs_rehash
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Cheapest cost bcrypt allows, so the suite stays fast
+    monkeypatch.setattr(passwords, 'BCRYPT_ROUNDS', 4)
+    app = Flask(__name__)
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_hash_and_check(app):
+    hashed = hash_password('s3cret')
+    assert hashed.startswith('$2b$04$')
+    assert check_password('s3cret', hashed)
+    assert not check_password('wrong', hashed)
+    assert not check_password('s3cret', 'not-a-bcrypt-hash')
+
+
+def test_needs_rehash_follows_configured_cost(app):
+    assert not needs_rehash(hash_password('pw'))
+    assert needs_rehash(hash_password('pw', rounds=5))
+    assert needs_rehash('plaintext')
+
+
+def test_login_upgrades_hash_to_current_cost(app):
+    from models.user import User, create_user, verify_user
+    user = create_user('a@test.local', 'pw')
+    user.password_hash = hash_password('pw', rounds=5)
+    db.session.commit()
+
+    assert verify_user('a@test.local', 'wrong') is False
+    assert db.session.get(User, user.id).password_hash.startswith('$2b$05$')
+
+    assert verify_user('a@test.local', 'pw').id == user.id
+    upgraded = db.session.get(User, user.id).password_hash
+    assert upgraded.startswith('$2b$04$') and check_password('pw', upgraded)
@@ -0,0 +1,127 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from config.database import db
+from utils.presence import MemoryPresence, DatabasePresence, Presence
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        from controllers.user import get_presence
+        app.add_url_rule('/users/presence', view_func=get_presence, methods=['GET'])
+
+        from models import User, Organization
+        db.session.add_all([Organization(id=1, name='Org', join_code='A'), Organization(id=2, name='B', join_code='B')])
+        db.session.add_all([
+            User(id=1, email='u1@test.local', password_hash='x', organization_id=1),
+            User(id=2, email='u2@test.local', password_hash='x', organization_id=1),
+            User(id=3, email='u3@test.local', password_hash='x', organization_id=2),
+        ])
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+def test_memory_presence_tracks_every_socket():
+    presence = Presence(MemoryPresence())
+    presence.connect(1, 'a')
+    presence.connect(1, 'b')
+    presence.connect(2, 'c')
+    assert presence.online([1, 2, 3]) == {1, 2}
+    assert presence.disconnect('a') == 1
+    assert presence.is_online(1)
+    presence.disconnect('b')
+    assert not presence.is_online(1)
+    assert presence.heartbeat('c') and not presence.heartbeat('gone')
+
+
+def test_database_presence_expires_stale_sessions(app):
+    from models import SocketSession
+    presence = Presence(DatabasePresence(ttl=60), ttl=60)
+    presence.connect(1, 'a')
+    presence.connect(2, 'b')
+    assert presence.online([1, 2]) == {1, 2}
+
+    # Another worker's socket that stopped refreshing
+    db.session.get(SocketSession, 'b').last_seen = datetime.now(timezone.utc) - timedelta(minutes=5)
+    db.session.commit()
+    assert presence.online([1, 2]) == {1}
+
+    presence.disconnect('a')
+    assert presence.online([1, 2]) == set()
+    assert SocketSession.query.count() == 1
+
+
+def test_presence_endpoint_scoped_to_organization(app, monkeypatch):
+    from controllers import user as user_ctrl
+    presence = Presence(MemoryPresence())
+    presence.connect(1, 'a')
+    presence.connect(3, 'c')
+    monkeypatch.setattr(user_ctrl, 'presence', presence)
+
+    client = app.test_client()
+    assert client.get('/users/presence').get_json() == {'online': [1]}
+    assert client.get('/users/presence?ids=2,3').get_json() == {'online': []}
+    assert client.get('/users/presence?ids=x').status_code == 400
+
+
+def _breach(shipment_id, user_id):
+    from models import Shipment, Alert
+    db.session.add(Shipment(
+        id=shipment_id, name=f'Box {shipment_id}', user_id=user_id, organization_id=1, product_type='A', origin='x',
+        destination='y', min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+        transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status='active'
+    ))
+    db.session.flush()
+    alert = Alert(shipment_id=shipment_id, type='temp', severity='high', message='Too warm', status='active', active=True)
+    db.session.add(alert)
+    db.session.commit()
+    return alert
+
+
+def test_deferred_breach_emails_wait_for_offline(app, monkeypatch):
+    from controllers import alerts
+    presence = Presence(MemoryPresence())
+    presence.connect(1, 'a')
+    monkeypatch.setattr(alerts, 'presence', presence)
+    monkeypatch.setattr(alerts, 'deferred_emails', {'s1': (1, 'Box', 'Temp')})
+    _breach('s1', 1)
+
+    assert alerts.due_deferred_emails() == []
+    presence.disconnect('a')
+    assert alerts.due_deferred_emails() == [(1, 'Box', 'Temp')]
+    assert alerts.deferred_emails == {}
+
+
+def test_deferred_breach_emails_dropped_once_handled(app, monkeypatch):
+    from controllers import alerts
+    from models import Shipment
+    monkeypatch.setattr(alerts, 'presence', Presence(MemoryPresence()))
+    monkeypatch.setattr(alerts, 'deferred_emails', {
+        's1': (1, 'Box', 'Temp'), 's2': (2, 'Box', 'Temp'), 's3': (3, 'Box', 'Temp')
+    })
+    _breach('s1', 1).status = 'resolved'
+    _breach('s2', 2).active = False
+    _breach('s3', 3)
+    db.session.get(Shipment, 's3').status = 'completed'
+    db.session.commit()
+
+    assert alerts.due_deferred_emails() == []
+    assert alerts.deferred_emails == {}
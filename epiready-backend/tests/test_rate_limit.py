@@ -0,0 +1,151 @@
+import threading
+import jwt
+import pytest
+from flask import Flask, jsonify, Blueprint
+from config.database import db
+from utils import rate_limit
+from utils.rate_limit import RateLimiter, MemoryBuckets, DatabaseBuckets, parse_limit
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        from models import User, Organization
+        db.session.add(Organization(id=1, name='Org', join_code='JOIN'))
+        for uid in (1, 2, 3):
+            db.session.add(User(id=uid, email=f'u{uid}@test.local', password_hash='x', organization_id=1))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+def _client(app, limiter, release=None):
+    chat = Blueprint('chat', __name__)
+
+    @chat.route('/messages')
+    def messages():
+        if release is not None:
+            release.wait(5)
+        return jsonify([]), 200
+
+    app.register_blueprint(chat, url_prefix='/api/chat')
+    app.add_url_rule('/health', view_func=lambda: ('ok', 200))
+    limiter.init_app(app)
+    return app.test_client()
+
+
+def _auth(user_id):
+    return {'Authorization': 'Bearer ' + jwt.encode({'user_id': user_id}, 'test_secret_key', algorithm='HS256')}
+
+
+def test_parse_limit():
+    assert parse_limit('30/10') == (3.0, 30.0)
+
+
+def test_memory_bucket_refills(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(rate_limit.time, 'monotonic', lambda: clock[0])
+    buckets = MemoryBuckets()
+    assert buckets.take('k', rate=1, burst=2) == (0, 1)
+    assert buckets.take('k', rate=1, burst=2) == (0, 0)
+    assert buckets.take('k', rate=1, burst=2) == (1, 0)
+    clock[0] += 1
+    assert buckets.take('k', rate=1, burst=2)[0] == 0
+
+
+def test_user_and_organization_limits(app, monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_CHAT', '2/60')
+    monkeypatch.setattr(rate_limit, 'ORG_MULTIPLIER', 2)
+    limiter = RateLimiter(MemoryBuckets(), max_in_flight=0)
+    client = _client(app, limiter)
+
+    assert client.get('/api/chat/messages', headers=_auth(1)).status_code == 200
+    assert client.get('/api/chat/messages', headers=_auth(1)).status_code == 200
+    res = client.get('/api/chat/messages', headers=_auth(1))
+    assert res.status_code == 429
+    assert int(res.headers['Retry-After']) >= 1 and res.headers['X-RateLimit-Remaining'] == '0'
+
+    # User 2 has a bucket of their own, which spends the organization's last two tokens
+    assert client.get('/api/chat/messages', headers=_auth(2)).status_code == 200
+    assert client.get('/api/chat/messages', headers=_auth(2)).status_code == 200
+    assert client.get('/api/chat/messages', headers=_auth(3)).status_code == 429
+
+    # Unauthenticated requests are keyed by address; app routes are never limited
+    assert client.get('/api/chat/messages').status_code == 200
+    for _ in range(5):
+        assert client.get('/health').status_code == 200
+    assert limiter.metrics()['limited'] == 2
+
+
+def test_database_buckets_are_shared(app):
+    first, second = DatabaseBuckets(), DatabaseBuckets()
+    assert first.take('chat:user:1', rate=0.01, burst=2)[0] == 0
+    assert second.take('chat:user:1', rate=0.01, burst=2)[0] == 0
+    retry_after, remaining = first.take('chat:user:1', rate=0.01, burst=2)
+    assert retry_after > 90 and remaining < 1
+
+
+def test_backend_failure_allows_request(app):
+    class Broken:
+        def take(self, *args, **kwargs):
+            raise RuntimeError('database is down')
+    limiter = RateLimiter(Broken(), max_in_flight=0)
+    assert _client(app, limiter).get('/api/chat/messages', headers=_auth(1)).status_code == 200
+    assert limiter.metrics()['backend_errors'] == 1
+
+
+def test_in_flight_cap_sheds_load(app):
+    release = threading.Event()
+    limiter = RateLimiter(MemoryBuckets(), max_in_flight=1)
+    client = _client(app, limiter, release)
+
+    results = []
+    slow = threading.Thread(target=lambda: results.append(client.get('/api/chat/messages').status_code))
+    slow.start()
+    while limiter.metrics()['in_flight'] == 0:
+        pass
+
+    res = app.test_client().get('/api/chat/messages')
+    assert res.status_code == 503 and res.headers['Retry-After'] == '1'
+
+    release.set()
+    slow.join()
+    assert results == [200] and limiter.metrics()['in_flight'] == 0
+
+
+def test_login_limited_per_client_behind_proxy(app, monkeypatch):
+    monkeypatch.setenv('RATE_LIMIT_AUTH', '2/60')
+    auth = Blueprint('auth', __name__)
+    auth.add_url_rule('/login', view_func=lambda: (jsonify({}), 200), methods=['POST'])
+    app.register_blueprint(auth, url_prefix='/api/auth')
+    limiter = RateLimiter(MemoryBuckets(), max_in_flight=0, proxy_hops=1)
+    limiter.init_app(app)
+    client = app.test_client()
+
+    def login(address, forwarded=''):
+        # The proxy appends the address it saw to whatever the client sent
+        header = f'{forwarded}, {address}' if forwarded else address
+        return client.post('/api/auth/login', headers={'X-Forwarded-For': header},
+                           environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code
+
+    assert login('203.0.113.1') == 200 and login('203.0.113.1') == 200
+    assert login('203.0.113.1') == 429
+    # Another client behind the same proxy keeps its own bucket
+    assert login('198.51.100.7') == 200
+    # A forged X-Forwarded-For doesn't buy a fresh bucket
+    assert login('203.0.113.1', forwarded='192.0.2.99') == 429
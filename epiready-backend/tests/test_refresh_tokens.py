@@ -0,0 +1,92 @@
+import pytest
+from flask import Flask
+from config.database import db
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        from controllers.auth import login, refresh, logout
+        app.add_url_rule('/auth/login', view_func=login, methods=['POST'])
+        app.add_url_rule('/auth/refresh', view_func=refresh, methods=['POST'])
+        app.add_url_rule('/auth/logout', view_func=logout, methods=['POST'])
+
+        from models import User
+        db.session.add(User(id=1, email='a@test.local', password_hash='x'))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def login(monkeypatch, client):
+    import controllers.auth as auth_mod
+    from models import User
+    monkeypatch.setattr(auth_mod, 'verify_user', lambda email, password: db.session.get(User, 1))
+    return lambda: client.post('/auth/login', json={'email': 'a@test.local', 'password': 'pw'}).get_json()
+
+
+def test_refresh_rotates_and_never_checks_password(client, login, monkeypatch):
+    import utils.passwords as passwords
+    first = login()['refresh_token']
+    monkeypatch.setattr(passwords, '_offload', lambda *a: pytest.fail('refresh must not hash'))
+
+    res = client.post('/auth/refresh', json={'refresh_token': first})
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body['user_id'] == 1 and body['token'] and body['refresh_token'] != first
+
+    # Only the hash is stored
+    from models import RefreshToken
+    assert not RefreshToken.query.filter_by(token_hash=first).first()
+
+    second = client.post('/auth/refresh', json={'refresh_token': body['refresh_token']})
+    assert second.status_code == 200
+
+
+def test_reused_refresh_token_revokes_family(client, login):
+    first = login()['refresh_token']
+    other_session = login()['refresh_token']
+    rotated = client.post('/auth/refresh', json={'refresh_token': first}).get_json()['refresh_token']
+
+    # Replaying the used token kills the token it was rotated into as well
+    assert client.post('/auth/refresh', json={'refresh_token': first}).status_code == 401
+    assert client.post('/auth/refresh', json={'refresh_token': rotated}).status_code == 401
+    # A separate login is a separate family
+    assert client.post('/auth/refresh', json={'refresh_token': other_session}).status_code == 200
+
+
+def test_expired_unknown_and_logged_out_tokens(client, login):
+    from models import RefreshToken
+    from datetime import datetime
+    assert client.post('/auth/refresh', json={}).status_code == 400
+    assert client.post('/auth/refresh', json={'refresh_token': 'nope'}).status_code == 401
+
+    token = login()['refresh_token']
+    RefreshToken.query.update({'expires_at': datetime(2000, 1, 1)})
+    db.session.commit()
+    assert client.post('/auth/refresh', json={'refresh_token': token}).status_code == 401
+
+    token = login()['refresh_token']
+    assert client.post('/auth/logout', json={'refresh_token': token}).status_code == 200
+    assert client.post('/auth/refresh', json={'refresh_token': token}).status_code == 401
@@ -0,0 +1,87 @@
+import pytest
+from datetime import datetime, timedelta
+from flask import Flask
+from config.database import db
+from utils.replay import ReplayBuffer
+import pkgutil, importlib, models
+
+
+def test_replay_from_memory_after_gap():
+    buffer = ReplayBuffer(capacity=5)
+    stamped = [buffer.record(1, 'breach_alert', {'id': i}) for i in range(3)]
+    assert [p['seq'] for p in stamped] == [1, 2, 3]
+    assert stamped[0]['epoch'] == buffer.epoch
+
+    missed = buffer.since(1, buffer.epoch, 1)
+    assert [data['id'] for event, data in missed] == [1, 2]
+    assert buffer.since(1, buffer.epoch, 3) == []
+    # Sequences are per user
+    assert buffer.record(2, 'breach_alert', {})['seq'] == 1
+
+
+def test_replay_falls_back_when_rolled_over_or_other_epoch():
+    buffer = ReplayBuffer(capacity=3)
+    for i in range(6):
+        buffer.record(1, 'breach_alert', {'id': i})
+    assert buffer.since(1, buffer.epoch, 2) is None
+    assert len(buffer.since(1, buffer.epoch, 3)) == 3
+    assert buffer.since(1, 'old-process', 5) is None
+    assert buffer.since(1, buffer.epoch, 99) is None
+    assert buffer.since(7, buffer.epoch, 0) == []
+
+
+def test_replay_evicts_least_recent_users():
+    buffer = ReplayBuffer(capacity=2, max_users=2)
+    buffer.record(1, 'breach_alert', {})
+    buffer.record(2, 'breach_alert', {})
+    buffer.record(1, 'breach_alert', {})
+    buffer.record(3, 'breach_alert', {})
+    assert buffer.last_seq(2) == 0 and buffer.last_seq(1) == 2
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+def test_missed_breach_alerts_from_database(app):
+    from models import User, Shipment, Alert
+    from controllers.alerts import missed_breach_alerts
+    db.session.add_all([
+        User(id=1, email='a@test.local', password_hash='x'),
+        User(id=2, email='b@test.local', password_hash='x'),
+    ])
+    for sid, uid in (('s1', 1), ('s2', 2)):
+        db.session.add(Shipment(
+            id=sid, name=f'Box {sid}', user_id=uid, product_type='A', origin='x', destination='y',
+            min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+            transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status='active'
+        ))
+    start = datetime(2025, 1, 1)
+    for i in range(4):
+        db.session.add(Alert(shipment_id='s1', type='temp', severity='high', message=f'breach {i}',
+                             status='active', created_at=start + timedelta(minutes=i)))
+    db.session.add(Alert(shipment_id='s2', type='temp', severity='high', message='not mine',
+                         status='active', created_at=start))
+    db.session.commit()
+
+    missed = missed_breach_alerts(1, since=start + timedelta(minutes=1))
+    assert [p['message'] for p in missed] == ['breach 2', 'breach 3']
+    assert missed[0]['shipment_name'] == 'Box s1'
+    assert [p['message'] for p in missed_breach_alerts(1, limit=2)] == ['breach 2', 'breach 3']
@@ -0,0 +1,113 @@
+import shutil
+import pytest
+from flask import Flask
+from config.database import db
+from config import replicas
+from config.replicas import ReplicaRouter
+from utils.serialization import init_json
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """Primary and one replica as two SQLite files; the replica starts as a copy."""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{primary}'
+    app.config['SQLALCHEMY_BINDS'] = {'replica_0': f'sqlite:///{replica}'}
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+    monkeypatch.setattr(replicas, 'replica_router', ReplicaRouter(max_lag=5, check_interval=0, read_your_writes=60))
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        from controllers.chat import get_chat_messages, send_message
+        from models.chat import room_membership_cache
+        room_membership_cache.clear()
+        app.add_url_rule('/chat/messages', view_func=get_chat_messages, methods=['GET'])
+        app.add_url_rule('/chat/messages', view_func=send_message, methods=['POST'])
+
+        _seed()
+        db.session.remove()
+        shutil.copy(primary, replica)
+
+        # Written after the "replication": only the primary has it
+        from models import ChatMessage
+        db.session.add(ChatMessage(chat_room_id=1, sender_id=2, content='not replicated yet'))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        # init_app registered a metadata for the bind on the shared db object
+        db.metadatas.pop('replica_0', None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _seed():
+    from models import User, Organization, ChatRoom, ChatMessage
+    db.session.add(Organization(id=1, name='Org', join_code='JOIN'))
+    for uid in (1, 2):
+        db.session.add(User(id=uid, email=f'u{uid}@test.local', password_hash='x', organization_id=1))
+    db.session.add(ChatRoom(id=1, room_type='direct', organization_id=1, created_by=1, participant1_id=1, participant2_id=2))
+    db.session.commit()
+    db.session.add(ChatMessage(chat_room_id=1, sender_id=1, content='hello'))
+    db.session.commit()
+
+
+def _contents(client):
+    res = client.get('/chat/messages?room_id=1')
+    assert res.status_code == 200
+    return [m['content'] for m in res.get_json()]
+
+
+def test_read_only_view_reads_from_replica(client):
+    assert _contents(client) == ['hello']
+    assert replicas.replica_router.metrics()['replica_reads'] == 1
+
+
+def test_reads_own_writes_from_primary(client):
+    res = client.post('/chat/messages', json={'room_id': 1, 'content': 'mine'})
+    assert res.status_code == 201
+
+    assert _contents(client) == ['hello', 'not replicated yet', 'mine']
+    assert replicas.replica_router.metrics()['sticky_reads'] == 1
+
+
+def test_lagging_replica_falls_back_to_primary(client, monkeypatch):
+    monkeypatch.setattr(replicas.replica_router, 'measure_lag', lambda engine: 30.0)
+    assert _contents(client) == ['hello', 'not replicated yet']
+
+    monkeypatch.setattr(replicas.replica_router, 'measure_lag', lambda engine: 1 / 0)
+    assert _contents(client) == ['hello', 'not replicated yet']
+    metrics = replicas.replica_router.metrics()
+    assert metrics['lag_fallbacks'] == 2 and metrics['lag'] == {'replica_0': None}
+
+
+def test_membership_cache_loads_from_primary(app):
+    from flask import g
+    from models import ChatRoom
+    from models.chat import user_room_ids, room_membership_cache
+    # A room only the primary has; the replica lags behind
+    db.session.add(ChatRoom(id=2, room_type='direct', organization_id=1, created_by=1, participant1_id=1, participant2_id=2))
+    db.session.commit()
+    room_membership_cache.clear()
+    with app.test_request_context():
+        replica = db.engines['replica_0']
+        g.db_replica = replica
+        assert user_room_ids(1) == {1, 2}
+        # The rest of the read_only view still reads from the replica
+        assert g.db_replica is replica
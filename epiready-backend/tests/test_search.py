@@ -0,0 +1,137 @@
+import pytest
+from flask import Flask
+from config.database import db
+from controllers.search import search
+from utils.search import fts5_query
+from utils.serialization import init_json
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        from models.chat import room_membership_cache
+        room_membership_cache.clear()
+        app.add_url_rule('/search', view_func=search, methods=['GET'])
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _shipment(id, user_id, org_id):
+    from models import Shipment
+    return Shipment(
+        id=id, name=id, user_id=user_id, organization_id=org_id, product_type='A', origin='x', destination='y',
+        min_temp=2, max_temp=8, humidity_sensitivity='low', aqi_sensitivity='low',
+        transit_time_hrs=1, risk_factor='low', mode_of_transport='air', status='active'
+    )
+
+
+def _seed(role='manufacturer'):
+    from models import User, Organization, ChatRoom, ChatMessage, ShipmentAction
+    db.session.add_all([Organization(id=1, name='Org', join_code='A'), Organization(id=2, name='Other', join_code='B')])
+    db.session.add_all([
+        User(id=1, email='u1@test.local', password_hash='x', organization_id=1, role=role),
+        User(id=2, email='u2@test.local', password_hash='x', organization_id=1),
+        User(id=3, email='u3@test.local', password_hash='x', organization_id=2),
+    ])
+    db.session.add_all([
+        ChatRoom(id=1, room_type='direct', organization_id=1, created_by=1, participant1_id=1, participant2_id=2),
+        ChatRoom(id=2, room_type='group', name='Private', organization_id=1, created_by=2, participants=[2]),
+        _shipment('mine', 1, 1), _shipment('theirs', 2, 1), _shipment('other-org', 3, 2),
+    ])
+    db.session.commit()
+    db.session.add_all([
+        ChatMessage(chat_room_id=1, sender_id=2, content='The freezer truck is delayed'),
+        ChatMessage(chat_room_id=1, sender_id=1, content='Freezer truck delayed again, freezer alarm too'),
+        ChatMessage(chat_room_id=1, sender_id=1, content='Unrelated chatter'),
+        ChatMessage(chat_room_id=2, sender_id=2, content='freezer secret'),
+        ShipmentAction(shipment_id='mine', user_id=1, action_type='note', description='Rerouted via Toronto hub'),
+        ShipmentAction(shipment_id='theirs', user_id=2, action_type='note', description='Toronto customs hold'),
+        ShipmentAction(shipment_id='mine', user_id=1, action_type='note', description='Door opened',
+                       action_metadata={'location': 'Toronto'}),
+        ShipmentAction(shipment_id='other-org', user_id=3, action_type='note', description='Toronto'),
+    ])
+    db.session.commit()
+
+
+def test_fts5_query_quotes_words():
+    assert fts5_query('cold "chain" OR -x*') == '"cold" "chain" "OR" "x"'
+
+
+def test_search_messages_ranked_and_room_scoped(client, app):
+    with app.app_context():
+        _seed()
+    r = client.get('/search?q=freezer')
+    assert r.status_code == 200
+    body = r.get_json()
+    # Room 2's message is hidden from user 1; the message mentioning freezer twice ranks first
+    assert [m['content'] for m in body['results']] == [
+        'Freezer truck delayed again, freezer alarm too', 'The freezer truck is delayed'
+    ]
+    assert body['total_count'] == 2
+
+    page = client.get('/search?q=freezer truck&limit=1&offset=1').get_json()
+    assert len(page['results']) == 1 and page['has_more'] is False
+
+
+def test_search_actions_respects_shipment_access(client, app):
+    with app.app_context():
+        _seed()
+    ids = {a['shipment_id'] for a in client.get('/search?q=toronto&type=actions').get_json()['results']}
+    assert ids == {'mine'}
+    # Matches in action_metadata are found too
+    assert client.get('/search?q=toronto&type=actions').get_json()['total_count'] == 2
+
+
+def test_search_actions_manager_sees_organization(client, app):
+    with app.app_context():
+        _seed(role='transporter_manager')
+    ids = {a['shipment_id'] for a in client.get('/search?q=toronto&type=actions').get_json()['results']}
+    assert ids == {'mine', 'theirs'}
+
+
+def test_search_index_follows_edits(client, app):
+    from models import ChatMessage
+    with app.app_context():
+        _seed()
+        message = db.session.get(ChatMessage, 3)
+        message.content = 'pallet inspection'
+        db.session.commit()
+    assert client.get('/search?q=pallet').get_json()['total_count'] == 1
+    assert client.get('/search?q=chatter').get_json()['total_count'] == 0
+
+
+def test_search_validation(client, app):
+    with app.app_context():
+        _seed()
+    assert client.get('/search').status_code == 400
+    assert client.get('/search?q=x&type=alerts').status_code == 400
+    r = client.get('/search?q=%22%2A-%21')
+    assert r.status_code == 400 and r.get_json()['error'] == 'q must contain at least one word'
+
+
+def test_search_matches_word_stems(client, app):
+    with app.app_context():
+        _seed()
+    assert client.get('/search?q=delays').get_json()['total_count'] == 2
@@ -0,0 +1,55 @@
+import pytest
+from datetime import datetime, timezone
+from flask import Flask, jsonify
+from config.database import db
+from utils.serialization import init_json, project, IsoJSONProvider, OrjsonProvider
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    init_json(app)
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.mark.parametrize('provider', [OrjsonProvider, IsoJSONProvider])
+def test_providers_match_isoformat(app, provider):
+    app.json = provider(app)
+    naive = datetime(2025, 1, 2, 3, 4, 5, 678901)
+    aware = datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+    with app.test_request_context():
+        body = jsonify({'naive': naive, 'aware': aware}).get_json()
+    assert body == {'naive': naive.isoformat(), 'aware': aware.isoformat()}
+
+
+def test_project_matches_to_dict(app):
+    from models import Organization, User, ChatRoom, ChatMessage
+    db.session.add(Organization(id=1, name='Org', join_code='CODE'))
+    db.session.add(User(id=1, email='a@test.local', password_hash='x', organization_id=1))
+    db.session.add(ChatRoom(id=1, room_type='group', organization_id=1, created_by=1, participants=[1]))
+    db.session.add(ChatMessage(id=1, chat_room_id=1, sender_id=1, content='hi'))
+    db.session.commit()
+
+    query = ChatMessage.query.outerjoin(User, User.id == ChatMessage.sender_id)
+    rows = project(query, ChatMessage, User.email.label('sender_email'))
+
+    with app.test_request_context():
+        projected = jsonify(rows).get_json()
+        hydrated = jsonify([ChatMessage.query.get(1).to_dict()]).get_json()
+    assert projected == hydrated
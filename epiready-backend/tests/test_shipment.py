@@ -14,6 +14,7 @@ def _q(obj):
         def count(self): return 0
         def order_by(self, *args, **kwargs): return self
         def limit(self, *args, **kwargs): return self
+        def with_entities(self, *args, **kwargs): return self
     return Q()
 
 
@@ -141,13 +142,12 @@ def test_get_shipment_by_name_not_found(monkeypatch, client):
         organization_id = 1
 
     class W:
-        def to_dict(self):
-            return {
-                "internal_temperature": 5,
-                "external_temperature": 10,
-                "humidity": 50,
-                "timestamp": "2024-01-01T00:00:00"
-            }
+        _mapping = {
+            "internal_temp": 5,
+            "external_temp": 10,
+            "humidity": 50,
+            "timestamp": "2024-01-01T00:00:00"
+        }
 
     dummy_user    = U()
     dummy_ship    = S()
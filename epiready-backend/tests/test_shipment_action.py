@@ -12,6 +12,7 @@ def _q(obj):
         def filter(self, *a, **k): return self
         def filter_by(self, **k):   return self
         def order_by(self, *a, **k): return self
+        def with_entities(self, *a, **k): return self
         def all(self):  return [obj] if obj else []
         def first(self): return obj
         def get(self, _): return obj
@@ -115,7 +116,7 @@ def test_get_actions_success(monkeypatch, client):
     class S: user_id = 1; organization_id = 1
     class U: role = "manufacturer"; id = 1; organization_id = 1
     class A:
-        def to_dict(self): return {"id": "a1", "action_type": "status_update"}
+        _mapping = {"id": "a1", "action_type": "status_update"}
     monkeypatch.setattr(ship_m.Shipment,       "query", _q(S()), raising=False)
     monkeypatch.setattr(user_m.User,           "query", _q(U()), raising=False)
     monkeypatch.setattr(act_m.ShipmentAction,  "query", _q(A()), raising=False)
@@ -0,0 +1,107 @@
+import json
+import pytest
+from flask import Flask
+from config.database import db
+from controllers import shipment as ship_ctrl
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        app.add_url_rule('/shipments/bulk', view_func=ship_ctrl.create_shipments_bulk, methods=['POST'])
+        app.add_url_rule('/shipments/bulk/status', view_func=ship_ctrl.update_shipment_status_bulk, methods=['PUT'])
+
+        from models import User
+        db.session.add(User(id=1, email='m@test.local', password_hash='x', role='manufacturer'))
+        db.session.commit()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _shipment(name, **overrides):
+    data = {
+        'name': name, 'product_type': 'A', 'origin': 'x', 'destination': 'y',
+        'min_temp': 2, 'max_temp': 8, 'humidity_sensitivity': 'low', 'aqi_sensitivity': 'low',
+        'transit_time_hrs': 1, 'risk_factor': 'low', 'mode_of_transport': 'air', 'status': 'active'
+    }
+    data.update(overrides)
+    return data
+
+
+def test_bulk_create_all_valid(client, app):
+    r = client.post('/shipments/bulk', json=[_shipment(f'Box {i}') for i in range(50)])
+    assert r.status_code == 201
+    body = r.get_json()
+    assert body['created'] == 50 and body['failed'] == 0
+    assert body['results'][0]['shipment']['name'] == 'Box 0'
+    with app.app_context():
+        from models import Shipment
+        assert Shipment.query.count() == 50
+
+
+def test_bulk_create_reports_per_item_errors(client, app):
+    client.post('/shipments/bulk', json=[_shipment('Existing')])
+    r = client.post('/shipments/bulk', json={'shipments': [
+        _shipment('New'),
+        _shipment('Existing'),
+        _shipment('New'),
+        _shipment('Bad', min_temp=9),
+        {'name': 'Partial'},
+        _shipment(['List']),
+        _shipment('Blank', origin=' '),
+    ]})
+    assert r.status_code == 207
+    results = r.get_json()['results']
+    assert [result['status'] for result in results] == ['created'] + ['error'] * 6
+    assert results[1]['error'] == 'Shipment name already exists'
+    assert results[3]['error'] == 'min_temp must be less than max_temp'
+    assert results[4]['error'].startswith('Missing fields')
+    assert results[5]['error'] == 'Fields must be non-empty strings: name'
+    assert results[6]['error'] == 'Fields must be non-empty strings: origin'
+
+
+def test_bulk_create_ndjson(client):
+    body = '\n'.join([json.dumps(_shipment('A')), '{not json', json.dumps(_shipment('B'))])
+    r = client.post('/shipments/bulk', data=body, content_type='application/x-ndjson')
+    assert r.status_code == 207
+    assert [result['status'] for result in r.get_json()['results']] == ['created', 'error', 'created']
+
+
+def test_bulk_status_update(client):
+    created = client.post('/shipments/bulk', json=[_shipment('A'), _shipment('B')]).get_json()['results']
+    ids = [result['shipment']['id'] for result in created]
+    r = client.put('/shipments/bulk/status', json={'updates': [
+        {'shipment_id': ids[0], 'status': 'completed'},
+        {'shipment_id': ids[1], 'status': 'lost'},
+        {'shipment_id': 'missing', 'status': 'cancelled'},
+        {'shipment_id': ['a'], 'status': 'active'},
+        {'status': 'active'},
+    ]})
+    assert r.status_code == 200
+    results = r.get_json()['results']
+    assert results[0]['status'] == 'updated' and results[0]['shipment']['status'] == 'completed'
+    assert results[0]['shipment']['actual_arrival'] is not None
+    assert results[1]['error'] == 'Invalid status'
+    assert results[2]['error'] == 'Shipment not found'
+    assert results[3]['error'] == results[4]['error'] == 'shipment_id must be a non-empty string'
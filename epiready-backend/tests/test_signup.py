@@ -48,8 +48,13 @@ def test_login_wrong_credentials(monkeypatch, client):
 def test_login_success(monkeypatch, client):
     class MockUser: id = 1
     def mock_verify_user(email, password): return MockUser()
+    class MockSession:
+        def commit(self): pass
     monkeypatch.setattr(auth_mod, "verify_user", mock_verify_user)
+    monkeypatch.setattr(auth_mod, "issue_refresh_token", lambda user_id: "refresh-1")
+    monkeypatch.setattr(auth_mod, "db", type("MockDB", (), {"session": MockSession()})())
     r = client.post("/auth/login", json={"email": "a@b.com", "password": "123"})
     assert r.status_code == 200
     assert b"Login successful" in r.data
     assert b"token" in r.data
+    assert r.get_json()["refresh_token"] == "refresh-1"
@@ -0,0 +1,109 @@
+import pytest
+from flask import Flask
+from config.database import db
+from utils.write_behind import ChatWriteBehind
+import pkgutil, importlib, models
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.secret_key = 'test_secret_key'
+    app.config['TESTING'] = True
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    db.init_app(app)
+
+    with app.app_context():
+        for _, modname, _ in pkgutil.iter_modules(models.__path__):
+            importlib.import_module(f"models.{modname}")
+        db.create_all()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+
+
+def _seed():
+    from models import User, Organization, ChatRoom, ChatMessage
+    db.session.add(Organization(id=1, name='Org', join_code='JOIN'))
+    db.session.add_all([
+        User(id=1, email='u1@test.local', password_hash='x', organization_id=1),
+        User(id=2, email='u2@test.local', password_hash='x', organization_id=1),
+    ])
+    db.session.add(ChatRoom(id=1, room_type='direct', organization_id=1, created_by=1, participant1_id=1, participant2_id=2))
+    db.session.commit()
+    db.session.add(ChatMessage(chat_room_id=1, sender_id=2, content='already saved'))
+    db.session.commit()
+
+
+def test_write_behind_assigns_ids_and_flushes_in_order(app):
+    from models import ChatMessage, ChatRoomSummary
+    buffer = ChatWriteBehind(enabled=True, batch_size=2)
+    buffer._app = app
+    _seed()
+
+    sent = [buffer.submit(1, 1, f'burst {i}') for i in range(5)]
+    assert [m.id for m in sent] == [2, 3, 4, 5, 6]
+    assert sent[0].to_dict()['created_at'] <= sent[-1].to_dict()['created_at']
+    assert ChatMessage.query.count() == 1 and buffer.pending() == 5
+
+    assert buffer.flush() == 5
+    assert buffer.pending() == 0
+    rows = ChatMessage.query.order_by(ChatMessage.id).all()
+    assert [m.content for m in rows[1:]] == [f'burst {i}' for i in range(5)]
+    summary = db.session.get(ChatRoomSummary, 1)
+    assert summary.message_count == 6 and summary.last_message_id == 6
+
+
+def test_write_behind_keeps_failed_batch(app, monkeypatch):
+    buffer = ChatWriteBehind(enabled=True)
+    buffer._app = app
+    _seed()
+    buffer.submit(1, 1, 'first')
+
+    def fail(batch):
+        raise RuntimeError('database unavailable')
+    monkeypatch.setattr(buffer, '_write', fail)
+    assert buffer.flush() == 0 and buffer.pending() == 1
+
+    monkeypatch.undo()
+    assert buffer.flush() == 1
+
+
+def test_write_behind_dead_letters_bad_row(app):
+    from models import ChatMessage
+    buffer = ChatWriteBehind(enabled=True, max_attempts=2)
+    buffer._app = app
+    _seed()
+
+    buffer.submit(1, 1, 'before')
+    bad = buffer.submit(1, None, 'no sender')
+    buffer.submit(1, 1, 'after')
+    # The bad row doesn't hold back the rows around it
+    assert buffer.flush() == 2 and buffer.pending() == 1
+
+    buffer.submit(1, 1, 'later')
+    assert buffer.flush() == 1 and buffer.pending() == 0
+    assert [values['id'] for values in buffer.dead_letters] == [bad.id]
+    assert [m.content for m in ChatMessage.query.order_by(ChatMessage.id)] == ['already saved', 'before', 'after', 'later']
+
+
+def test_write_behind_stamps_updated_at_when_written(app):
+    from models import ChatMessage
+    buffer = ChatWriteBehind(enabled=True)
+    buffer._app = app
+    _seed()
+    accepted = buffer.submit(1, 1, 'late')
+
+    # Written after a REST message committed in the meantime
+    # (explicit id: SQLite's allocator assumes it is the only writer)
+    db.session.add(ChatMessage(id=100, chat_room_id=1, sender_id=2, content='rest'))
+    db.session.commit()
+    rest = db.session.get(ChatMessage, 100)
+    buffer.flush()
+    late = db.session.get(ChatMessage, accepted.id)
+    assert late.created_at == accepted.created_at.replace(tzinfo=None)
+    assert late.updated_at >= rest.updated_at
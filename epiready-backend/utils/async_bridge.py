@@ -0,0 +1,38 @@
+import asyncio
+import threading
+import time
+
+
+class AsyncSocketIOBridge:
+    """
+    Lets the synchronous helpers (fanout, read receipts, write-behind,
+    presence, the monitor tick) drive a python-socketio AsyncServer.
+
+    They only need the slice of the Flask-SocketIO API used in the eventlet
+    mode: emit(), sleep(), start_background_task() and server.manager /
+    server.eio for queue depths. Under asyncio they run on worker threads, so
+    emit() hands the coroutine to the event loop and returns without waiting,
+    and background tasks are daemon threads.
+    """
+
+    def __init__(self, server, loop=None):
+        self.server = server
+        self.loop = loop
+
+    def emit(self, event, data=None, room=None, to=None, namespace='/'):
+        coro = self.server.emit(event, data, to=to or room, namespace=namespace)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            return self.loop.create_task(coro)
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def start_background_task(self, target, *args, **kwargs):
+        thread = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
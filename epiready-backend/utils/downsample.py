@@ -0,0 +1,84 @@
+from datetime import datetime
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_seconds(timestamp):
+    """Converts a naive UTC datetime into seconds since the epoch."""
+    return (timestamp.replace(tzinfo=None) - EPOCH).total_seconds()
+
+
+class LTTBDownsampler:
+    """
+    Streaming Largest-Triangle-Three-Buckets downsampler.
+
+    Points are pushed one at a time, already sorted by x. Because the number of
+    points (total) is known up front the bucket boundaries are fixed, so only the
+    bucket being decided and the one after it are ever held in memory. Each call
+    to add() / finish() returns the items selected so far, in x order.
+    """
+
+    def __init__(self, total, threshold):
+        self.total = total
+        self.threshold = threshold
+        self.passthrough = threshold < 3 or total <= threshold
+        self.bucket_count = max(threshold - 2, 1)
+        self.every = (total - 2) / self.bucket_count if not self.passthrough else 1
+        self.position = 0
+        self.anchor = None
+        self.pending = []
+        self.current = []
+        self.current_index = 0
+
+    def add(self, x, y, item):
+        point = (x, y, item)
+        self.position += 1
+
+        if self.passthrough:
+            return [item]
+
+        if self.anchor is None:
+            self.anchor = point
+            return [item]
+
+        index = min(int((self.position - 2) / self.every), self.bucket_count - 1)
+        selected = []
+        if index != self.current_index and self.current:
+            self.pending.append(self.current)
+            self.current = []
+            if len(self.pending) == 2:
+                selected.append(self._select(self.pending.pop(0), _mean(self.pending[0])))
+        self.current_index = index
+        self.current.append(point)
+        return selected
+
+    def finish(self):
+        if self.passthrough or not self.current:
+            return []
+
+        last = self.current.pop()
+        buckets = self.pending + ([self.current] if self.current else [])
+        self.pending, self.current = [], []
+
+        selected = []
+        for i, bucket in enumerate(buckets):
+            following = _mean(buckets[i + 1]) if i + 1 < len(buckets) else (last[0], last[1])
+            selected.append(self._select(bucket, following))
+        selected.append(last[2])
+        return selected
+
+    def _select(self, bucket, following):
+        ax, ay = self.anchor[0], self.anchor[1]
+        cx, cy = following
+        best, best_area = bucket[0], -1.0
+        for point in bucket:
+            area = abs((ax - cx) * (point[1] - ay) - (ax - point[0]) * (cy - ay))
+            if area > best_area:
+                best, best_area = point, area
+        self.anchor = best
+        return best[2]
+
+
+def _mean(bucket):
+    count = len(bucket)
+    return (sum(p[0] for p in bucket) / count, sum(p[1] for p in bucket) / count)
@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict, deque
+
+POLICIES = ('coalesce', 'drop-oldest')
+
+
+class Fanout:
+    """
+    Socket.IO emit with per-connection backpressure.
+
+    socketio.emit() puts packets on each client's unbounded engine.io queue,
+    so a stalled websocket grows memory for as long as the monitor keeps
+    publishing. Fanout looks at that queue for every recipient first. Below
+    *max_transport_depth* frames it emits straight away. Above it, the frame
+    waits in a small per-connection buffer that the drain task empties once
+    the client catches up. The buffer is bounded by *max_pending*:
+
+    - 'coalesce' keeps only the newest frame per (event, key), e.g. the
+      latest reading per shipment, and drops the oldest key beyond the cap;
+    - 'drop-oldest' keeps frames in order and drops the oldest beyond the cap.
+
+    Priority events (breach alerts) bypass all of this and are always emitted.
+    """
+
+    def __init__(self, max_transport_depth=50, max_pending=100, policy='coalesce', drain_interval=0.5):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.max_transport_depth = max_transport_depth
+        self.max_pending = max_pending
+        self.policy = policy
+        self.drain_interval = drain_interval
+        self.socketio = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.counters = {'sent': 0, 'priority': 0, 'queued': 0, 'coalesced': 0, 'dropped': 0, 'discarded': 0}
+
+    def _count(self, name, n=1):
+        self.counters[name] += n
+
+    def _participants(self, room, namespace='/'):
+        return list(self.socketio.server.manager.get_participants(namespace, room))
+
+    def _transport_depth(self, eio_sid):
+        """Frames waiting on the client's engine.io queue, or None if it's gone."""
+        socket = self.socketio.server.eio.sockets.get(eio_sid)
+        if socket is None or socket.closed:
+            return None
+        return socket.queue.qsize()
+
+    def emit(self, event, data, room, key=None, priority=False):
+        if priority:
+            self.socketio.emit(event, data, room=room)
+            with self._lock:
+                self._count('priority')
+            return
+
+        for sid, eio_sid in self._participants(room):
+            depth = self._transport_depth(eio_sid)
+            if depth is None:
+                continue
+            with self._lock:
+                backlog = self._pending.get(sid)
+                if depth < self.max_transport_depth and not backlog:
+                    send = True
+                else:
+                    send = False
+                    self._enqueue(sid, event, key, data)
+            if send:
+                self.socketio.emit(event, data, to=sid)
+                with self._lock:
+                    self._count('sent')
+
+    def _enqueue(self, sid, event, key, data):
+        if self.policy == 'coalesce':
+            backlog = self._pending.setdefault(sid, OrderedDict())
+            slot = (event, key)
+            if slot in backlog:
+                backlog.move_to_end(slot)
+                self._count('coalesced')
+            backlog[slot] = (event, data)
+            if len(backlog) > self.max_pending:
+                backlog.popitem(last=False)
+                self._count('dropped')
+        else:
+            backlog = self._pending.setdefault(sid, deque())
+            backlog.append((event, data))
+            if len(backlog) > self.max_pending:
+                backlog.popleft()
+                self._count('dropped')
+        self._count('queued')
+
+    def _pop(self, backlog):
+        if isinstance(backlog, OrderedDict):
+            return backlog.popitem(last=False)[1]
+        return backlog.popleft()
+
+    def drain(self, namespace='/'):
+        """Sends buffered frames to connections whose transport queue has room again."""
+        with self._lock:
+            sids = list(self._pending)
+        for sid in sids:
+            eio_sid = self.socketio.server.manager.eio_sid_from_sid(sid, namespace)
+            depth = self._transport_depth(eio_sid) if eio_sid else None
+            if depth is None:
+                self.forget(sid)
+                continue
+            while depth < self.max_transport_depth:
+                with self._lock:
+                    backlog = self._pending.get(sid)
+                    if not backlog:
+                        break
+                    event, data = self._pop(backlog)
+                    self._count('sent')
+                self.socketio.emit(event, data, to=sid)
+                depth += 1
+            with self._lock:
+                if sid in self._pending and not self._pending[sid]:
+                    del self._pending[sid]
+
+    def leave(self, user_room, room, namespace='/'):
+        """Takes every connection in *user_room* (one user's sockets) out of *room*."""
+        if self.socketio is None:
+            return
+        manager = self.socketio.server.manager
+        for sid, _ in self._participants(user_room, namespace):
+            # The manager's own bookkeeping, the same in the eventlet and asyncio servers
+            manager.basic_leave_room(sid, namespace, room)
+
+    def forget(self, sid):
+        """Discards whatever is buffered for a connection that went away."""
+        with self._lock:
+            backlog = self._pending.pop(sid, None)
+            if backlog:
+                self._count('discarded', len(backlog))
+
+    def metrics(self):
+        with self._lock:
+            depths = [len(backlog) for backlog in self._pending.values()]
+            return dict(
+                self.counters,
+                policy=self.policy,
+                slow_connections=len(depths),
+                pending_frames=sum(depths),
+                max_pending_depth=max(depths, default=0),
+            )
+
+    def start(self, socketio):
+        self.socketio = socketio
+
+        def run():
+            while True:
+                socketio.sleep(self.drain_interval)
+                try:
+                    self.drain()
+                except Exception as e:
+                    print(f"[fanout] drain failed: {e}")
+
+        socketio.start_background_task(run)
+
+
+fanout = Fanout(
+    max_transport_depth=int(os.getenv('FANOUT_MAX_TRANSPORT_DEPTH', '50')),
+    max_pending=int(os.getenv('FANOUT_MAX_PENDING', '100')),
+    policy=os.getenv('FANOUT_POLICY', 'coalesce'),
+    drain_interval=float(os.getenv('FANOUT_DRAIN_INTERVAL', '0.5')),
+)
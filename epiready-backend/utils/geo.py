@@ -0,0 +1,100 @@
+import math
+
+# Geohash: interleaved longitude/latitude bisections written in base 32, so
+# nearby points share a prefix and a B-tree index on the string answers
+# "everything in this cell" as a prefix range. Used instead of PostGIS,
+# which the deployment's Postgres doesn't have.
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # cells of about 5 m
+EARTH_RADIUS_KM = 6371.0088
+# Beyond this many cells a query scans wider cells instead
+MAX_COVER_CELLS = 16
+
+
+def valid_coordinates(lat, lon):
+    return lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def parse_coordinates(text):
+    """'43.65, -79.38' -> (43.65, -79.38); None when *text* isn't a coordinate pair."""
+    if not text:
+        return None
+    parts = text.replace(',', ' ').split()
+    if len(parts) != 2:
+        return None
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+    return (lat, lon) if valid_coordinates(lat, lon) else None
+
+
+def encode(lat, lon, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        span, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of a geohash cell of *precision* characters."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def cover(min_lat, min_lon, max_lat, max_lon):
+    """
+    Geohash prefixes whose cells together contain the bounding box: the
+    longest precision that needs at most MAX_COVER_CELLS cells. Boxes that
+    cross the antimeridian (min_lon > max_lon) are covered in two halves.
+    """
+    if min_lon > max_lon:
+        return sorted(set(cover(min_lat, min_lon, max_lat, 180.0)) | set(cover(min_lat, -180.0, max_lat, max_lon)))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = math.floor((max_lat + 90) / height) - math.floor((min_lat + 90) / height) + 1
+        columns = math.floor((max_lon + 180) / width) - math.floor((min_lon + 180) / width) + 1
+        if rows * columns <= MAX_COVER_CELLS:
+            break
+    cells = set()
+    for row in range(rows):
+        lat = min(max_lat, min_lat + row * height)
+        for column in range(columns):
+            cells.add(encode(lat, min(max_lon, min_lon + column * width), precision))
+    return sorted(cells)
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, min_lon, max_lat, max_lon) containing every point within *radius_km*."""
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = max(-90.0, lat - delta_lat), min(90.0, lat + delta_lat)
+    if min_lat == -90.0 or max_lat == 90.0:
+        # Includes a pole: every longitude
+        return min_lat, -180.0, max_lat, 180.0
+    delta_lon = math.degrees(radius_km / EARTH_RADIUS_KM / math.cos(math.radians(lat)))
+    if delta_lon >= 180:
+        return min_lat, -180.0, max_lat, 180.0
+    min_lon = (lon - delta_lon + 540) % 360 - 180
+    max_lon = (lon + delta_lon + 540) % 360 - 180
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
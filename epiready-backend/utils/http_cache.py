@@ -0,0 +1,44 @@
+from flask import request, make_response, current_app
+from functools import wraps
+import hashlib
+
+NO_CACHE = 'private, no-cache'
+
+
+def conditional(version, cache_control=NO_CACHE):
+    """
+    Adds weak ETags and If-None-Match handling to a GET view.
+
+    *version* is called with the view's arguments and returns a cheap marker
+    for the data behind the response (e.g. a row count and max updated_at for
+    the caller's scope). The ETag hashes that marker with the request path and
+    query string, so when the client's ETag still matches we answer 304 without
+    running the view's query or serializing anything. Returning None from
+    *version* skips caching for that request (e.g. access denied, so the view
+    produces the error).
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapped(*args, **kwargs):
+            try:
+                marker = version(*args, **kwargs)
+            except Exception as e:
+                # A failed marker must never fail the request itself
+                print(f"[conditional] version marker for {f.__name__} failed: {e}")
+                marker = None
+            if marker is None:
+                return f(*args, **kwargs)
+
+            etag = hashlib.sha1(repr((request.full_path, marker)).encode()).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = cache_control
+            response.vary.add('Authorization')
+            return response
+        return wrapped
+    return decorator
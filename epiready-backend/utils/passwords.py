@@ -0,0 +1,42 @@
+import os
+import sys
+import bcrypt
+
+# bcrypt cost factor for new hashes; existing hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+
+
+def _offload(fn, *args):
+    """
+    Runs CPU-bound *fn* without stalling the server. Under eventlet every
+    greenlet shares one OS thread, so a 250 ms bcrypt call would freeze every
+    websocket and the monitor; it goes to eventlet's native thread pool
+    instead (EVENTLET_THREADPOOL_SIZE threads, default 20). Elsewhere requests
+    already run on their own threads and bcrypt releases the GIL.
+    """
+    eventlet = sys.modules.get('eventlet')
+    if eventlet is not None and eventlet.patcher.is_monkey_patched('thread'):
+        from eventlet import tpool
+        return tpool.execute(fn, *args)
+    return fn(*args)
+
+
+def hash_password(raw_password, rounds=None):
+    salt = bcrypt.gensalt(rounds or BCRYPT_ROUNDS)
+    return _offload(bcrypt.hashpw, raw_password.encode(), salt).decode()
+
+
+def check_password(raw_password, password_hash):
+    try:
+        return _offload(bcrypt.checkpw, raw_password.encode(), password_hash.encode())
+    except ValueError:
+        # Not a bcrypt hash
+        return False
+
+
+def needs_rehash(password_hash, rounds=None):
+    """True when *password_hash* wasn't made with the configured cost."""
+    try:
+        return int(password_hash.split('$')[2]) != (rounds or BCRYPT_ROUNDS)
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select, update
+from config.database import db
+from models.presence import SocketSession
+
+
+class MemoryPresence:
+    """
+    Presence for a single worker: user id -> {sid: last seen (monotonic)},
+    plus the reverse sid -> user id map for disconnects.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._sids = {}
+        self._lock = threading.Lock()
+
+    def connect(self, user_id, sid):
+        with self._lock:
+            self._users.setdefault(user_id, {})[sid] = time.monotonic()
+            self._sids[sid] = user_id
+
+    def heartbeat(self, sid):
+        with self._lock:
+            user_id = self._sids.get(sid)
+            if user_id is None:
+                return False
+            self._users[user_id][sid] = time.monotonic()
+            return True
+
+    def disconnect(self, sid):
+        with self._lock:
+            user_id = self._sids.pop(sid, None)
+            sessions = self._users.get(user_id)
+            if sessions is not None:
+                sessions.pop(sid, None)
+                if not sessions:
+                    del self._users[user_id]
+            return user_id
+
+    def online(self, user_ids):
+        # Connect/disconnect events are reliable within one process, so a
+        # tracked socket counts as online regardless of heartbeats
+        with self._lock:
+            return {uid for uid in user_ids if uid in self._users}
+
+    def local_sids(self):
+        with self._lock:
+            return list(self._sids)
+
+
+class DatabasePresence(MemoryPresence):
+    """
+    Shared presence for multiple workers, stored in socket_sessions. Each
+    worker keeps its own sockets' last_seen fresh (see Presence.start), so a
+    crashed worker's rows stop counting after *ttl* seconds.
+    """
+
+    def __init__(self, ttl):
+        super().__init__()
+        self.ttl = ttl
+
+    def connect(self, user_id, sid):
+        super().connect(user_id, sid)
+        db.session.merge(SocketSession(sid=sid, user_id=user_id, last_seen=datetime.now(timezone.utc)))
+        db.session.commit()
+
+    def heartbeat(self, sid):
+        if not super().heartbeat(sid):
+            return False
+        self.touch([sid])
+        return True
+
+    def disconnect(self, sid):
+        user_id = super().disconnect(sid)
+        db.session.execute(delete(SocketSession).where(SocketSession.sid == sid))
+        db.session.commit()
+        return user_id
+
+    def online(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        return set(db.session.execute(
+            select(SocketSession.user_id).where(
+                SocketSession.user_id.in_(user_ids), SocketSession.last_seen >= cutoff
+            ).distinct()
+        ).scalars())
+
+    def touch(self, sids):
+        if not sids:
+            return
+        now = datetime.now(timezone.utc)
+        db.session.execute(update(SocketSession).where(SocketSession.sid.in_(sids)).values(last_seen=now))
+        # Housekeeping: drop sessions left behind by workers that died
+        db.session.execute(delete(SocketSession).where(SocketSession.last_seen < now - timedelta(seconds=self.ttl * 10)))
+        db.session.commit()
+
+
+class Presence:
+    """Who is connected over Socket.IO right now, behind a pluggable backend."""
+
+    def __init__(self, backend, ttl=90):
+        self.backend = backend
+        self.ttl = ttl
+
+    def connect(self, user_id, sid):
+        self.backend.connect(user_id, sid)
+
+    def heartbeat(self, sid):
+        return self.backend.heartbeat(sid)
+
+    def disconnect(self, sid):
+        return self.backend.disconnect(sid)
+
+    def online(self, user_ids):
+        return self.backend.online(user_ids)
+
+    def is_online(self, user_id):
+        return user_id in self.backend.online([user_id])
+
+    def start(self, socketio, app):
+        """Keeps this worker's sockets fresh in a shared backend."""
+        if not isinstance(self.backend, DatabasePresence):
+            return
+
+        def run():
+            while True:
+                socketio.sleep(self.ttl / 3)
+                with app.app_context():
+                    try:
+                        self.backend.touch(self.backend.local_sids())
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"[presence] refresh failed: {e}")
+
+        socketio.start_background_task(run)
+
+
+_ttl = float(os.getenv('PRESENCE_TTL', '90'))
+presence = Presence(
+    DatabasePresence(_ttl) if os.getenv('PRESENCE_BACKEND', 'memory') == 'database' else MemoryPresence(),
+    ttl=_ttl,
+)
@@ -0,0 +1,233 @@
+import math
+import os
+import threading
+import time
+import jwt
+from flask import current_app, g, jsonify, request
+from sqlalchemy import select, update
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.dialects import postgresql, sqlite
+from config.database import db, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RESERVE
+from models.rate_limit import RateLimitBucket
+from models.user import User
+from utils.ttl_cache import TTLCache
+
+# "<requests>/<seconds>" per blueprint, overridable with RATE_LIMIT_<BLUEPRINT>;
+# the bucket holds <requests> tokens and refills over <seconds>
+DEFAULT_LIMITS = {
+    'default': '120/60',
+    'auth': '10/60',
+    'chat': '30/10',
+    'shipment': '120/60',
+    'export': '10/60',
+    'search': '60/60',
+}
+# An organization's bucket is this many users' worth
+ORG_MULTIPLIER = float(os.getenv('RATE_LIMIT_ORG_MULTIPLIER', '10'))
+# Reverse proxies in front of the app (nginx in production) whose
+# X-Forwarded-For entries are trusted; 0 when clients connect directly
+TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+
+
+def parse_limit(spec):
+    """'30/10' -> (rate in tokens per second, burst)."""
+    requests, seconds = spec.split('/')
+    burst = float(requests)
+    return burst / float(seconds), burst
+
+
+def limit_for(blueprint):
+    spec = os.getenv(f"RATE_LIMIT_{blueprint.upper()}") or DEFAULT_LIMITS.get(blueprint) \
+        or os.getenv('RATE_LIMIT_DEFAULT') or DEFAULT_LIMITS['default']
+    return parse_limit(spec)
+
+
+class MemoryBuckets:
+    """Token buckets for a single worker: key -> (tokens, last refill)."""
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        """
+        Takes *cost* tokens from *key*'s bucket. Returns (retry_after,
+        remaining): retry_after is 0 when the request is allowed, otherwise
+        the seconds until enough tokens have refilled.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if key not in self._buckets and len(self._buckets) >= self.max_entries:
+                self._prune(now)
+            self._buckets[key] = (tokens, now)
+        return (0 if allowed else (cost - tokens) / rate), tokens
+
+    def _prune(self, now):
+        # A bucket idle for a minute is most likely full again, which is the
+        # same as not having one
+        idle = [key for key, (_, updated) in self._buckets.items() if now - updated > 60]
+        for key in idle or list(self._buckets):
+            del self._buckets[key]
+
+
+class DatabaseBuckets:
+    """
+    Token buckets shared by every worker, one row per key in
+    rate_limit_buckets. Each take() is a short transaction of its own on the
+    primary, outside the request's session, that locks the row while it
+    refills and spends it.
+    """
+
+    def take(self, key, rate, burst, cost=1):
+        table = RateLimitBucket.__table__
+        now = time.time()
+        with db.engine.begin() as conn:
+            dialect = postgresql if conn.dialect.name == 'postgresql' else sqlite
+            conn.execute(dialect.insert(table).values(key=key, tokens=burst, updated_at=now).on_conflict_do_nothing())
+            row = conn.execute(select(table.c.tokens, table.c.updated_at).where(table.c.key == key).with_for_update()).one()
+            tokens = min(burst, row.tokens + max(0.0, now - row.updated_at) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(update(table).where(table.c.key == key).values(tokens=tokens, updated_at=now))
+        return (0 if allowed else (cost - tokens) / rate), tokens
+
+
+class RateLimiter:
+    """
+    Per-user and per-organization token buckets for every blueprint, plus a
+    cap on requests in flight.
+
+    A request spends one token from its user's bucket for the blueprint
+    ("chat", "shipment", ...) and one from its organization's, which is
+    ORG_MULTIPLIER times larger. Requests without a valid token are keyed by
+    client address, which behind a proxy is the one the last *proxy_hops*
+    proxies report in X-Forwarded-For; anything further left is set by the
+    client and ignored. An empty bucket means 429 with Retry-After.
+
+    The in-flight cap exists because one eventlet worker serves everyone:
+    past the number of connections the pool can hand out, extra requests
+    would only queue for pool_timeout and then fail, so they get 503 right
+    away instead.
+    """
+
+    def __init__(self, buckets, max_in_flight, proxy_hops=0):
+        self.buckets = buckets
+        self.max_in_flight = max_in_flight
+        self.proxy_hops = proxy_hops
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._organizations = TTLCache(ttl=300)
+        self.counters = {'allowed': 0, 'limited': 0, 'shed': 0, 'backend_errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def admit(self):
+        with self._lock:
+            if self.max_in_flight and self._in_flight >= self.max_in_flight:
+                self.counters['shed'] += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _request_user_id(self):
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return None
+        try:
+            return jwt.decode(auth_header[7:], current_app.secret_key, algorithms=["HS256"])['user_id']
+        except (jwt.InvalidTokenError, KeyError):
+            return None
+
+    def _organization_id(self, user_id):
+        def load():
+            # Own connection, so the request's session doesn't hold one for nothing
+            with db.engine.connect() as conn:
+                return conn.scalar(select(User.organization_id).where(User.id == user_id))
+        return self._organizations.get_or_load(user_id, load)
+
+    def keys(self, blueprint):
+        """(bucket key, multiplier) pairs the current request spends from."""
+        user_id = self._request_user_id()
+        if user_id is None:
+            return [(f"{blueprint}:ip:{request.remote_addr}", 1)]
+        keys = [(f"{blueprint}:user:{user_id}", 1)]
+        organization_id = self._organization_id(user_id)
+        if organization_id is not None:
+            keys.append((f"{blueprint}:org:{organization_id}", ORG_MULTIPLIER))
+        return keys
+
+    def check(self, blueprint):
+        """Returns (retry_after, limit, remaining) for the tightest bucket; retry_after is 0 when allowed."""
+        rate, burst = limit_for(blueprint)
+        try:
+            for key, multiplier in self.keys(blueprint):
+                retry_after, remaining = self.buckets.take(key, rate * multiplier, burst * multiplier)
+                if retry_after:
+                    self._count('limited')
+                    return retry_after, burst * multiplier, remaining
+        except Exception as e:
+            # A broken shared backend must not take the API down with it
+            self._count('backend_errors')
+            print(f"[rate_limit] backend failed, allowing request: {e}")
+        self._count('allowed')
+        return 0, burst, None
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.counters, in_flight=self._in_flight, max_in_flight=self.max_in_flight,
+                        backend=type(self.buckets).__name__)
+
+    def init_app(self, app):
+        if self.proxy_hops:
+            # Otherwise every client behind the proxy shares its address and bucket
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=self.proxy_hops, x_proto=self.proxy_hops)
+
+        @app.before_request
+        def limit_request():
+            # CORS preflights and app-level routes (/health, /metrics) are exempt
+            if request.method == 'OPTIONS' or not request.blueprint:
+                return None
+            if not self.admit():
+                response = jsonify({'error': 'Server is busy, try again shortly'})
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            g.rate_limit_admitted = True
+
+            retry_after, limit, remaining = self.check(request.blueprint)
+            if retry_after:
+                response = jsonify({'error': 'Too many requests', 'retry_after': math.ceil(retry_after)})
+                response.headers['Retry-After'] = str(math.ceil(retry_after))
+                response.headers['X-RateLimit-Limit'] = str(int(limit))
+                response.headers['X-RateLimit-Remaining'] = str(max(0, int(remaining)))
+                return response, 429
+            return None
+
+        @app.teardown_request
+        def release_request(exc):
+            if g.pop('rate_limit_admitted', False):
+                self.release()
+
+
+def _default_max_in_flight():
+    # Leave the pool's reserve for the monitor and other background tasks
+    return max(1, DB_POOL_SIZE + DB_MAX_OVERFLOW - DB_POOL_RESERVE)
+
+
+rate_limiter = RateLimiter(
+    DatabaseBuckets() if os.getenv('RATE_LIMIT_BACKEND', 'memory') == 'database' else MemoryBuckets(),
+    max_in_flight=int(os.getenv('MAX_IN_FLIGHT_REQUESTS', str(_default_max_in_flight()))),
+    proxy_hops=TRUSTED_PROXY_HOPS,
+)
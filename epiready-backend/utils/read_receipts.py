@@ -0,0 +1,55 @@
+import os
+import threading
+
+
+class ReadReceiptCoalescer:
+    """
+    Batches read receipts so each chat room gets at most one 'read_receipts'
+    event per *interval* seconds, however many cursor updates arrive.
+
+    Only the newest message id per (room, user) is kept between flushes.
+    Receipts are dropped until start() has been called with a Socket.IO
+    server, so REST handlers can call add() unconditionally.
+    """
+
+    def __init__(self, interval=2.0):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._socketio = None
+
+    def add(self, room_id, user_id, message_id):
+        if self._socketio is None:
+            return
+        with self._lock:
+            room = self._pending.setdefault(room_id, {})
+            if message_id > room.get(user_id, 0):
+                room[user_id] = message_id
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self):
+        for room_id, readers in self.drain().items():
+            self._socketio.emit('read_receipts', {
+                'room_id': room_id,
+                'receipts': [{'user_id': uid, 'last_read_message_id': mid} for uid, mid in readers.items()]
+            }, room=f"chat_room_{room_id}")
+
+    def start(self, socketio):
+        self._socketio = socketio
+
+        def run():
+            while True:
+                socketio.sleep(self.interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"[read_receipts] flush failed: {e}")
+
+        socketio.start_background_task(run)
+
+
+read_receipts = ReadReceiptCoalescer(float(os.getenv('READ_RECEIPT_INTERVAL', '2')))
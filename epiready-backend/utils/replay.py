@@ -0,0 +1,70 @@
+import os
+import threading
+import uuid
+from collections import OrderedDict, deque
+
+
+class ReplayBuffer:
+    """
+    Recent socket events per user, so a client that reconnects can get what
+    it missed instead of polling.
+
+    Each user has a bounded ring of (seq, event, data) with seq increasing by
+    one per recorded event. The *epoch* identifies this process: sequence
+    numbers from another worker or from before a restart are meaningless
+    here, so a mismatched epoch is treated like a rolled-over buffer and the
+    caller falls back to the database. Users are evicted least recently used
+    beyond *max_users*.
+    """
+
+    def __init__(self, capacity=100, max_users=10000):
+        self.capacity = capacity
+        self.max_users = max_users
+        self.epoch = uuid.uuid4().hex[:12]
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, user_id, event, data):
+        """Appends an event and returns *data* stamped with its seq and the epoch."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = {'seq': 0, 'events': deque(maxlen=self.capacity)}
+                if len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user_id)
+            entry['seq'] += 1
+            data = dict(data, seq=entry['seq'], epoch=self.epoch)
+            entry['events'].append((entry['seq'], event, data))
+            return data
+
+    def last_seq(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            return entry['seq'] if entry else 0
+
+    def since(self, user_id, epoch, last_seq):
+        """
+        Events after *last_seq* as [(event, data)], or None when they can't
+        all be served from memory (other epoch, or the gap has rolled off).
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+            if epoch != self.epoch:
+                return None
+            if entry is None:
+                # Nothing recorded for this user since the process started
+                return [] if last_seq == 0 else None
+            events = entry['events']
+            if last_seq > entry['seq']:
+                return None
+            if events and events[0][0] > last_seq + 1:
+                return None
+            return [(event, data) for seq, event, data in events if seq > last_seq]
+
+
+replay_buffer = ReplayBuffer(
+    capacity=int(os.getenv('REPLAY_BUFFER_SIZE', '100')),
+    max_users=int(os.getenv('REPLAY_MAX_USERS', '10000')),
+)
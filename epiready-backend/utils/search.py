@@ -0,0 +1,75 @@
+import re
+from sqlalchemy import DDL, event, func, literal, literal_column, select, cast, String, Text, text
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+# Text search configuration used both by the GIN expression indexes and by
+# queries; the two must match exactly for Postgres to use the index.
+SEARCH_CONFIG = cast(literal('english'), REGCONFIG)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def search_document(*columns):
+    """
+    The tsvector indexed for *columns* (concatenated, NULLs as empty). Use the
+    same call in the model's index and in queries.
+    """
+    parts = [func.coalesce(c if isinstance(c.type, String) else cast(c, Text), '') for c in columns]
+    document = parts[0]
+    for part in parts[1:]:
+        document = document.op('||')(' ').op('||')(part)
+    return func.to_tsvector(SEARCH_CONFIG, document)
+
+
+def register_sqlite_fts(table, columns):
+    """
+    SQLite stand-in for the GIN indexes: an external-content FTS5 table named
+    '<table>_fts' over *columns*, kept in sync by triggers. Created alongside
+    *table* by create_all() and only on SQLite. The porter tokenizer stems
+    English words like the Postgres 'english' configuration does.
+    """
+    fts = f"{table.name}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{table.name}', content_rowid='id', "
+        f"tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table.name} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table.name} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+    ]
+    for statement in statements:
+        event.listen(table, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+    event.listen(table, 'before_drop', DDL(f"DROP TABLE IF EXISTS {fts}").execute_if(dialect='sqlite'))
+
+
+def has_search_terms(q):
+    """False when *q* has no words to match (e.g. only punctuation)."""
+    return bool(_TOKEN.search(q))
+
+
+def fts5_query(q):
+    """Quotes each word so user input can't use FTS5 query syntax; words are ANDed."""
+    return " ".join(f'"{token}"' for token in _TOKEN.findall(q))
+
+
+def match_subquery(dialect, model, document, q):
+    """
+    Subquery of (id, rank) for rows of *model* matching *q*, higher rank first.
+    *document* is the model's search_document() expression (Postgres only).
+    """
+    if dialect == 'postgresql':
+        query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        return select(
+            model.id.label('id'), func.ts_rank(document, query).label('rank')
+        ).where(document.op('@@')(query)).subquery()
+
+    fts = f"{model.__tablename__}_fts"
+    return select(
+        literal_column('rowid').label('id'), (-func.bm25(literal_column(fts))).label('rank')
+    ).select_from(text(fts)).where(literal_column(fts).op('MATCH')(fts5_query(q))).subquery()
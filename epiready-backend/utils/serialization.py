@@ -0,0 +1,81 @@
+from datetime import date, datetime, timezone
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    orjson serializes datetimes natively in the same ISO 8601 form as
+    datetime.isoformat(), so rows can be handed over without converting each
+    timestamp in Python first.
+    """
+
+    mimetype = "application/json"
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.options), mimetype=self.mimetype
+        )
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Fallback when orjson is not installed: stdlib json with ISO 8601 datetimes."""
+
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, (datetime, date)):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+def _default(o):
+    if hasattr(o, "to_dict"):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def init_json(app):
+    """Installs the fastest available JSON provider on *app*."""
+    app.json = OrjsonProvider(app) if orjson else IsoJSONProvider(app)
+
+
+def columns(model, exclude=()):
+    """All table columns of *model* (the same keys its to_dict() returns)."""
+    return [column for column in model.__table__.columns if column.name not in exclude]
+
+
+def project(query, model, *extra):
+    """
+    Runs *query* as a column projection over *model* instead of loading ORM
+    instances, returning plain dicts. Extra labelled columns (e.g. joined
+    names) are appended to each row.
+    """
+    return rows_to_dicts(query.with_entities(*columns(model), *extra).all())
+
+
+def rows_to_dicts(rows):
+    return [dict(row._mapping) for row in rows]
+
+
+def parse_timestamp(value):
+    """Parses an ISO 8601 string into a naive UTC datetime (the storage format)."""
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
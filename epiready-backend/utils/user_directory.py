@@ -0,0 +1,29 @@
+from flask import g
+from sqlalchemy import select
+from config.database import db
+from models.user import User
+
+
+def get_users(user_ids):
+    """
+    {id: {'id', 'email', 'role'}} for *user_ids*, loaded with at most one IN
+    query per call and memoized on flask.g, so every serializer in the same
+    request or socket event shares one lookup per user.
+    """
+    directory = g.setdefault('user_directory', {})
+    missing = {uid for uid in user_ids if uid is not None and uid not in directory}
+    if missing:
+        for row in db.session.execute(select(User.id, User.email, User.role).where(User.id.in_(missing))):
+            directory[row.id] = dict(row._mapping)
+        for uid in missing:
+            directory.setdefault(uid, None)
+    return {uid: directory.get(uid) for uid in user_ids if uid is not None}
+
+
+def remember_user(user):
+    """Seeds the directory with an already-loaded User so it isn't queried again."""
+    g.setdefault('user_directory', {})[user.id] = {'id': user.id, 'email': user.email, 'role': user.role}
+
+
+def sender_emails(user_ids):
+    return {uid: user['email'] if user else None for uid, user in get_users(user_ids).items()}
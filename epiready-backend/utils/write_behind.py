@@ -0,0 +1,195 @@
+import atexit
+import os
+import signal
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from sqlalchemy import func, select, text
+from config.database import db
+from models.chat import ChatMessage
+
+
+class MessageIdAllocator:
+    """
+    Hands out chat message ids before the row is written.
+
+    On Postgres ids come from the table's own sequence, so they never clash
+    with rows inserted through the normal path and stay in the order the
+    messages were accepted across workers. Elsewhere (SQLite in development
+    and tests) a process-local counter seeded from MAX(id) stands in; that is
+    only safe with a single writer.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sequence = None
+        self._next = None
+
+    def allocate(self):
+        if db.engine.dialect.name == 'postgresql':
+            if self._sequence is None:
+                self._sequence = db.session.execute(
+                    text("SELECT pg_get_serial_sequence('chat_messages', 'id')")
+                ).scalar()
+            return db.session.execute(select(func.nextval(self._sequence))).scalar()
+
+        with self._lock:
+            if self._next is None:
+                self._next = (db.session.execute(select(func.max(ChatMessage.id))).scalar() or 0) + 1
+            allocated, self._next = self._next, self._next + 1
+            return allocated
+
+
+class ChatWriteBehind:
+    """
+    Optional write-behind buffer for messages sent over Socket.IO.
+
+    submit() assigns the message its id and created_at, then returns it
+    unsaved so the caller can emit straight away. updated_at is stamped
+    when the row is actually written, so a message delayed by retries still
+    sorts after the /chat/sync watermarks handed out in the meantime. A background task writes
+    pending messages in submission order (so per-room order holds) in
+    batches of up to *batch_size*, at most *interval* seconds after they were
+    accepted. The buffer is also flushed when it fills up, at interpreter exit
+    and on SIGTERM.
+
+    When a batch fails its rows are retried one by one, so a single bad row
+    (e.g. its room was deleted) doesn't hold back the rest. If every row
+    fails the database is most likely unavailable, and the whole batch is
+    kept for the next flush. A row that fails while others in its batch
+    succeed is retried on later flushes and, after *max_attempts*, moved to
+    dead_letters and logged instead of being retried forever.
+    """
+
+    def __init__(self, enabled=False, interval=0.05, batch_size=100, max_pending=5000, max_attempts=5):
+        self.enabled = enabled
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.ids = MessageIdAllocator()
+        self.dead_letters = deque(maxlen=1000)
+        self._attempts = {}
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._app = None
+
+    def submit(self, chat_room_id, sender_id, content, message_type='text', file_url=None):
+        now = datetime.now(timezone.utc)
+        values = {
+            'id': self.ids.allocate(),
+            'chat_room_id': chat_room_id,
+            'sender_id': sender_id,
+            'content': content,
+            'message_type': message_type,
+            'file_url': file_url,
+            'created_at': now,
+            'updated_at': now,
+            'is_edited': False,
+            'is_deleted': False,
+        }
+        with self._lock:
+            self._pending.append(values)
+            backlog = len(self._pending)
+        if backlog >= self.max_pending:
+            # Backpressure: the writer has fallen behind, write inline
+            self.flush()
+        # Transient instance for building the payload; never added to a session
+        return ChatMessage(**values)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Writes everything pending, batch by batch. Returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._pending[:self.batch_size]
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                    saved, failed = batch, []
+                except Exception as e:
+                    print(f"[write_behind] flush of {len(batch)} messages failed, retrying one by one: {e}")
+                    saved, failed = self._write_each(batch)
+                    if not saved:
+                        # Nothing went in: keep the batch for the next flush
+                        return written
+                done = {id(values) for values in saved + self._give_up(failed)}
+                with self._lock:
+                    self._pending = [values for values in self._pending if id(values) not in done]
+                written += len(saved)
+                if failed:
+                    # Retry the rest of the failures on the next flush, not in a tight loop
+                    return written
+
+    def _write_each(self, batch):
+        saved, failed = [], []
+        for values in batch:
+            try:
+                self._write([values])
+                saved.append(values)
+            except Exception as e:
+                print(f"[write_behind] message {values['id']} failed: {e}")
+                failed.append(values)
+        return saved, failed
+
+    def _give_up(self, failed):
+        """Counts an attempt for each failed row; returns those moved to dead_letters."""
+        dropped = []
+        for values in failed:
+            attempts = self._attempts.get(values['id'], 0) + 1
+            if attempts < self.max_attempts:
+                self._attempts[values['id']] = attempts
+                continue
+            self._attempts.pop(values['id'], None)
+            self.dead_letters.append(values)
+            dropped.append(values)
+            print(f"[write_behind] dropping message {values['id']} for room {values['chat_room_id']} "
+                  f"after {attempts} attempts")
+        return dropped
+
+    def _write(self, batch):
+        # Use a fresh session from an app context of our own so a flush from
+        # the background task never interferes with a request's session
+        with self._app.app_context():
+            try:
+                # ORM inserts so the room summary listeners still run
+                now = datetime.now(timezone.utc)
+                db.session.add_all([ChatMessage(**dict(values, updated_at=now)) for values in batch])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    def start(self, socketio, app):
+        if not self.enabled:
+            return
+        self._app = app
+
+        def run():
+            while True:
+                socketio.sleep(self.interval)
+                self.flush()
+
+        socketio.start_background_task(run)
+        atexit.register(self.flush)
+        if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+            # Turn SIGTERM into a normal exit so the atexit flush runs
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+
+chat_write_behind = ChatWriteBehind(
+    enabled=os.getenv('CHAT_WRITE_BEHIND', 'false').lower() == 'true',
+    interval=int(os.getenv('CHAT_WRITE_BEHIND_INTERVAL_MS', '50')) / 1000,
+    batch_size=int(os.getenv('CHAT_WRITE_BEHIND_BATCH_SIZE', '100')),
+    max_attempts=int(os.getenv('CHAT_WRITE_BEHIND_MAX_ATTEMPTS', '5')),
+)